@@ -102,6 +102,46 @@ export default function Home() {
     URL.revokeObjectURL(url);
   };
 
+  // Binäres .rcmap-Format für das Spiel (Aufbau siehe mapformat.py)
+  const exportToBinaryFile = () => {
+    const height = grid.length;
+    const width = height > 0 ? grid[0].length : 0;
+    const headerSize = 32; // 28 Byte Header ohne Palette, auf 16 Byte aufgerundet
+
+    // 1. Header schreiben (little-endian)
+    const buffer = new ArrayBuffer(headerSize + (width + 2) * (height + 2));
+    const view = new DataView(buffer);
+    "RCMP".split("").forEach((char, i) => view.setUint8(i, char.charCodeAt(0)));
+    view.setUint16(4, 1, true); // Formatversion
+    view.setUint16(6, headerSize, true); // Start des Rasters
+    view.setUint32(8, width, true);
+    view.setUint32(12, height, true);
+    view.setUint16(16, 64, true); // Kachelgröße in Pixeln
+    view.setUint16(18, 0, true); // Keine Palette
+    view.setInt32(20, -1, true); // Startpunkt x (-1 = automatisch)
+    view.setInt32(24, -1, true); // Startpunkt y (-1 = automatisch)
+
+    // 2. Raster mit einem festen Rand aus Wänden schreiben
+    const tiles = new Uint8Array(buffer, headerSize);
+    tiles.fill(1);
+    grid.forEach((row, rowIndex) =>
+      row.forEach((cell, colIndex) => {
+        tiles[(rowIndex + 1) * (width + 2) + colIndex + 1] = Math.abs(cell);
+      })
+    );
+
+    // 3. Download auslösen
+    const blob = new Blob([buffer], { type: "application/octet-stream" });
+    const url = URL.createObjectURL(blob);
+    const a = document.createElement("a");
+    a.href = url;
+    a.download = "maze.rcmap";
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+    URL.revokeObjectURL(url);
+  };
+
   const setupMazePreset = () => {
     setGrid((prevGrid) =>
       prevGrid.map((row, rowIndex) =>
@@ -162,6 +202,12 @@ export default function Home() {
             >
               {t("exportLabel")}
             </button>
+            <button
+              className="px-4 py-2 bg-slate-400"
+              onClick={exportToBinaryFile}
+            >
+              {t("exportBinaryLabel")}
+            </button>
             <button
               className="px-4 py-2 bg-slate-400 rounded-r"
               onClick={() => console.log(exportToPython())}
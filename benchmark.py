@@ -0,0 +1,644 @@
+"""
+Benchmarks for the raycasting engine in main.py.
+
+Usage:
+    python benchmark.py frames [--maps default maze maze-10] [--res 10 50 100] [--frames 120] [--textured] [--adaptive 60] [--sprites 500] [--pvs] [--output results.json]
+    python benchmark.py maze [--sizes 10 100 1000 2000] [--old-max 200]
+    python benchmark.py algorithms [--algorithms eller kruskal] [--sizes 100 500] [--stream-height 10000]
+    python benchmark.py chunks [--frames 3000] [--speed 5] [--rays 480]
+    python benchmark.py scaling [--map default] [--rays 1920] [--frames 60] [--workers 1 2 4 8] [--mode process]
+    python benchmark.py startup [--maps default maze maze-50] [--runs 10] [--res 50]
+    python benchmark.py paths [--sizes 100 1000] [--agents 10000] [--queries 20]
+    python benchmark.py entities [--map maze-50] [--count 10000] [--cell-tiles 1 2 4 8] [--queries 1000]
+    python benchmark.py pvs [--maps maze maze-25 maze-50] [--workers 1 2 4] [--max-distance 9.3]
+    python benchmark.py replay session.rcinput [--engines numpy dda] [--res 50] [--hashes frames.txt] [--compare frames.txt]
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+import main
+
+
+def load_map(name: str):
+    """
+    Returns a game map by name: "default" (the built-in map), "maze" (maze.py),
+    "maze-N" (a generated N x N maze with a fixed seed), "ALGORITHM-N" (the same with one of
+    mazegenerator.ALGORITHMS, e.g. "eller-100") or the path of a .rcmap file.
+    """
+    if name == "default":
+        return main.initial_game_map
+    if name == "maze":
+        import maze
+        return maze.game_map
+    if name.endswith(".rcmap"):
+        import mapformat
+        return main.World.from_map_file(mapformat.load_map(name)).grid
+    algorithm, _, size = name.rpartition("-")
+    if size.isdigit():
+        import mazegenerator
+        algorithm = "backtracker" if algorithm == "maze" else algorithm
+        if algorithm in mazegenerator.ALGORITHMS:
+            return mazegenerator.generateMaze(int(size), seed=0, algorithm=algorithm) # Same maze on every run
+    raise ValueError(f"Unknown map '{name}'. Use default, maze, maze-N, ALGORITHM-N or a .rcmap file.")
+
+
+def texture_walls(game_map: list[list[int]]) -> list[list[int]]:
+    """Returns a copy of the map whose walls use the textured map values 2-4 in a fixed pattern."""
+    return [[2 + (x + 2 * y) % 3 if tile != 0 else 0 for x, tile in enumerate(row)] for y, row in enumerate(game_map)]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Returns the pct-th percentile of samples (nearest-rank)."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def time_casts(config: main.RaycastingConfig, world: main.World, frames: int) -> list[float]:
+    """Casts `frames` frames while the player turns in place and returns each frame time in milliseconds."""
+    player = main.setup_player(world)
+    config.cast(None, player, world) # Warm-up (also starts worker pools)
+    samples = []
+    for _ in range(frames):
+        player.angle += player.rot_speed
+        start = time.perf_counter()
+        config.cast(None, player, world)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def camera_path(world: main.World, frames: int) -> list[tuple[float, float, float]]:
+    """
+    Scripted camera path: starts at the spawn point, walks forward and turns whenever
+    a wall blocks the way. Deterministic, so every run renders the same frames.
+    """
+    player = main.setup_player(world)
+    path = []
+    for frame in range(frames):
+        new_x = player.x + math.cos(player.angle) * player.move_speed
+        new_y = player.y + math.sin(player.angle) * player.move_speed
+        if player.can_move(new_x, new_y, world):
+            player.x, player.y = new_x, new_y
+        else:
+            player.angle += math.pi / 7 # Turn away from the wall
+        player.angle += player.rot_speed * 0.2 * math.sin(frame / 30) # Look around while walking
+        path.append((player.x, player.y, player.angle))
+    return path
+
+
+def summarize(frames: list[dict[str, float]]) -> dict[str, dict[str, float]]:
+    """Returns p50/p95/p99/mean milliseconds per stage for a list of FrameTimer frames."""
+    summary = {}
+    for stage in frames[0]:
+        samples = [frame[stage] for frame in frames]
+        summary[stage] = {
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "mean": statistics.mean(samples),
+        }
+    return summary
+
+
+def run_frames(args: argparse.Namespace):
+    """Renders every map at every resolution headlessly and reports per-stage frame times."""
+    width, height = args.size
+    results = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "size": [width, height],
+            "engine": args.engine,
+            "frames": args.frames,
+            "textured": args.textured,
+            "adaptive": args.adaptive,
+            "frame_cache": args.frame_cache,
+            "sprites": args.sprites,
+            "pvs": args.pvs,
+        },
+        "runs": [],
+    }
+
+    for map_name in args.maps:
+        game_map = load_map(map_name)
+        if args.textured:
+            game_map = texture_walls(game_map)
+        path = camera_path(main.World(game_map, 64), args.warmup + args.frames)
+        for res in args.res:
+            timer = main.FrameTimer()
+            draw_config = main.DrawConfig()
+            controller = main.ResolutionController(width, args.adaptive) if args.adaptive else None
+            frame_cache = main.FrameCache() if args.frame_cache else None
+            main.run_headless(game_map, res, path, (width, height), engine=args.engine, timer=timer, draw_config=draw_config,
+                              resolution_controller=controller, frame_cache=frame_cache, sprites=args.sprites,
+                              pvs=args.pvs)
+            summary = summarize(timer.frames[args.warmup:])
+            # Background pixels written per screen pixel in the last frame (1.0 = no overdraw from clears)
+            clears_per_pixel = draw_config.cleared_pixels / (width * height)
+            run = {"map": map_name, "res": res, "stages": summary, "clears_per_pixel": clears_per_pixel}
+            print(f"\nmap={map_name} res={res}% clears/pixel={clears_per_pixel:.2f}")
+            if frame_cache is not None:
+                run["frame_cache"] = frame_cache.stats()
+                print("frame cache: " + " ".join(f"{name}={value:.3g}" for name, value in run["frame_cache"].items()))
+            if controller is not None:
+                run["adaptive"] = {"target_fps": args.adaptive, "changes": controller.changes,
+                                   "final_resolution": controller.resolution}
+                print(f"adaptive: target {args.adaptive} fps, {controller.changes} changes, "
+                      f"final resolution {controller.resolution:.1f}% ({controller.rays} rays)")
+            if draw_config.sprite_cache is not None:
+                run["sprite_cache"] = draw_config.sprite_cache.stats()
+                print(f"sprites: {draw_config.visible_sprites} drawn in the last frame, cache " +
+                      " ".join(f"{name}={value:.3g}" for name, value in run["sprite_cache"].items()))
+            if draw_config.texture_cache is not None:
+                run["texture_cache"] = draw_config.texture_cache.stats()
+                print("texture cache: " + " ".join(f"{name}={value:.3g}" for name, value in run["texture_cache"].items()))
+            results["runs"].append(run)
+
+            print(f"{'stage':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+            for stage, stats in summary.items():
+                print(f"{stage:>8} {stats['p50']:9.3f} {stats['p95']:9.3f} {stats['p99']:9.3f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+
+def measure(function, *args) -> tuple[float, float]:
+    """
+    Runs function(*args) twice and returns (seconds, peak traced memory in MB).
+    The time comes from an untraced run, because tracemalloc slows down allocation-heavy code.
+    """
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run_maze(args: argparse.Namespace):
+    """Compares the object-based getMaze with the array-based generateMaze over maze sizes."""
+    import mazegenerator
+
+    print(f"{'cells':>6} {'getMaze s':>10} {'MB':>8} {'generateMaze s':>15} {'MB':>8}")
+    for size in args.sizes:
+        if size <= args.old_max:
+            random.seed(0)
+            old_seconds, old_peak = measure(mazegenerator.getMaze, size)
+            old = f"{old_seconds:10.3f} {old_peak:8.1f}"
+        else:
+            old = f"{'-':>10} {'-':>8}" # Too slow / too much memory for the object-based generator
+        new_seconds, new_peak = measure(mazegenerator.generateMaze, size, 0)
+        print(f"{size:>6} {old} {new_seconds:15.3f} {new_peak:8.1f}")
+
+
+def consume(rows):
+    """Reads a row iterator to the end without keeping the rows."""
+    for _ in rows:
+        pass
+
+
+def run_algorithms(args: argparse.Namespace):
+    """
+    Reports time and peak memory per maze algorithm and size. Row algorithms are also streamed
+    (rows consumed and dropped, as when writing to disk) to show their memory stays O(width).
+    """
+    import mazegenerator
+
+    algorithms = args.algorithms or mazegenerator.ALGORITHMS
+    print(f"{'algorithm':>12} {'cells':>6} {'seconds':>8} {'MB':>8}")
+    for algorithm in algorithms:
+        for size in args.sizes:
+            seconds, peak = measure(mazegenerator.generateMaze, size, 0, algorithm)
+            print(f"{algorithm:>12} {size:>6} {seconds:8.3f} {peak:8.1f}")
+
+    streaming = [algorithm for algorithm in algorithms if algorithm in mazegenerator.ROW_ALGORITHMS]
+    if streaming and args.stream_height:
+        print(f"\nstreamed {args.stream_width} x {args.stream_height} cells")
+        print(f"{'algorithm':>12} {'seconds':>8} {'MB':>8} {'grid MB':>8}")
+        grid_mb = (args.stream_width * 2 + 1) * (args.stream_height * 2 + 1) / 1024 / 1024 # Size of the full grid
+        for algorithm in streaming:
+            seconds, peak = measure(lambda: consume(mazegenerator.mazeRows(args.stream_width, args.stream_height, 0, algorithm)))
+            print(f"{algorithm:>12} {seconds:8.3f} {peak:8.1f} {grid_mb:8.1f}")
+
+
+def run_chunks(args: argparse.Namespace):
+    """
+    Walks straight through an endless ChunkedWorld and reports the time per frame, with and without
+    background prefetching. "update" is the chunk bookkeeping alone: without prefetching it shows
+    the stalls of generating chunks on the main thread when the window re-centers.
+    """
+    print(f"frames={args.frames} speed={args.speed}px rays={args.rays}")
+    print(f"{'prefetch':>9} {'update max':>11} {'frame p50':>10} {'frame p99':>10} {'frame max':>10}  chunk counters")
+    for prefetch in (False, True):
+        world = main.ChunkedWorld(64, seed=0, chunk_cells=args.chunk_cells, prefetch=prefetch)
+        config = main.RaycastingConfig(math.pi / 2.8, args.rays, world.tile_size / 1.2 * 10, "numpy")
+        player = main.setup_player(world)
+        player.angle = 0.0 # Walk east, through walls, so the camera keeps entering new chunks
+        updates, frames = [], []
+        try:
+            for _ in range(args.frames):
+                player.x += args.speed
+                start = time.perf_counter()
+                world.update(player)
+                updated = time.perf_counter()
+                config.cast(None, player, world)
+                updates.append((updated - start) * 1000)
+                frames.append((time.perf_counter() - start) * 1000)
+        finally:
+            world.close()
+        counters = " ".join(f"{name}={value}" for name, value in world.stats().items())
+        print(f"{str(prefetch):>9} {max(updates):11.3f} {percentile(frames, 50):10.3f} {percentile(frames, 99):10.3f} "
+              f"{max(frames):10.3f}  {counters}")
+
+
+def run_scaling(args: argparse.Namespace):
+    """Reports cast time per frame against the worker count of the parallel engine."""
+    world = main.World(load_map(args.map), 64)
+    print(f"map={args.map} rays={args.rays} frames={args.frames} mode={args.mode}")
+
+    # Single-process vectorized engine as the reference point
+    config = main.RaycastingConfig(math.pi / 2.8, args.rays, world.tile_size / 1.2 * 10, "numpy")
+    reference = statistics.mean(time_casts(config, world, args.frames))
+    print(f"{'workers':>8} {'mean ms':>9} {'p95 ms':>9} {'speedup':>8}")
+    print(f"{'numpy':>8} {reference:9.3f} {'':>9} {1.0:8.2f}")
+
+    for workers in args.workers:
+        config = main.RaycastingConfig(math.pi / 2.8, args.rays, world.tile_size / 1.2 * 10, "parallel",
+                                       workers=workers, parallel_mode=args.mode)
+        try:
+            samples = time_casts(config, world, args.frames)
+        finally:
+            config.close()
+        mean = statistics.mean(samples)
+        print(f"{workers:>8} {mean:9.3f} {percentile(samples, 95):9.3f} {reference / mean:8.2f}")
+
+
+def run_paths(args: argparse.Namespace):
+    """
+    Reports A* per query against one shared flow field for mazes of the given sizes
+    (a maze of N cells is 2N+1 tiles per side): build time, cached lookup, path following
+    and one step for many agents at once.
+    """
+    import mazegenerator
+    import pathfinding
+
+    print(f"agents={args.agents} queries={args.queries}")
+    print(f"{'tiles':>11} {'A* ms':>9} {'field ms':>9} {'cached us':>10} {'follow ms':>10} {'agents ms':>10} {'path':>8}")
+    for size in args.sizes:
+        world = main.World(mazegenerator.generateMaze(size, seed=0), 64)
+        free = np.argwhere(world.grid == 0)
+        rng = np.random.default_rng(0)
+        goal = (world.size.width - 2, world.size.height - 2) # Bottom-right cell, the "exit"
+        starts = [(int(x), int(y)) for y, x in free[rng.integers(0, len(free), args.queries)]]
+
+        start = time.perf_counter()
+        for tile in starts:
+            pathfinding.astar(world, tile, goal)
+        astar_ms = (time.perf_counter() - start) * 1000 / len(starts)
+
+        pathfinder = pathfinding.Pathfinder(world)
+        start = time.perf_counter()
+        flow = pathfinder.field(goal) # Computed
+        field_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        pathfinder.field(goal) # Cached
+        cached_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for tile in starts:
+            path = flow.path(*tile)
+        follow_ms = (time.perf_counter() - start) * 1000 / len(starts)
+
+        agents = free[rng.integers(0, len(free), args.agents)]
+        start = time.perf_counter()
+        flow.next_tiles(agents[:, 1], agents[:, 0])
+        agents_ms = (time.perf_counter() - start) * 1000
+        print(f"{f'{world.size.width}x{world.size.height}':>11} {astar_ms:9.2f} {field_ms:9.1f} {cached_ms * 1000:10.2f} "
+              f"{follow_ms:10.2f} {agents_ms:10.2f} {len(path) - 1:8d}")
+
+
+def run_entities(args: argparse.Namespace):
+    """
+    Microbenchmarks for main.SpatialHash with many entities on one map, per cell size in tiles:
+    insert, move (a short random step each), remove, radius / ray / nearest queries and collision
+    sweeps against walls and entities. The last row answers the same queries by scanning all entities.
+    Times are microseconds per operation.
+    """
+    world = main.World(load_map(args.map), 64)
+    tile = world.tile_size
+    rng = np.random.default_rng(0)
+    free = np.argwhere(world.grid == 0)
+    tiles = free[rng.integers(0, len(free), args.count)]
+    positions = ((tiles[:, ::-1] + rng.uniform(0.2, 0.8, (args.count, 2))) * tile).tolist()
+    steps = rng.uniform(-3, 3, (args.count, 2)).tolist()
+    points = ((free[rng.integers(0, len(free), args.queries)][:, ::-1] + 0.5) * tile).tolist()
+    angles = rng.uniform(0, 2 * math.pi, args.queries).tolist()
+    radius, ray_length = 2 * tile, 16 * tile
+
+    def per_op(function, items) -> float:
+        start = time.perf_counter()
+        for item in items:
+            function(*item)
+        return (time.perf_counter() - start) * 1e6 / len(items)
+
+    def scan_radius(x, y):
+        return [e for e in entities if (e.x - x) ** 2 + (e.y - y) ** 2 <= radius * radius]
+
+    def scan_ray(x, y, angle):
+        dir_x, dir_y = math.cos(angle), math.sin(angle)
+        hits = []
+        for e in entities:
+            ox, oy = e.x - x, e.y - y
+            along = ox * dir_x + oy * dir_y
+            squared = e.radius * e.radius - (ox * ox + oy * oy - along * along)
+            if squared >= 0 and 0 <= along - math.sqrt(squared) <= ray_length:
+                hits.append((along - math.sqrt(squared), e))
+        return min(hits, key=lambda hit: hit[0], default=None)
+
+    def scan_nearest(x, y):
+        return min(entities, key=lambda e: (e.x - x) ** 2 + (e.y - y) ** 2)
+
+    print(f"map={args.map} ({world.size.width}x{world.size.height}) entities={args.count} queries={args.queries}")
+    print(f"{'cell':>6} {'insert':>8} {'move':>8} {'remove':>8} {'radius':>8} {'ray':>8} {'nearest':>8} {'sweep':>8}")
+    for cell_tiles in args.cell_tiles:
+        grid = main.SpatialHash(tile * cell_tiles)
+        entities = [main.Sprite(x, y, 2, 0.8, 0.2 * tile) for x, y in positions]
+        insert_us = per_op(grid.insert, [(e,) for e in entities])
+        move_us = per_op(grid.move, [(e, e.x + dx, e.y + dy) for e, (dx, dy) in zip(entities, steps)])
+        radius_us = per_op(lambda x, y: grid.query_radius(x, y, radius), points)
+        ray_us = per_op(lambda x, y, angle: grid.query_ray(x, y, math.cos(angle), math.sin(angle), ray_length, first=True),
+                        [(x, y, angle) for (x, y), angle in zip(points, angles)])
+        nearest_us = per_op(grid.nearest, points)
+        movers = entities[:args.queries]
+        sweep_us = per_op(lambda e, dx, dy: main.sweep_circle(world, e.x, e.y, dx, dy, e.radius, entities=grid, exclude=e),
+                          [(e, dx, dy) for e, (dx, dy) in zip(movers, steps)])
+        remove_us = per_op(grid.remove, [(e,) for e in entities])
+        print(f"{cell_tiles:6d} {insert_us:8.2f} {move_us:8.2f} {remove_us:8.2f} {radius_us:8.1f} {ray_us:8.1f} "
+              f"{nearest_us:8.1f} {sweep_us:8.1f}")
+
+    scans = points[:max(1, args.queries // 10)] # A full scan is slow, so fewer queries
+    radius_us = per_op(scan_radius, scans)
+    ray_us = per_op(scan_ray, [(x, y, angle) for (x, y), angle in zip(scans, angles)])
+    nearest_us = per_op(scan_nearest, scans)
+    print(f"{'scan':>6} {'-':>8} {'-':>8} {'-':>8} {radius_us:8.1f} {ray_us:8.1f} {nearest_us:8.1f} {'-':>8}")
+
+
+def run_pvs(args: argparse.Namespace):
+    """
+    Reports PVS build time against worker count (never cached), the time to load the built set
+    from the cache, its size and how much of the map each tile sees, and query times.
+    """
+    import tempfile
+    import pvs
+
+    rng = np.random.default_rng(0)
+    print(f"rays={args.rays} max distance={args.max_distance} tiles")
+    print(f"{'map':>10} {'walkable':>9} " + " ".join(f"{f'{workers}w s':>7}" for workers in args.workers) +
+          f" {'load ms':>8} {'KB':>7} {'runs':>6} {'visible':>8} {'see us':>7} {'mask us':>8}")
+    for map_name in args.maps:
+        world = main.World(load_map(map_name), 64)
+        build_s = []
+        for workers in args.workers:
+            start = time.perf_counter()
+            visible_sets = pvs.build(world, args.rays, args.max_distance, workers)
+            build_s.append(time.perf_counter() - start)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            visible_sets.save(os.path.join(cache_dir, visible_sets.key + ".npz"))
+            start = time.perf_counter()
+            pvs.load_or_build(world, args.rays, args.max_distance, cache_dir=cache_dir)
+            load_ms = (time.perf_counter() - start) * 1000
+
+        free = np.argwhere(world.grid == 0)[:, ::-1].tolist()
+        pairs = [(free[i], free[j]) for i, j in rng.integers(0, len(free), (args.queries, 2)).tolist()]
+        start = time.perf_counter()
+        for source, target in pairs:
+            visible_sets.can_see(source, target)
+        see_us = (time.perf_counter() - start) * 1e6 / len(pairs)
+        start = time.perf_counter()
+        for source, _ in pairs:
+            visible_sets.visible_mask(*source)
+        mask_us = (time.perf_counter() - start) * 1e6 / len(pairs)
+
+        walkable = len(free)
+        print(f"{map_name:>10} {walkable:9d} " + " ".join(f"{seconds:7.2f}" for seconds in build_s) +
+              f" {load_ms:8.2f} {visible_sets.nbytes / 1024:7.0f} {len(visible_sets.starts) / walkable:6.1f} "
+              f"{visible_sets.lengths.sum() / walkable:8.1f} {see_us:7.2f} {mask_us:8.1f}")
+
+
+def run_replay(args: argparse.Namespace):
+    """
+    Plays an input recording (see main.py --record) back headlessly without a frame cap, once per engine,
+    and reports per-stage frame times. Every frame is hashed: the engines are compared frame by frame
+    with the first one, and with --compare against hashes saved by an earlier run with --hashes
+    (e.g. before changing the renderer), so any changed pixel shows up.
+    """
+    import inputlog
+
+    recording = inputlog.load_recording(args.recording)
+    size = tuple(args.size) if args.size else recording.screen
+    saved = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            saved = file.read().split()
+    height, width = recording.tiles.shape
+    print(f"{args.recording}: {len(recording.frames)} frames, {width}x{height} map, {recording.sprites} sprites, "
+          f"res={args.res}% size={size[0]}x{size[1]}")
+    print(f"{'engine':>9} {'cast p50':>9} {'walls p50':>10} {'total p50':>10} {'total p95':>10} {'frames/s':>9} "
+          f"{'diff':>6} {'first':>6}" + (f" {'saved diff':>11}" if saved is not None else ""))
+
+    reference = None
+    for engine in args.engines:
+        world, path = main.replay_recording(recording)
+        timer = main.FrameTimer()
+        digests = []
+        def hash_frame(info: main.Information):
+            digests.append(hashlib.blake2b(pygame.image.tobytes(info.screen, "RGB"), digest_size=16).hexdigest())
+
+        start = time.perf_counter()
+        main.run_headless(world, args.res, path, size, engine=engine, timer=timer,
+                          frame_cache=main.FrameCache() if args.frame_cache else None, after_frame=hash_frame)
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference = digests
+            if args.hashes:
+                with open(args.hashes, "w", encoding="utf-8") as file:
+                    file.write("\n".join(digests) + "\n")
+        differing = [i for i, (a, b) in enumerate(zip(digests, reference)) if a != b]
+        summary = summarize(timer.frames) if timer.frames else {}
+        p50 = lambda stage: summary.get(stage, {}).get("p50", 0.0)
+        line = (f"{engine:>9} {p50('cast'):9.3f} {p50('walls'):10.3f} {p50('total'):10.3f} "
+                f"{summary.get('total', {}).get('p95', 0.0):10.3f} {len(path) / seconds:9.1f} "
+                f"{len(differing):6d} {differing[0] if differing else '-':>6}")
+        if saved is not None:
+            changed = sum(a != b for a, b in zip(digests, saved)) + abs(len(digests) - len(saved))
+            line += f" {changed:11d}"
+        print(line)
+
+
+# Runs in a fresh interpreter for each startup measurement. Goes through the same steps as the game
+# (start menu, map loading, setup, first frame) and prints how long each phase took as JSON.
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+info = main.init_headless({width}, {height})
+initialized = time.perf_counter()
+main.draw_menu(info, [main.MenuText("Enti 3D", {height} // 3, 72, main.Colors.light_gray),
+                      main.MenuText("Press [S] to enter Map Menu", {height} // 2)])
+menu = time.perf_counter()
+import benchmark
+world = main.World(benchmark.load_map({map_name!r}), 64)
+player = main.setup_player(world)
+minimap = main.setup_minimap(info, world)
+config = main.setup_raycasting(info, world, {res}, {engine!r})
+ready = time.perf_counter()
+main.render_frame(info, world, player, config, minimap, main.DrawConfig())
+config.close()
+done = time.perf_counter()
+print(json.dumps({{"import": imported - start, "init": initialized - imported, "menu": menu - initialized,
+                  "setup": ready - menu, "frame": done - ready}}))
+"""
+
+
+def run_startup(args: argparse.Namespace):
+    """
+    Reports the time from launching Python to the first rendered frame, per phase.
+    Every run is a new process, so nothing is warm except the OS file cache.
+    """
+    width, height = args.size
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    phases = ["import", "init", "menu", "setup", "frame"]
+    print(f"runs={args.runs} res={args.res}% engine={args.engine} size={width}x{height}")
+    print(f"{'map':>10} {'total ms':>9} {'min ms':>9} " + " ".join(f"{phase + ' ms':>9}" for phase in phases))
+
+    for map_name in args.maps:
+        script = STARTUP_SCRIPT.format(width=width, height=height, map_name=map_name, res=args.res, engine=args.engine)
+        totals = []
+        samples = {phase: [] for phase in phases}
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", script], cwd=directory, env=environment,
+                                    capture_output=True, text=True, check=True).stdout
+            totals.append((time.perf_counter() - start) * 1000) # Includes interpreter start and exit
+            result = json.loads(output.strip().splitlines()[-1])
+            for phase in phases:
+                samples[phase].append(result[phase] * 1000)
+        print(f"{map_name:>10} {statistics.median(totals):9.1f} {min(totals):9.1f} "
+              + " ".join(f"{statistics.median(samples[phase]):9.1f}" for phase in phases))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raycasting benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    frames = commands.add_parser("frames", help="Headless per-stage frame times (p50/p95/p99)")
+    frames.add_argument("--maps", nargs="+", default=["default", "maze", "maze-10", "maze-25", "maze-50"],
+                        help="Maps to render: default, maze, maze-N or ALGORITHM-N")
+    frames.add_argument("--res", type=int, nargs="+", default=[10, 50, 100], help="Resolution percentages")
+    frames.add_argument("--frames", type=int, default=120, help="Measured frames per run (default: 120)")
+    frames.add_argument("--warmup", type=int, default=10, help="Unmeasured frames before each run (default: 10)")
+    frames.add_argument("--size", type=int, nargs=2, default=[1920, 1080], metavar=("W", "H"), help="Screen size")
+    frames.add_argument("--engine", choices=list(main.CAST_ENGINES), default="numpy", help="Ray cast engine")
+    frames.add_argument("--textured", action="store_true", help="Draw all walls with the built-in textures")
+    frames.add_argument("--frame-cache", action="store_true", help="Reuse casts between frames (see main.FrameCache)")
+    frames.add_argument("--adaptive", type=int, metavar="FPS",
+                        help="Adapt the resolution to hold this frame rate, starting at each --res value")
+    frames.add_argument("--sprites", type=int, default=0, metavar="N", help="Scatter N sprites over each map")
+    frames.add_argument("--pvs", action="store_true", help="Skip sprites that the PVS of the player's tile rules out")
+    frames.add_argument("--output", help="Write the results as JSON to this file")
+    frames.set_defaults(run=run_frames)
+
+    maze = commands.add_parser("maze", help="Maze generator time and peak memory against maze size")
+    maze.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 200, 500, 1000, 2000],
+                      help="Maze sizes in cells per side")
+    maze.add_argument("--old-max", type=int, default=200, help="Largest size to run the old getMaze for (default: 200)")
+    maze.set_defaults(run=run_maze)
+
+    algorithms = commands.add_parser("algorithms", help="Time and peak memory per maze algorithm")
+    algorithms.add_argument("--algorithms", nargs="+", default=None, help="Algorithms to compare (default: all)")
+    algorithms.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500], help="Maze sizes in cells per side")
+    algorithms.add_argument("--stream-width", type=int, default=100, help="Width in cells of the streamed maze (default: 100)")
+    algorithms.add_argument("--stream-height", type=int, default=20000,
+                            help="Height in cells of the streamed maze, 0 to skip (default: 20000)")
+    algorithms.set_defaults(run=run_algorithms)
+
+    chunks = commands.add_parser("chunks", help="Frame times while walking through an endless chunked world")
+    chunks.add_argument("--frames", type=int, default=3000, help="Frames to walk (default: 3000)")
+    chunks.add_argument("--speed", type=float, default=5.0, help="Pixels walked per frame (default: 5)")
+    chunks.add_argument("--rays", type=int, default=480, help="Rays per frame (default: 480)")
+    chunks.add_argument("--chunk-cells", type=int, default=16, help="Chunk size in maze cells (default: 16)")
+    chunks.set_defaults(run=run_chunks)
+
+    scaling = commands.add_parser("scaling", help="Frame time of the parallel engine against worker count")
+    scaling.add_argument("--map", default="default", help="default, maze, maze-N or ALGORITHM-N (default: default)")
+    scaling.add_argument("--rays", type=int, default=1920, help="Rays per frame (default: 1920)")
+    scaling.add_argument("--frames", type=int, default=60, help="Measured frames per run (default: 60)")
+    scaling.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Worker counts to test")
+    scaling.add_argument("--mode", choices=["process", "thread"], default="process", help="Worker pool type")
+    scaling.set_defaults(run=run_scaling)
+
+    startup = commands.add_parser("startup", help="Time from launch to the first rendered frame (median of fresh processes)")
+    startup.add_argument("--maps", nargs="+", default=["default", "maze", "maze-50"],
+                         help="Maps to start with: default, maze, maze-N, ALGORITHM-N or a .rcmap file")
+    startup.add_argument("--runs", type=int, default=10, help="Processes started per map (default: 10)")
+    startup.add_argument("--res", type=int, default=50, help="Resolution percentage (default: 50)")
+    startup.add_argument("--engine", choices=list(main.CAST_ENGINES), default="dda", help="Ray cast engine (default: dda)")
+    startup.add_argument("--size", type=int, nargs=2, default=[1920, 1080], metavar=("W", "H"), help="Screen size")
+    startup.set_defaults(run=run_startup)
+
+    paths = commands.add_parser("paths", help="A* against cached flow fields on generated mazes")
+    paths.add_argument("--sizes", type=int, nargs="+", default=[100, 1000],
+                       help="Maze sizes in cells per side (default: 100 1000, i.e. 201x201 and 2001x2001 tiles)")
+    paths.add_argument("--agents", type=int, default=10000, help="Agents stepped at once along a flow field (default: 10000)")
+    paths.add_argument("--queries", type=int, default=20, help="Random start tiles per maze (default: 20)")
+    paths.set_defaults(run=run_paths)
+
+    entities = commands.add_parser("entities", help="Spatial hash operations and queries against scanning all entities")
+    entities.add_argument("--map", default="maze-50", help="default, maze, maze-N, ALGORITHM-N or a .rcmap file (default: maze-50)")
+    entities.add_argument("--count", type=int, default=10000, help="Entities on the map (default: 10000)")
+    entities.add_argument("--cell-tiles", type=int, nargs="+", default=[1, 2, 4, 8], help="Hash cell sizes in tiles to compare")
+    entities.add_argument("--queries", type=int, default=1000, help="Queries and collision sweeps per cell size (default: 1000)")
+    entities.set_defaults(run=run_entities)
+
+    visibility = commands.add_parser("pvs", help="Potentially visible set build time, size and query times")
+    visibility.add_argument("--maps", nargs="+", default=["maze", "maze-25", "maze-50"],
+                            help="Maps to build for: default, maze, maze-N, ALGORITHM-N or a .rcmap file")
+    visibility.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Build process counts to compare")
+    visibility.add_argument("--rays", type=int, default=1024, help="Rays per sample point (default: 1024)")
+    visibility.add_argument("--max-distance", type=float, default=math.inf,
+                            help="View distance in tiles (default: unlimited; the game uses about 9.3)")
+    visibility.add_argument("--queries", type=int, default=1000, help="Random tile pairs to query (default: 1000)")
+    visibility.set_defaults(run=run_pvs)
+
+    replay = commands.add_parser("replay", help="Replay an input recording per engine: frame times and bit-for-bit frame diffs")
+    replay.add_argument("recording", help="Recording made with main.py --record PATH")
+    replay.add_argument("--engines", nargs="+", choices=list(main.CAST_ENGINES), default=["numpy", "dda"],
+                        help="Engines to replay with; the first is the reference for the diff (default: numpy dda)")
+    replay.add_argument("--res", type=int, default=50, help="Resolution percentage (default: 50)")
+    replay.add_argument("--size", type=int, nargs=2, metavar=("W", "H"), help="Screen size (default: the recorded one)")
+    replay.add_argument("--frame-cache", action="store_true", help="Reuse casts between frames (see main.FrameCache)")
+    replay.add_argument("--hashes", metavar="PATH", help="Write the reference engine's frame hashes to PATH")
+    replay.add_argument("--compare", metavar="PATH", help="Compare every engine's frames with hashes written by --hashes")
+    replay.set_defaults(run=run_replay)
+
+    args = parser.parse_args()
+    args.run(args)
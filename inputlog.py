@@ -0,0 +1,151 @@
+"""
+Input recordings (.rcinput) for replaying game sessions exactly.
+
+The game moves the player by a fixed step per frame, so a session is reproduced by its map, the
+player's starting state and the controls held in every frame. A recording is a header followed
+by the map and one byte per frame:
+
+    offset  size  field
+    0       4     magic b"RCIN"
+    4       2     format version (1)
+    6       2     tile size in pixels
+    8       4     map width in tiles
+    12      4     map height in tiles
+    16      2     screen width in pixels
+    18      2     screen height in pixels
+    20      4     sprite count (scattered with seed 0, see main.scatter_sprites)
+    24      8*6   player start x, start y, start angle, move speed, rotation speed, radius (float64)
+    72      2     palette entry count
+    74      4     compressed map size in bytes (m)
+    78      4*n   palette entries: map value, red, green, blue (one byte each)
+    ...     m     zlib-compressed tile grid, height * width bytes row by row (no border)
+    ...     ...   one byte per frame: the bits of main.Controls
+
+There is no frame count: frames are appended while the game runs, and a recording that was cut
+off (e.g. by a crash) is still valid up to its last frame. All numbers are little-endian.
+
+Usage:
+    python inputlog.py info session.rcinput
+"""
+from dataclasses import dataclass, field
+import argparse
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+MAGIC = b"RCIN"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIHHI6dHI") # Fixed part of the header, followed by the palette and the map
+PALETTE_ENTRY = struct.Struct("<BBBB")
+
+
+@dataclass
+class Recording:
+    """A recorded session: everything needed to play it back frame by frame."""
+    tiles: np.ndarray    # (height, width) uint8 tile grid as it was when the recording started
+    tile_size: int
+    start: tuple[float, float, float] # Player x, y (world pixels) and angle (radians) before the first frame
+    move_speed: float
+    rot_speed: float
+    radius: float
+    screen: tuple[int, int] = (1920, 1080) # Screen size the session was played at
+    sprites: int = 0     # Number of scattered sprites (they block movement, so the replay needs the same ones)
+    palette: dict[int, tuple[int, int, int]] = field(default_factory=dict) # Minimap colors per map value
+    frames: bytearray = field(default_factory=bytearray) # One byte of control bits per frame
+
+    def header(self) -> bytes:
+        """Returns everything that precedes the frames in a recording file."""
+        height, width = self.tiles.shape
+        packed_map = zlib.compress(np.ascontiguousarray(self.tiles, dtype=np.uint8).tobytes())
+        header = HEADER.pack(MAGIC, VERSION, self.tile_size, width, height, *self.screen, self.sprites,
+                             *self.start, self.move_speed, self.rot_speed, self.radius, len(self.palette), len(packed_map))
+        header += b"".join(PALETTE_ENTRY.pack(value, *color) for value, color in sorted(self.palette.items()))
+        return header + packed_map
+
+
+def save_recording(path: str, recording: Recording):
+    """Writes a complete recording to a file."""
+    with open(path, "wb") as file:
+        file.write(recording.header())
+        file.write(recording.frames)
+
+
+def load_recording(path: str) -> Recording:
+    """Reads a recording file."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"'{path}' is too short to be an input recording.")
+    (magic, version, tile_size, width, height, screen_width, screen_height, sprites,
+     x, y, angle, move_speed, rot_speed, radius, palette_count, map_size) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"'{path}' is not an input recording (bad magic {magic!r}).")
+    if version != VERSION:
+        raise ValueError(f"'{path}' has unsupported input recording version {version}.")
+
+    if len(data) < HEADER.size + palette_count * PALETTE_ENTRY.size + map_size:
+        raise ValueError(f"'{path}' is truncated before the end of its map.")
+
+    palette = {}
+    offset = HEADER.size
+    for _ in range(palette_count):
+        value, r, g, b = PALETTE_ENTRY.unpack_from(data, offset)
+        palette[value] = (r, g, b)
+        offset += PALETTE_ENTRY.size
+    try:
+        tiles = np.frombuffer(zlib.decompress(data[offset:offset + map_size]), dtype=np.uint8)
+    except zlib.error as error:
+        raise ValueError(f"'{path}' has a damaged map: {error}") from None
+    if tiles.size != width * height:
+        raise ValueError(f"'{path}' has {tiles.size} map tiles, expected {width * height}.")
+    return Recording(tiles.reshape(height, width).copy(), tile_size, (x, y, angle), move_speed, rot_speed, radius,
+                     (screen_width, screen_height), sprites, palette, bytearray(data[offset + map_size:]))
+
+
+class InputRecorder:
+    """
+    Writes a recording while the game runs: the header when it is created, then one byte per frame.
+    Frames are buffered and written in blocks, and the rest is written by close().
+    """
+    def __init__(self, path: str, recording: Recording, flush_frames: int = 600):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(recording.header())
+        self.pending = bytearray()
+        self.flush_frames = flush_frames # Frames kept before writing them out (10 seconds at 60 FPS)
+        self.frames = 0
+
+    def append(self, bits: int):
+        """Records the control bits of one frame."""
+        self.pending.append(bits)
+        self.frames += 1
+        if len(self.pending) >= self.flush_frames:
+            self.file.write(self.pending)
+            self.pending.clear()
+
+    def close(self):
+        """Writes the remaining frames and closes the file."""
+        if self.file.closed:
+            return
+        self.file.write(self.pending)
+        self.pending.clear()
+        self.file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect input recordings")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info_parser = commands.add_parser("info", help="Print the header of a recording")
+    info_parser.add_argument("path")
+    args = parser.parse_args()
+
+    try:
+        recording = load_recording(args.path)
+    except (OSError, ValueError) as error:
+        sys.exit(f"Error: {error}")
+    height, width = recording.tiles.shape
+    print(f"{args.path}: {len(recording.frames)} frames, {width}x{height} map (tile size {recording.tile_size}), "
+          f"screen {recording.screen[0]}x{recording.screen[1]}, {recording.sprites} sprites, "
+          f"start ({recording.start[0]:.1f}, {recording.start[1]:.1f}, {recording.start[2]:.3f})")
@@ -1,7 +1,15 @@
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 import pygame
+import numpy as np
+import argparse
+import csv
+import json
 import math
 import sys
+import os
+import threading
+import time
 
 # Initial default game map
 # This will be replaced if the user chooses a generated or custom map
@@ -39,19 +47,457 @@ class Size:
         self.height = height
         self.min = min(width, height)
         
+class SpatialHash:
+    """
+    Uniform grid over world pixel coordinates that buckets objects (anything with x and y attributes)
+    by cell, so area queries only look at the objects in the cells they overlap.
+    Insert, move and remove are O(1) dict operations; with a cell size that is a multiple of the
+    tile size, cell borders fall on tile borders.
+    Objects may have a `radius` attribute (0 if missing): ray queries and entity collision treat them
+    as circles of that size. Objects are kept in insertion order within a cell, so query results are deterministic.
+    """
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size # Cell side length in world pixels
+        self.cells: dict[tuple[int, int], dict[int, object]] = {} # Cell -> {id(object): object}
+        self.cell_of: dict[int, tuple[int, int]] = {} # id(object) -> the cell it is stored in
+        self.version = 0 # Incremented on every insert, move and removal, so caches can tell when something moved
+        self.reach = 0.0 # Largest object radius inserted so far: how far an object can reach out of its cell
+
+    def cell(self, x: float, y: float) -> tuple[int, int]:
+        """Returns the cell that contains the world position (x, y)."""
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, item):
+        """Adds an object at its current position."""
+        key = self.cell(item.x, item.y)
+        self.cells.setdefault(key, {})[id(item)] = item
+        self.cell_of[id(item)] = key
+        self.reach = max(self.reach, getattr(item, "radius", 0.0))
+        self.version += 1
+
+    def remove(self, item):
+        """Removes an object."""
+        key = self.cell_of.pop(id(item))
+        bucket = self.cells[key]
+        del bucket[id(item)]
+        if not bucket:
+            del self.cells[key]
+        self.version += 1
+
+    def move(self, item, x: float, y: float):
+        """Moves an object to (x, y); it changes buckets only when it crosses into another cell."""
+        item.x, item.y = x, y
+        key = self.cell(x, y)
+        old = self.cell_of[id(item)]
+        if key != old:
+            bucket = self.cells[old]
+            del bucket[id(item)]
+            if not bucket:
+                del self.cells[old]
+            self.cells.setdefault(key, {})[id(item)] = item
+            self.cell_of[id(item)] = key
+        self.version += 1
+
+    def query_rect(self, left: float, top: float, right: float, bottom: float) -> list:
+        """Returns the objects in the cells that overlap the rectangle (they may lie slightly outside it)."""
+        (x0, y0), (x1, y1) = self.cell(left, top), self.cell(right, bottom)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+            # Fewer occupied cells than cells in the rectangle: walk the occupied ones instead
+            return [item for (cx, cy), bucket in self.cells.items() if x0 <= cx <= x1 and y0 <= cy <= y1
+                    for item in bucket.values()]
+        found = []
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket.values())
+        return found
+
+    def query_radius(self, x: float, y: float, radius: float) -> list:
+        """Returns the objects whose position lies within `radius` of (x, y)."""
+        limit = radius * radius
+        return [item for item in self.query_rect(x - radius, y - radius, x + radius, y + radius)
+                if (item.x - x) * (item.x - x) + (item.y - y) * (item.y - y) <= limit]
+
+    def nearest(self, x: float, y: float, max_distance: float = math.inf, exclude=None):
+        """
+        Returns the object nearest to (x, y) within max_distance (None if there is none), skipping `exclude`.
+        Searches rings of cells outward from the cell of (x, y) and stops at the first ring that
+        cannot hold anything nearer; once a ring has more cells than are occupied, the remaining
+        occupied cells are scanned instead.
+        """
+        center_x, center_y = self.cell(x, y)
+        best, best_squared = None, max_distance * max_distance
+        ring = 0
+        while self.cells:
+            gap = (ring - 1) * self.cell_size # Every cell of this ring is at least this far from (x, y)
+            if gap > 0 and gap * gap > best_squared:
+                break
+            if 8 * ring > len(self.cells):
+                buckets = [bucket for (cx, cy), bucket in self.cells.items()
+                           if max(abs(cx - center_x), abs(cy - center_y)) >= ring]
+            elif ring == 0:
+                buckets = [self.cells.get((center_x, center_y))]
+            else:
+                top, bottom = center_y - ring, center_y + ring
+                keys = [(cx, cy) for cx in range(center_x - ring, center_x + ring + 1) for cy in (top, bottom)]
+                keys += [(cx, cy) for cy in range(top + 1, bottom) for cx in (center_x - ring, center_x + ring)]
+                buckets = [self.cells.get(key) for key in keys]
+            for bucket in buckets:
+                if not bucket:
+                    continue
+                for item in bucket.values():
+                    squared = (item.x - x) * (item.x - x) + (item.y - y) * (item.y - y)
+                    if squared < best_squared and item is not exclude:
+                        best, best_squared = item, squared
+            if 8 * ring > len(self.cells):
+                break # All remaining cells were scanned
+            ring += 1
+        return best
+
+    def cells_along_ray(self, x: float, y: float, dir_x: float, dir_y: float, max_distance: float):
+        """
+        Yields (cell, distance at which the ray enters it) for every cell that the ray from (x, y) crosses
+        within max_distance, in order. Steps from one cell border to the next like cast_rays_dda does
+        with tiles. (dir_x, dir_y) must have length 1.
+        """
+        size = self.cell_size
+        pos_x, pos_y = x / size, y / size
+        cell_x, cell_y = self.cell(x, y)
+        # Ray length (in cells) needed to cross one full cell in x / y, and to the first x / y cell border
+        delta_x = abs(1 / dir_x) if dir_x != 0 else math.inf
+        delta_y = abs(1 / dir_y) if dir_y != 0 else math.inf
+        if dir_x < 0:
+            step_x, side_x = -1, (pos_x - cell_x) * delta_x
+        else:
+            step_x, side_x = 1, (cell_x + 1 - pos_x) * delta_x if dir_x != 0 else math.inf
+        if dir_y < 0:
+            step_y, side_y = -1, (pos_y - cell_y) * delta_y
+        else:
+            step_y, side_y = 1, (cell_y + 1 - pos_y) * delta_y if dir_y != 0 else math.inf
+
+        dist, limit = 0.0, max_distance / size
+        while dist <= limit:
+            yield (cell_x, cell_y), dist * size
+            if side_x < side_y:
+                dist = side_x
+                side_x += delta_x
+                cell_x += step_x
+            else:
+                dist = side_y
+                side_y += delta_y
+                cell_y += step_y
+
+    def query_ray(self, x: float, y: float, dir_x: float, dir_y: float, max_distance: float,
+                  radius: float = 0.0, first: bool = False, exclude=None) -> list[tuple[float, object]]:
+        """
+        Returns (distance, object) for the objects hit by a ray (or, with radius > 0, a moving circle)
+        from (x, y) in direction (dir_x, dir_y) within max_distance, nearest first. An object is hit
+        where the ray comes within its radius plus `radius` of its position. With first=True only the
+        nearest hit is returned, and the walk along the ray stops as soon as nothing nearer can follow.
+        Only the cells along the ray (and their neighbors within the largest object reach) are looked at.
+        """
+        length = math.hypot(dir_x, dir_y)
+        dir_x, dir_y = dir_x / length, dir_y / length
+        reach = self.reach + radius
+        around = math.ceil(reach / self.cell_size) # Neighbor cells whose objects can reach the ray
+        hits, visited = [], set()
+        best = math.inf
+        for (cell_x, cell_y), entry in self.cells_along_ray(x, y, dir_x, dir_y, max_distance + reach):
+            if entry > best + reach:
+                break # A hit at the distance of `best` or nearer has its object in a cell visited already
+            for cy in range(cell_y - around, cell_y + around + 1):
+                for cx in range(cell_x - around, cell_x + around + 1):
+                    if (cx, cy) in visited:
+                        continue
+                    visited.add((cx, cy))
+                    bucket = self.cells.get((cx, cy))
+                    if not bucket:
+                        continue
+                    for item in bucket.values():
+                        size = getattr(item, "radius", 0.0) + radius
+                        ox, oy = item.x - x, item.y - y
+                        along = ox * dir_x + oy * dir_y # Ray distance of the point closest to the object
+                        squared = size * size - (ox * ox + oy * oy - along * along)
+                        if squared < 0 or item is exclude:
+                            continue
+                        distance = along - math.sqrt(squared)
+                        if distance < 0:
+                            if along + math.sqrt(squared) < 0:
+                                continue # Behind the ray
+                            distance = 0.0 # The ray starts inside the object
+                        if distance <= max_distance:
+                            hits.append((distance, item))
+                            if first:
+                                best = min(best, distance)
+        hits.sort(key=lambda hit: hit[0])
+        return hits[:1] if first else hits
+
+    def rebuild(self):
+        """Re-buckets every object after their positions were changed directly (e.g. all shifted at once)."""
+        items = list(self)
+        self.cells.clear()
+        self.cell_of.clear()
+        for item in items:
+            self.insert(item)
+
+    def __len__(self) -> int:
+        return len(self.cell_of)
+
+    def __iter__(self):
+        for bucket in list(self.cells.values()):
+            yield from bucket.values()
+
+@dataclass(eq=False) # Compared and hashed by identity
+class Sprite:
+    """An entity drawn as a billboard: a flat image that always faces the camera (see DrawConfig.draw_sprites)."""
+    x: float         # Position in world pixels (the sprite stands on the floor here)
+    y: float
+    texture: int = 1 # Key of the image in the sprite cache, see make_sprites
+    scale: float = 0.5 # Height on screen relative to a wall at the same distance
+    radius: float = 0.0 # Collision radius in world pixels; 0 for things that can be walked through
+
+# Side length in tiles of the spatial hash cells that World.sprites is bucketed in
+SPRITE_CELL_TILES = 4
+
 class World:
-    """Manages the game map and provides map-related utilities."""
+    """
+    Manages the game map and provides map-related utilities.
+    The tiles are stored as one byte each in a flat bytearray that is padded with a solid
+    one-tile border, so code that looks at a tile next to the map edge needs no bounds check.
+    """
     def __init__(self, game_map: list[list[int]], tile_size: int):
-        self.game_map = game_map
-        self.size = Size(len(game_map[0]), len(game_map)) # Dimensions of the map in tiles
+        height, width = len(game_map), len(game_map[0])
+        self.attach_cells(bytearray(b"\x01") * ((width + 2) * (height + 2)), width, height, tile_size) # Border = 1
+        self.padded[1:-1, 1:-1] = np.asarray(game_map, dtype=np.uint8)
+
+    @classmethod
+    def from_map_file(cls, map_file) -> "World":
+        """
+        Creates a World that uses the tile bytes of a loaded mapformat.MapFile directly as its storage,
+        so a memory-mapped map is not copied.
+        """
+        world = cls.__new__(cls)
+        world.attach_cells(map_file.cells, map_file.width, map_file.height, map_file.tile_size)
+        world.spawn = map_file.spawn
+        world.palette = dict(map_file.palette)
+        return world
+
+    def attach_cells(self, cells: bytearray | memoryview, width: int, height: int, tile_size: int):
+        """Uses `cells` ((height + 2) * (width + 2) bytes, border included) as the tile storage."""
+        self.size = Size(width, height) # Dimensions of the map in tiles
         self.tile_size = tile_size # Size of a single tile in pixels
+        self.stride = width + 2    # Length of one padded row in `cells`
+        self.cells = cells         # Flat padded tile storage
+        # (height + 2, width + 2) NumPy view sharing memory with `cells`, for vectorized code
+        self.padded = np.frombuffer(cells, dtype=np.uint8).reshape(height + 2, self.stride)
+        self.version = 0 # Incremented on every tile change, so caches can tell when the map changed
+        self.spawn: tuple[int, int] | None = None # Spawn tile set by a map file (None = find one)
+        self.palette: dict[int, tuple[int, int, int]] = {} # Minimap colors per map value set by a map file
+        self.sprites = SpatialHash(tile_size * SPRITE_CELL_TILES) # Billboard entities in the world
+        self.pvs = None # Potentially visible sets of the tiles (see pvs.py), used while pvs.version == version
+
+    @property
+    def grid(self) -> np.ndarray:
+        """The map without its border as a (height, width) NumPy view."""
+        return self.padded[1:-1, 1:-1]
+
+    @property
+    def game_map(self) -> np.ndarray:
+        """Compatibility view of the map: supports game_map[y][x] and len() like the old list of lists."""
+        return self.grid
+
+    def index(self, x: int, y: int) -> int:
+        """Returns the position of tile (x, y) in `cells`. Valid for -1 <= x <= width and -1 <= y <= height."""
+        return (y + 1) * self.stride + x + 1
+
+    def tile(self, x: int, y: int) -> int:
+        """Returns the map value of tile (x, y); the border around the map reads as a wall."""
+        return self.cells[(y + 1) * self.stride + x + 1]
+
+    def set_tile(self, x: int, y: int, value: int):
+        """Changes the map value of tile (x, y) and bumps the map version."""
+        self.cells[(y + 1) * self.stride + x + 1] = value
+        self.version += 1
     
     def is_walkable(self, x: int, y: int) -> bool:
         """Checks if a given tile coordinate (x, y) is within bounds and is a walkable (non-wall) tile."""
         if 0 <= y < self.size.height and 0 <= x < self.size.width:
-            return self.game_map[y][x] == 0
+            return self.cells[(y + 1) * self.stride + x + 1] == 0
+        return False
+
+    def update(self, player: "Player") -> bool:
+        """
+        Called once per frame before casting. Worlds that stream their tiles (see ChunkedWorld) may
+        move their tiles and the player here and return True; a plain World never changes.
+        """
         return False
 
+    def close(self):
+        """Releases background resources. A plain World has none."""
+
+class ChunkedWorld(World):
+    """
+    Endless world made of square maze chunks (see mazegenerator.generateChunk) that are generated on demand.
+    Only a window of (2 * radius + 1)^2 chunks around the player is laid out in the padded tile storage,
+    so the cast engines, collision and the minimap work on it exactly like on a plain World.
+    When the player moves far enough out of the center chunk, the window is re-centered on the player's
+    chunk and the player is shifted by the same amount (floating origin), so positions stay small.
+    Generated chunks live in a bounded LRU cache; chunks far from the player are evicted and
+    the chunks the player is heading into are generated ahead of time on a background thread.
+    The radius must keep the window edge beyond max_depth: with 16-cell chunks and radius 1,
+    rays always have at least 16 tiles of real map in front of them.
+    """
+    def __init__(self, tile_size: int, seed: int | None = None, chunk_cells: int = 16, radius: int = 1,
+                 max_chunks: int = 64, algorithm: str = "backtracker", prefetch: bool = True):
+        from concurrent.futures import ThreadPoolExecutor # Only needed for endless worlds, so imported here
+        import mazegenerator
+        self.generate_chunk = mazegenerator.generateChunk
+        self.seed = seed
+        self.algorithm = algorithm
+        self.chunk_tiles = chunk_cells * 2 # Chunk side length in tiles
+        self.radius = radius               # Chunks on each side of the center chunk in the window
+        self.keep_radius = radius + 2      # Chunks further away than this are evicted
+        self.max_chunks = max(max_chunks, (2 * self.keep_radius + 1) ** 2) # LRU cap, never below the kept area
+        self.center = (0, 0)               # Chunk coordinates of the window's center chunk
+
+        self.chunks: OrderedDict[tuple[int, int], bytes] = OrderedDict() # Generated chunks, least recently used first
+        self.edited: dict[tuple[int, int], bytearray] = {} # Chunks changed by set_tile: never evicted or regenerated
+        self.pending = {} # Chunk coordinates -> Future of a running prefetch
+        self.lock = threading.Lock() # Guards chunks and pending against the prefetch thread
+        self.prefetcher = ThreadPoolExecutor(1, thread_name_prefix="chunk-prefetch") if prefetch else None
+        self.counters = {"hits": 0, "generated": 0, "prefetched": 0, "waited": 0, "evicted": 0, "recentered": 0}
+
+        side = (2 * radius + 1) * self.chunk_tiles
+        self.attach_cells(bytearray(b"\x01") * ((side + 2) * (side + 2)), side, side, tile_size)
+        self.fill_window()
+        self.spawn = (radius * self.chunk_tiles + 1, radius * self.chunk_tiles + 1) # First cell of the center chunk is always open
+
+    def chunk(self, chunk_x: int, chunk_y: int) -> bytes:
+        """Returns the tiles of a chunk: edited, cached, from a running prefetch or generated right now."""
+        key = (chunk_x, chunk_y)
+        if key in self.edited:
+            return self.edited[key]
+        with self.lock:
+            if key in self.chunks:
+                self.chunks.move_to_end(key)
+                self.counters["hits"] += 1
+                return self.chunks[key]
+            future = self.pending.get(key)
+        if future is not None and not future.cancelled(): # Cancelled by close() before it ran: generate it here
+            self.counters["waited"] += 1
+            return future.result() # Already being generated: wait for it instead of doing the work twice
+        chunk = bytes(self.generate_chunk(chunk_x, chunk_y, self.chunk_tiles // 2, self.seed, self.algorithm))
+        self.counters["generated"] += 1
+        self.store(key, chunk)
+        return chunk
+
+    def store(self, key: tuple[int, int], chunk: bytes):
+        """Adds a chunk to the LRU cache and drops the least recently used ones beyond max_chunks."""
+        with self.lock:
+            self.chunks[key] = chunk
+            self.chunks.move_to_end(key)
+            while len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+                self.counters["evicted"] += 1
+
+    def prefetch_chunk(self, key: tuple[int, int]) -> bytes:
+        """Runs on the prefetch thread: generates one chunk and caches it."""
+        chunk = bytes(self.generate_chunk(key[0], key[1], self.chunk_tiles // 2, self.seed, self.algorithm))
+        self.store(key, chunk)
+        with self.lock:
+            self.pending.pop(key, None)
+            self.counters["prefetched"] += 1
+        return chunk
+
+    def prefetch_ahead(self, player: "Player"):
+        """Queues generation of the chunks just outside the window on the side the player is facing."""
+        step_x = (math.cos(player.angle) > 0.38) - (math.cos(player.angle) < -0.38) # -1, 0 or 1 (within ~22 degrees of an axis)
+        step_y = (math.sin(player.angle) > 0.38) - (math.sin(player.angle) < -0.38)
+        reach = self.radius + 1
+        center_x, center_y = self.center
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                if dx * step_x < reach and dy * step_y < reach:
+                    continue # Inside the window or not on the side the player is heading to
+                key = (center_x + dx, center_y + dy)
+                with self.lock:
+                    if key in self.chunks or key in self.pending or key in self.edited:
+                        continue
+                    self.pending[key] = self.prefetcher.submit(self.prefetch_chunk, key)
+
+    def fill_window(self):
+        """Copies the chunks around the center chunk into the padded tile storage."""
+        tiles = self.chunk_tiles
+        center_x, center_y = self.center
+        for row in range(2 * self.radius + 1):
+            for column in range(2 * self.radius + 1):
+                chunk = self.chunk(center_x - self.radius + column, center_y - self.radius + row)
+                self.padded[1 + row * tiles:1 + (row + 1) * tiles, 1 + column * tiles:1 + (column + 1) * tiles] = \
+                    np.frombuffer(chunk, dtype=np.uint8).reshape(tiles, tiles)
+        self.version += 1
+
+    def evict_far(self):
+        """Drops cached chunks that are more than keep_radius chunks away from the center chunk."""
+        center_x, center_y = self.center
+        with self.lock:
+            far = [key for key in self.chunks
+                   if max(abs(key[0] - center_x), abs(key[1] - center_y)) > self.keep_radius]
+            for key in far:
+                del self.chunks[key]
+            self.counters["evicted"] += len(far)
+
+    def update(self, player: "Player") -> bool:
+        """
+        Re-centers the window once the player is more than half a chunk outside the center chunk
+        (the slack avoids re-centering back and forth on a chunk border) and starts prefetching.
+        Returns True if the tiles moved, so callers can refresh anything derived from them.
+        """
+        if self.prefetcher is not None:
+            self.prefetch_ahead(player)
+        chunk_pixels = self.chunk_tiles * self.tile_size
+        local_x = player.x / chunk_pixels - self.radius # Position in chunks relative to the center chunk
+        local_y = player.y / chunk_pixels - self.radius
+        if -0.5 <= local_x < 1.5 and -0.5 <= local_y < 1.5:
+            return False
+
+        shift_x, shift_y = math.floor(local_x), math.floor(local_y)
+        self.center = (self.center[0] + shift_x, self.center[1] + shift_y)
+        player.x -= shift_x * chunk_pixels
+        player.y -= shift_y * chunk_pixels
+        for sprite in self.sprites: # Sprites keep their place in the world, so they move with the origin
+            sprite.x -= shift_x * chunk_pixels
+            sprite.y -= shift_y * chunk_pixels
+        self.sprites.rebuild()
+        self.fill_window()
+        self.evict_far()
+        self.counters["recentered"] += 1
+        return True
+
+    def set_tile(self, x: int, y: int, value: int):
+        """Changes a tile in the window and in its chunk, which is then kept for good."""
+        super().set_tile(x, y, value)
+        tiles = self.chunk_tiles
+        key = (self.center[0] - self.radius + x // tiles, self.center[1] - self.radius + y // tiles)
+        if key not in self.edited:
+            self.edited[key] = bytearray(self.chunk(*key))
+        self.edited[key][(y % tiles) * tiles + x % tiles] = value
+
+    def stats(self) -> dict[str, int]:
+        """Returns the chunk counters plus the number of cached chunks."""
+        return {**self.counters, "cached": len(self.chunks), "edited": len(self.edited)}
+
+    def close(self):
+        """
+        Stops the prefetch thread. Queued prefetches are dropped; the world stays usable and
+        generates the chunks it needs from then on itself.
+        """
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown(cancel_futures=True)
+            self.prefetcher = None
+        with self.lock:
+            self.pending.clear() # Cancelled futures never finish, so chunk() must not wait for them
+
 @dataclass
 class Information:
     """Holds general Pygame display and time information."""
@@ -61,6 +507,208 @@ class Information:
     size: Size                # Current screen width and height
     fps: int = 60             # Frames per second target
     
+# === COLLISION ===
+
+COLLISION_SKIN = 1e-3 # Gap in pixels kept between a resolved circle and the wall it touches
+
+def _tile_is_solid(world: World, gx: int, gy: int) -> bool:
+    """Tile test for collision: walls, the border and anything outside the map are solid."""
+    if -1 <= gx <= world.size.width and -1 <= gy <= world.size.height:
+        return world.cells[(gy + 1) * world.stride + gx + 1] != 0
+    return True
+
+def _tile_entry(x: float, y: float, dx: float, dy: float, left: float, top: float, size: float,
+                radius: float) -> tuple[float, float, float] | None:
+    """
+    Returns when a circle moving from (x, y) by (dx, dy) first touches the square tile at (left, top):
+    (t in [0, 1], normal x, normal y), or None if it does not within this move or already overlaps it.
+    The circle center is swept against the tile grown by the radius, a rounded square made of two
+    crossed rectangles and four corner circles.
+    """
+    best = None
+    right, bottom = left + size, top + size
+    for x0, x1, y0, y1 in ((left - radius, right + radius, top, bottom), (left, right, top - radius, bottom + radius)):
+        enter, leave, normal = -math.inf, math.inf, None
+        for p, d, low, high, axis in ((x, dx, x0, x1, 0), (y, dy, y0, y1, 1)):
+            if d == 0:
+                if not low < p < high:
+                    break # Moving parallel to this slab and outside of it
+                continue
+            t0, t1 = (low - p) / d, (high - p) / d
+            if t0 > t1:
+                t0, t1 = t1, t0
+            if t0 > enter:
+                enter, normal = t0, axis
+            leave = min(leave, t1)
+        else:
+            if normal is not None and 0 <= enter <= leave and enter <= 1 and (best is None or enter < best[0]):
+                sign = -1.0 if (dx if normal == 0 else dy) > 0 else 1.0
+                best = (enter, sign, 0.0) if normal == 0 else (enter, 0.0, sign)
+
+    for cx, cy in ((left, top), (right, top), (left, bottom), (right, bottom)):
+        entry = _circle_entry(x, y, dx, dy, cx, cy, radius)
+        if entry is not None and (best is None or entry[0] < best[0]):
+            best = entry
+    return best
+
+def _circle_entry(x: float, y: float, dx: float, dy: float, cx: float, cy: float,
+                  radius: float) -> tuple[float, float, float] | None:
+    """
+    Returns when a point moving from (x, y) by (dx, dy) first comes within `radius` of (cx, cy):
+    (t in [0, 1], normal x, normal y), or None if it does not within this move.
+    A point that starts closer and moves further in is stopped right away (t = 0).
+    """
+    ox, oy = x - cx, y - cy
+    c = ox * ox + oy * oy - radius * radius
+    b = ox * dx + oy * dy
+    if b >= 0:
+        return None # Moving away from the center (or not at all)
+    if c < 0:
+        distance = math.hypot(ox, oy)
+        return (0.0, ox / distance, oy / distance) if distance > 0 else None
+    a = dx * dx + dy * dy
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    if t > 1:
+        return None
+    return t, (ox + t * dx) / radius, (oy + t * dy) / radius
+
+def _entity_entry(entities: SpatialHash, x: float, y: float, dx: float, dy: float, radius: float,
+                  exclude=None) -> tuple[float, float, float] | None:
+    """Like _tile_entry, for the solid entities (radius > 0) that a moving circle can run into."""
+    best = None
+    reach = radius + entities.reach
+    for item in entities.query_rect(min(x, x + dx) - reach, min(y, y + dy) - reach,
+                                    max(x, x + dx) + reach, max(y, y + dy) + reach):
+        size = getattr(item, "radius", 0.0)
+        if size <= 0 or item is exclude:
+            continue
+        entry = _circle_entry(x, y, dx, dy, item.x, item.y, radius + size)
+        if entry is not None and (best is None or entry[0] < best[0]):
+            best = entry
+    return best
+
+def overlapping_entities(entities: SpatialHash, x: float, y: float, radius: float, exclude=None) -> list:
+    """Returns the solid entities (radius > 0) that overlap the circle of the given radius at (x, y)."""
+    found = []
+    for item in entities.query_radius(x, y, radius + entities.reach):
+        size = getattr(item, "radius", 0.0) + radius
+        if size > radius and item is not exclude and (item.x - x) ** 2 + (item.y - y) ** 2 < size * size:
+            found.append(item)
+    return found
+
+def push_out_circle(world: World, x: float, y: float, radius: float) -> tuple[float, float]:
+    """
+    Moves a circle that overlaps walls (after spawning, a tile change or a floating-origin shift)
+    out along the shortest way. Returns the new center.
+    """
+    tile_size = world.tile_size
+    for _ in range(4): # Pushing out of one tile can push into a neighbor
+        moved = False
+        for gy in range(int((y - radius) // tile_size), int((y + radius) // tile_size) + 1):
+            for gx in range(int((x - radius) // tile_size), int((x + radius) // tile_size) + 1):
+                if not _tile_is_solid(world, gx, gy):
+                    continue
+                left, top = gx * tile_size, gy * tile_size
+                near_x = min(max(x, left), left + tile_size) # Closest point of the tile
+                near_y = min(max(y, top), top + tile_size)
+                ox, oy = x - near_x, y - near_y
+                distance = math.hypot(ox, oy)
+                if distance >= radius:
+                    continue
+                if distance > 0:
+                    push = radius - distance + COLLISION_SKIN
+                    x, y = x + ox / distance * push, y + oy / distance * push
+                else:
+                    # Center inside the tile: leave through the nearest face
+                    exits = ((x - left + radius, -1, 0), (left + tile_size - x + radius, 1, 0),
+                             (y - top + radius, 0, -1), (top + tile_size - y + radius, 0, 1))
+                    push, sx, sy = min(exits)
+                    x, y = x + sx * (push + COLLISION_SKIN), y + sy * (push + COLLISION_SKIN)
+                moved = True
+        if not moved:
+            break
+    return x, y
+
+def sweep_circle(world: World, x: float, y: float, dx: float, dy: float, radius: float,
+                 slide: bool = True, entities: SpatialHash | None = None,
+                 exclude=None) -> tuple[float, float, bool]:
+    """
+    Moves a circle of the given radius from (x, y) by (dx, dy) through the tile grid without
+    passing through walls, however long the move is. On contact the rest of the move slides along
+    the wall (slide=True, for walking) or is dropped (slide=False, e.g. for projectiles).
+    Only the tiles around each step of at most one tile length are tested.
+    With `entities`, the solid entities in it (except `exclude`, e.g. the mover itself) block like walls.
+    Returns the new center and whether a wall or entity was touched.
+    """
+    x, y = push_out_circle(world, x, y, radius)
+    tile_size = world.tile_size
+    touched = False
+    for _ in range(4): # One pass per wall slid along; corners need two
+        length = math.hypot(dx, dy)
+        if length < 1e-9:
+            break
+        steps = math.ceil(length / tile_size)
+        hit = None
+        for step in range(steps):
+            # Tiles that the circle can touch during this step of the move
+            t_end = (step + 1) / steps
+            x0, x1 = sorted((x + dx * step / steps, x + dx * t_end))
+            y0, y1 = sorted((y + dy * step / steps, y + dy * t_end))
+            for gy in range(int((y0 - radius) // tile_size), int((y1 + radius) // tile_size) + 1):
+                for gx in range(int((x0 - radius) // tile_size), int((x1 + radius) // tile_size) + 1):
+                    if _tile_is_solid(world, gx, gy):
+                        entry = _tile_entry(x, y, dx, dy, gx * tile_size, gy * tile_size, tile_size, radius)
+                        if entry is not None and (hit is None or entry[0] < hit[0]):
+                            hit = entry
+            if hit is not None and hit[0] <= t_end:
+                break # Later steps cannot be hit earlier
+        if entities is not None:
+            entity_hit = _entity_entry(entities, x, y, dx, dy, radius, exclude)
+            if entity_hit is not None and (hit is None or entity_hit[0] < hit[0]):
+                hit = entity_hit
+
+        if hit is None:
+            return x + dx, y + dy, touched
+        t, normal_x, normal_y = hit
+        touched = True
+        x += dx * t + normal_x * COLLISION_SKIN
+        y += dy * t + normal_y * COLLISION_SKIN
+        if not slide:
+            break
+        # Keep only the part of the remaining move along the wall
+        dx, dy = dx * (1 - t), dy * (1 - t)
+        into = dx * normal_x + dy * normal_y
+        dx, dy = dx - into * normal_x, dy - into * normal_y
+    return x, y, touched
+
+@dataclass(frozen=True)
+class Controls:
+    """
+    The player's input for one frame, wherever it comes from: the keyboard, an input recording
+    (see inputlog.py) or a script. Packs into one byte for recordings.
+    """
+    forward: bool = False
+    backward: bool = False
+    turn_left: bool = False
+    turn_right: bool = False
+
+    @classmethod
+    def from_keys(cls, keys) -> "Controls":
+        """Reads the controls from pygame.key.get_pressed(): W / S to walk, A / D to turn."""
+        return cls(bool(keys[pygame.K_w]), bool(keys[pygame.K_s]), bool(keys[pygame.K_a]), bool(keys[pygame.K_d]))
+
+    @classmethod
+    def from_bits(cls, bits: int) -> "Controls":
+        """Unpacks controls packed by to_bits."""
+        return cls(bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8))
+
+    def to_bits(self) -> int:
+        """Packs the controls into one byte: bit 0 forward, 1 backward, 2 turn left, 3 turn right."""
+        return self.forward | self.backward << 1 | self.turn_left << 2 | self.turn_right << 3
+
 @dataclass
 class Player:
     """Represents the player's state and handles movement."""
@@ -74,15 +722,21 @@ class Player:
     def find_spawn_point(self, world: World):
         """
         Sets the player in the center of the first available free tile found.
-        Searches from the inside of the map to avoid edges.
+        Searches from the inside of the map to avoid edges. A spawn tile stored in the map file wins.
         """
-        for wy in range(1, world.size.height - 1):  # Avoid map edges (1 tile in from border)
-            for wx in range(1, world.size.width - 1):
-                if world.game_map[wy][wx] == 0:  # Found a free cell (value 0)
-                    # Correct calculation: (tile_index + 0.5) * tile_size to get center of tile
-                    self.x = (wx + 0.5) * world.tile_size
-                    self.y = (wy + 0.5) * world.tile_size
-                    return # Spawn point found and set
+        if world.spawn is not None and world.is_walkable(*world.spawn):
+            self.x = (world.spawn[0] + 0.5) * world.tile_size
+            self.y = (world.spawn[1] + 0.5) * world.tile_size
+            return
+        
+        # Free cells (value 0), avoiding map edges (1 tile in from border), in row-major order
+        free = np.flatnonzero(world.grid[1:-1, 1:-1] == 0)
+        if free.size:
+            wy, wx = divmod(int(free[0]), world.size.width - 2)
+            # Correct calculation: (tile_index + 0.5) * tile_size to get center of tile (+1 for the skipped edge)
+            self.x = (wx + 1.5) * world.tile_size
+            self.y = (wy + 1.5) * world.tile_size
+            return # Spawn point found and set
         
         # Fallback if no suitable free spawn point is found (should ideally not be reached with valid maps)
         self.x = (world.size.width // 2 + 0.5) * world.tile_size
@@ -92,31 +746,30 @@ class Player:
     def can_move(self, x: float, y: float, world: World) -> bool:
         """
         Checks if a proposed position (x, y) is valid for player movement.
-        Considers player's radius for collision detection with walls.
+        Considers player's radius for collision detection with walls and solid entities.
         """
         # Check all four corners of the player's bounding box (defined by radius)
         # to ensure no part of the player overlaps with a wall.
+        # Tiles outside the map count as walls, however far out the position is.
+        tile_size = world.tile_size
         for dx_offset in (-self.radius, self.radius):
+            gx = int((x + dx_offset) // tile_size)
             for dy_offset in (-self.radius, self.radius):
-                # Calculate the grid coordinates for the offset point
-                gx = int((x + dx_offset) // world.tile_size)
-                gy = int((y + dy_offset) // world.tile_size)
-                
-                # Check map bounds first: if any part of player is outside, movement is blocked
-                if not (0 <= gx < world.size.width and 0 <= gy < world.size.height):
-                    return False
+                gy = int((y + dy_offset) // tile_size)
                 
                 # Check if the tile at these grid coordinates is a wall
-                if world.game_map[gy][gx] != 0:
+                if _tile_is_solid(world, gx, gy):
                     return False # Movement blocked by a wall
-        return True # Movement is allowed
+        return not overlapping_entities(world.sprites, x, y, self.radius) # Movement is allowed unless an entity is in the way
 
-    def move(self, info: Information, world: World):
+    def move(self, info: Information, world: World, controls: Controls | None = None):
         """
-        Handles player movement based on keyboard input (W, S for forward/backward)
-        and rotation (A, D for left/right). Includes collision detection.
+        Handles player movement based on the controls of this frame (W, S for forward/backward)
+        and rotation (A, D for left/right). Includes collision detection (see sweep_circle).
+        Without controls the keyboard is read; recordings and scripts pass theirs in.
         """
-        keys = pygame.key.get_pressed() # Get current state of all keyboard keys
+        if controls is None:
+            controls = Controls.from_keys(pygame.key.get_pressed()) # Get current state of the keyboard
         
         # Calculate base movement vector based on player's angle
         dx = math.cos(self.angle) * self.move_speed
@@ -125,24 +778,31 @@ class Player:
         new_x, new_y = self.x, self.y # Tentative new position
         
         # Apply linear movement
-        if keys[pygame.K_w]: # Move forward
+        if controls.forward: # Move forward
             new_x += dx
             new_y += dy
-        if keys[pygame.K_s]: # Move backward
+        if controls.backward: # Move backward
             new_x -= dx
             new_y -= dy
         
-        # Check horizontal movement (X-axis) for collision independently
-        if self.can_move(new_x, self.y, world):
-            self.x = new_x # If no collision, update X position
-        
-        # Check vertical movement (Y-axis) for collision independently
-        if self.can_move(self.x, new_y, world):
-            self.y = new_y # If no collision, update Y position
+        # Sweep the player's circle to the new position, sliding along any wall or solid entity in the way
+        self.x, self.y, _ = sweep_circle(world, self.x, self.y, new_x - self.x, new_y - self.y, self.radius,
+                                         entities=world.sprites)
 
         # Apply rotation
-        if keys[pygame.K_a]: self.angle -= self.rot_speed # Rotate left
-        if keys[pygame.K_d]: self.angle += self.rot_speed # Rotate right
+        if controls.turn_left: self.angle -= self.rot_speed # Rotate left
+        if controls.turn_right: self.angle += self.rot_speed # Rotate right
+
+@dataclass
+class RayHits:
+    """
+    Holds the results of one cast: one entry per ray (screen column).
+    The scalar engines fill Python lists, the vectorized engine NumPy arrays.
+    """
+    distances: list[float] # Fish-eye corrected distance to the wall (max_depth if nothing was hit)
+    sides: list[int]       # Hit wall face: 0 = vertical (x-side), 1 = horizontal (y-side), -1 = nothing hit
+    offsets: list[float]   # Fractional hit position along the wall face in [0, 1), e.g. for texturing
+    tiles: list[int]       # Map value of the tile that was hit (0 if nothing was hit)
 
 @dataclass
 class RaycastingConfig:
@@ -150,110 +810,750 @@ class RaycastingConfig:
     fov: float          # Field of View in radians
     num_rays: int       # Number of rays to cast (determines horizontal resolution)
     max_depth: float    # Maximum distance a ray can travel before stopping
+    engine: str = "dda" # Name of the cast engine to use (a key of CAST_ENGINES)
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1) # Worker count for the "parallel" engine
+    parallel_mode: str = "process" # "process" or "thread" pool for the "parallel" engine
+    parallel_caster: "ParallelCaster | None" = field(default=None, repr=False, compare=False) # Persistent worker pool
+    frame_cache: "FrameCache | None" = field(default=None, repr=False, compare=False) # Reuse of earlier casts (see render_frame)
+    ray_table_cache: tuple | None = field(default=None, repr=False, compare=False) # ((fov, num_rays), camera_plane_tables(...))
     
+    def cast(self, info: Information, player: Player, world: World) -> RayHits:
+        """
+        Casts all rays with the selected engine and returns the full hit information
+        (distances, hit sides, hit offsets and hit tiles).
+        """
+        if self.engine not in CAST_ENGINES:
+            raise ValueError(f"Unknown cast engine '{self.engine}'. Available: {', '.join(CAST_ENGINES)}")
+        return CAST_ENGINES[self.engine](self, player, world)
+
     def cast_rays(self, info: Information, player: Player, world: World) -> list[float]:
         """
         Casts rays from the player's position into the world to determine
         the distance to the nearest wall for each ray.
         """
-        distances = []
-        # Calculate the starting angle for raycasting based on player's current angle and FOV
-        start_angle = player.angle - self.fov / 2
+        return self.cast(info, player, world).distances
+
+    def ray_tables(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns camera_plane_tables() for the current FOV and ray count; rebuilt only when one of them changes."""
+        key = (self.fov, self.num_rays)
+        if self.ray_table_cache is None or self.ray_table_cache[0] != key:
+            self.ray_table_cache = (key, camera_plane_tables(self.fov, self.num_rays))
+        return self.ray_table_cache[1]
+
+    def ray_directions(self, view_angle: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the world-space ray direction (x and y arrays) and fish-eye correction factor of every column."""
+        forward, sideways, _ = self.ray_tables()
+        dir_x, dir_y = rotate_ray_tables(forward, sideways, view_angle)
+        return dir_x, dir_y, forward # The forward component of a unit ray is cos(ray angle - view angle)
+
+    def ray_angles(self, view_angle: float) -> np.ndarray:
+        """Returns the absolute angle of every ray (screen column), left to right, for a view angle."""
+        return view_angle + self.ray_tables()[2]
+
+    def close(self):
+        """Shuts down the worker pool of the "parallel" engine, if one was started."""
+        if self.parallel_caster is not None:
+            self.parallel_caster.close()
+            self.parallel_caster = None
+
+def camera_plane_tables(fov: float, num_rays: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-column ray tables in view space for a flat camera plane.
+    Column centers are spread evenly over a plane of half-width tan(fov / 2) one unit in front of the
+    camera, so every column covers the same width on screen. (Spreading the ray angles evenly instead
+    squeezes the image towards the edges.)
+    Returns (forward, sideways, offsets): the unit ray direction of every column as a forward and a
+    sideways component, and its angle relative to the view direction. `forward` doubles as the
+    fish-eye correction factor, as it is the cosine of that angle.
+    """
+    plane = math.tan(fov / 2) * ((2 * np.arange(num_rays) + 1) / num_rays - 1) # Column centers on the plane, -t..t
+    norm = np.sqrt(1 + plane * plane)
+    return 1 / norm, plane / norm, np.arctan(plane)
+
+def rotate_ray_tables(forward: np.ndarray, sideways: np.ndarray, view_angle: float) -> tuple[np.ndarray, np.ndarray]:
+    """Turns view-space column directions into world-space ones with one 2x2 rotation by the view angle."""
+    cos_a, sin_a = math.cos(view_angle), math.sin(view_angle)
+    return forward * cos_a - sideways * sin_a, forward * sin_a + sideways * cos_a
+
+def cast_rays_march(config: RaycastingConfig, player: Player, world: World) -> RayHits:
+    """
+    Original cast engine: steps every ray forward 1 pixel at a time until it hits a wall.
+    Hit sides and offsets are derived from the tile the ray stepped in from, so they are approximate.
+    """
+    hits = RayHits([], [], [], [])
+    # Direction and fish-eye correction of every ray from the precomputed column tables
+    dir_x, dir_y, correction = (table.tolist() for table in config.ray_directions(player.angle))
 
-        for ray_idx in range(self.num_rays):
-            # Calculate the angle for the current ray
-            ray_angle = start_angle + ray_idx * (self.fov / self.num_rays)
+    for ray_idx in range(config.num_rays):
+        ray_dx, ray_dy = dir_x[ray_idx], dir_y[ray_idx]
+        prev_gx = int(player.x // world.tile_size)
+        
+        # Iterate through depth steps to find wall intersection
+        for depth_step in range(1, int(config.max_depth) + 1): # +1 to include max_depth in checks
+            # Calculate the world coordinates of the point along the ray
+            tx = player.x + ray_dx * depth_step
+            ty = player.y + ray_dy * depth_step
             
-            # Iterate through depth steps to find wall intersection
-            for depth_step in range(1, int(self.max_depth) + 1): # +1 to include max_depth in checks
-                # Calculate the world coordinates of the point along the ray
-                tx = player.x + math.cos(ray_angle) * depth_step
-                ty = player.y + math.sin(ray_angle) * depth_step
-                
-                # Convert world coordinates to grid (tile) coordinates
-                gx = int(tx // world.tile_size)
-                gy = int(ty // world.tile_size)
-                
-                # Check if the ray has gone outside the map boundaries
-                if not (0 <= gx < world.size.width and 0 <= gy < world.size.height):
-                    distances.append(self.max_depth) # Treat as hitting max depth
-                    break # Stop casting this ray
+            # Convert world coordinates to grid (tile) coordinates
+            gx = int(tx // world.tile_size)
+            gy = int(ty // world.tile_size)
+            
+            # Check if the ray has gone outside the map boundaries
+            if not (0 <= gx < world.size.width and 0 <= gy < world.size.height):
+                # Treat as hitting max depth and stop casting this ray
+                hits.distances.append(config.max_depth)
+                hits.sides.append(-1)
+                hits.offsets.append(0.0)
+                hits.tiles.append(0)
+                break
+            
+            # Check if the current grid cell is a wall (any non-zero value; 2 and up are textured walls)
+            tile = world.game_map[gy][gx]
+            if tile != 0:
+                # Calculate the true distance, correcting for fish-eye effect
+                # This projects the distance onto the player's view plane,
+                # preventing distortion at the edges of the FOV.
+                hits.distances.append(depth_step * correction[ray_idx])
+                # If the column changed on the last step the ray came through a vertical (x-side) face
+                side = 0 if gx != prev_gx else 1
+                hits.sides.append(side)
+                hits.offsets.append(((ty if side == 0 else tx) / world.tile_size) % 1.0)
+                hits.tiles.append(tile)
                 
-                # Check if the current grid cell is a wall (value 1)
-                if world.game_map[gy][gx] == 1:
-                    # Calculate the true distance, correcting for fish-eye effect
-                    # This projects the distance onto the player's view plane,
-                    # preventing distortion at the edges of the FOV.
-                    dist = depth_step * math.cos(player.angle - ray_angle)
-                    distances.append(dist)
-                    
-                    # Optional: Draw ray on minimap for debugging/visualization (commented out by default)
-                    # pygame.draw.line(info.screen, Colors.yellow, (player.x, player.y), (tx, ty), 1)
-                    break # Ray hit a wall, stop casting this ray
+                # Optional: Draw ray on minimap for debugging/visualization (commented out by default)
+                # pygame.draw.line(info.screen, Colors.yellow, (player.x, player.y), (tx, ty), 1)
+                break # Ray hit a wall, stop casting this ray
+            prev_gx = gx
+        else:
+            # If the ray reached max_depth without hitting any wall
+            hits.distances.append(config.max_depth)
+            hits.sides.append(-1)
+            hits.offsets.append(0.0)
+            hits.tiles.append(0)
+    return hits
+
+def cast_rays_dda(config: RaycastingConfig, player: Player, world: World) -> RayHits:
+    """
+    Grid DDA cast engine: steps every ray from one tile boundary to the next,
+    so the cost scales with the number of tiles crossed instead of pixels travelled.
+    Returns exact hit distances, sides and offsets.
+    """
+    hits = RayHits([], [], [], [])
+    dir_xs, dir_ys, corrections = (table.tolist() for table in config.ray_directions(player.angle))
+    
+    # Work in tile units: the player's position inside the grid and the depth limit
+    pos_x = player.x / world.tile_size
+    pos_y = player.y / world.tile_size
+    start_x, start_y = int(pos_x), int(pos_y)
+    max_tiles = config.max_depth / world.tile_size
+    cells, stride = world.cells, world.stride
+    start_index = world.index(start_x, start_y)
+
+    for ray_idx in range(config.num_rays):
+        dir_x = dir_xs[ray_idx]
+        dir_y = dir_ys[ray_idx]
+        
+        # Ray length needed to cross one full tile in x / y (infinite if the ray is parallel to that axis)
+        delta_x = abs(1 / dir_x) if dir_x != 0 else math.inf
+        delta_y = abs(1 / dir_y) if dir_y != 0 else math.inf
+        
+        # Step direction (as an offset in the flat tile storage) and ray length to the first x / y tile boundary
+        if dir_x < 0:
+            step_x, side_x = -1, (pos_x - start_x) * delta_x
+        else:
+            step_x, side_x = 1, (start_x + 1 - pos_x) * delta_x
+        if dir_y < 0:
+            step_y, side_y = -stride, (pos_y - start_y) * delta_y
+        else:
+            step_y, side_y = stride, (start_y + 1 - pos_y) * delta_y
+        
+        index = start_index
+        tile = 0
+        while True:
+            # Jump to whichever tile boundary is closer along the ray
+            if side_x < side_y:
+                dist = side_x
+                side_x += delta_x
+                index += step_x
+                side = 0
             else:
-                # If the ray reached max_depth without hitting any wall
-                distances.append(self.max_depth)
-        return distances
+                dist = side_y
+                side_y += delta_y
+                index += step_y
+                side = 1
+            
+            # Stop at max depth. The solid border around the map stops every ray, so no bounds check is needed
+            if dist > max_tiles:
+                break
+            # Any non-zero tile blocks movement, so it also stops the ray
+            tile = cells[index]
+            if tile != 0:
+                break
+        
+        if tile == 0:
+            hits.distances.append(config.max_depth)
+            hits.sides.append(-1)
+            hits.offsets.append(0.0)
+            hits.tiles.append(0)
+            continue
+        
+        # Position along the wall face, flipped so textures are never mirrored
+        if side == 0:
+            offset = (pos_y + dist * dir_y) % 1.0
+            if dir_x < 0:
+                offset = 1.0 - offset
+        else:
+            offset = (pos_x + dist * dir_x) % 1.0
+            if dir_y > 0:
+                offset = 1.0 - offset
+        
+        # Convert back to pixels and correct for the fish-eye effect
+        hits.distances.append(dist * world.tile_size * corrections[ray_idx])
+        hits.sides.append(side)
+        hits.offsets.append(offset)
+        hits.tiles.append(tile)
+    return hits
+
+def cast_rays_numpy(config: RaycastingConfig, player: Player, world: World) -> RayHits:
+    """
+    Vectorized grid DDA cast engine: advances all rays together with NumPy array operations.
+    Each loop iteration moves every unfinished ray across one tile boundary, so the number of
+    Python-level iterations is bounded by the tiles crossed by the longest ray, not by num_rays.
+    Produces the same results as cast_rays_dda, returned as NumPy arrays.
+    """
+    dir_x, dir_y, correction = config.ray_directions(player.angle)
+    return cast_columns_numpy(world.padded, world.tile_size, player.x, player.y, dir_x, dir_y, correction, config.max_depth)
+
+def cast_columns_numpy(padded: np.ndarray, tile_size: int, x: float, y: float, dir_x: np.ndarray, dir_y: np.ndarray,
+                       correction: np.ndarray, max_depth: float) -> RayHits:
+    """
+    Vectorized DDA kernel behind cast_rays_numpy. Casts one ray per entry of the unit direction arrays
+    `dir_x` / `dir_y` from (x, y) through the padded map (see World.padded) and scales the hit distances
+    by `correction` (see camera_plane_tables). It only depends on plain values and arrays, so it can
+    also run on a strip of columns inside a worker thread or process (see ParallelCaster).
+    """
+    n = dir_x.size
+    
+    # Work in tile units, exactly like the scalar DDA
+    pos_x = x / tile_size
+    pos_y = y / tile_size
+    start_x, start_y = int(pos_x), int(pos_y)
+    max_tiles = max_depth / tile_size
+    
+    with np.errstate(divide="ignore"):
+        delta_x = np.where(dir_x != 0, np.abs(1 / dir_x), np.inf)
+        delta_y = np.where(dir_y != 0, np.abs(1 / dir_y), np.inf)
+    step_x = np.where(dir_x < 0, -1, 1)
+    step_y = np.where(dir_y < 0, -1, 1)
+    with np.errstate(invalid="ignore"):
+        side_x = np.where(dir_x < 0, pos_x - start_x, start_x + 1 - pos_x) * delta_x
+        side_y = np.where(dir_y < 0, pos_y - start_y, start_y + 1 - pos_y) * delta_y
+    side_x[dir_x == 0] = np.inf
+    side_y[dir_y == 0] = np.inf
+    
+    # Per-ray results; rays that never hit keep these defaults
+    hit_dist = np.zeros(n)
+    sides = np.full(n, -1, dtype=np.int8)
+    tiles = np.zeros(n, dtype=np.uint8)
+    
+    # State of the rays that are still travelling (compacted every iteration), in padded map coordinates
+    active = np.arange(n)
+    map_x = np.full(n, start_x + 1)
+    map_y = np.full(n, start_y + 1)
+    
+    while active.size:
+        # Jump every ray to whichever tile boundary is closer along it
+        use_x = side_x < side_y
+        dist = np.where(use_x, side_x, side_y)
+        side_x = np.where(use_x, side_x + delta_x, side_x)
+        side_y = np.where(use_x, side_y, side_y + delta_y)
+        map_x = np.where(use_x, map_x + step_x, map_x)
+        map_y = np.where(use_x, map_y, map_y + step_y)
+        
+        # Rays beyond max depth stop without a hit. The solid border stops every other ray, so no bounds check
+        stopped = dist > max_tiles
+        tile = padded[map_y, map_x]
+        
+        # Record rays that hit a non-zero tile
+        hit = (tile != 0) & ~stopped
+        hit_idx = active[hit]
+        hit_dist[hit_idx] = dist[hit]
+        sides[hit_idx] = np.where(use_x[hit], 0, 1)
+        tiles[hit_idx] = tile[hit]
+        
+        # Drop finished rays from the working set
+        keep = ~(stopped | hit)
+        active = active[keep]
+        delta_x, delta_y = delta_x[keep], delta_y[keep]
+        step_x, step_y = step_x[keep], step_y[keep]
+        side_x, side_y = side_x[keep], side_y[keep]
+        map_x, map_y = map_x[keep], map_y[keep]
+    
+    # Position along the wall face, flipped so textures are never mirrored (see cast_rays_dda)
+    offsets = np.where(sides == 0, pos_y + hit_dist * dir_y, pos_x + hit_dist * dir_x) % 1.0
+    flip = ((sides == 0) & (dir_x < 0)) | ((sides == 1) & (dir_y > 0))
+    offsets = np.where(flip, 1.0 - offsets, offsets)
+    
+    # Convert back to pixels, correct for the fish-eye effect and fill in the misses
+    distances = hit_dist * tile_size * correction
+    missed = sides < 0
+    distances[missed] = max_depth
+    offsets[missed] = 0.0
+    return RayHits(distances, sides, offsets, tiles)
+
+# Per-process state of ParallelCaster worker processes, filled once by _init_cast_worker
+_worker_state: dict = {}
+
+def _init_cast_worker(shared_map_name: str, shape: tuple[int, int], tile_size: int):
+    """Attaches a worker process to the shared (padded) map memory. Runs once per worker when the pool starts."""
+    from multiprocessing import shared_memory
+    shared_map = shared_memory.SharedMemory(name=shared_map_name)
+    _worker_state["shared_map"] = shared_map # Keep a reference so the buffer stays mapped
+    _worker_state["padded"] = np.ndarray(shape, dtype=np.uint8, buffer=shared_map.buf)
+    _worker_state["tile_size"] = tile_size
+
+def _cast_strip_in_worker(x: float, y: float, view_angle: float, fov: float, num_rays: int,
+                          first: int, last: int, max_depth: float) -> RayHits:
+    """Casts the columns [first, last) inside a worker process against the shared map."""
+    # Every worker keeps its own column tables, so only the camera and the strip bounds are sent per frame
+    if _worker_state.get("table_key") != (fov, num_rays):
+        _worker_state["table_key"] = (fov, num_rays)
+        _worker_state["tables"] = camera_plane_tables(fov, num_rays)
+    forward, sideways, _ = (table[first:last] for table in _worker_state["tables"])
+    dir_x, dir_y = rotate_ray_tables(forward, sideways, view_angle)
+    return cast_columns_numpy(_worker_state["padded"], _worker_state["tile_size"], x, y, dir_x, dir_y, forward, max_depth)
+
+class ParallelCaster:
+    """
+    Casts contiguous strips of screen columns on a persistent pool of workers and gathers
+    the strips into one result.
+    In "process" mode the map is copied into shared memory that every worker attaches to,
+    so only the camera and the strip bounds are sent per frame (the copy is refreshed when the map version changes).
+    In "thread" mode the workers read World.padded directly and rely on NumPy releasing the GIL
+    inside the vectorized kernel.
+    """
+    def __init__(self, world: World, workers: int, mode: str = "process"):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown parallel mode '{mode}'. Available: process, thread")
+        # The pools are only imported when the parallel engine is used, which keeps them out of the startup time
+        from concurrent.futures import ThreadPoolExecutor
+        from multiprocessing import shared_memory
+        import multiprocessing
+        self.world = world
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.shared_map = None
+        
+        if mode == "process":
+            # Share the map with the workers once instead of pickling it every frame
+            self.shared_map = shared_memory.SharedMemory(create=True, size=world.padded.nbytes)
+            self.shared_padded = np.ndarray(world.padded.shape, dtype=np.uint8, buffer=self.shared_map.buf)
+            self.shared_padded[:] = world.padded
+            self.map_version = world.version
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_cast_worker,
+                                             initargs=(self.shared_map.name, world.padded.shape, world.tile_size))
+        else:
+            self.pool = ThreadPoolExecutor(self.workers)
+
+    def cast(self, config: RaycastingConfig, player: Player) -> RayHits:
+        """Splits the columns into one contiguous strip per worker, casts them and joins the results."""
+        if self.shared_map is not None and self.map_version != self.world.version:
+            self.shared_padded[:] = self.world.padded # Tiles changed: refresh the workers' copy
+            self.map_version = self.world.version
+        bounds = np.linspace(0, config.num_rays, self.workers + 1).astype(int)
+        jobs = [(player.x, player.y, player.angle, config.fov, config.num_rays, int(first), int(last), config.max_depth)
+                for first, last in zip(bounds[:-1], bounds[1:]) if last > first]
+        
+        if self.mode == "process":
+            strips = self.pool.starmap(_cast_strip_in_worker, jobs)
+        else:
+            dir_x, dir_y, correction = config.ray_directions(player.angle) # Shared by all threads
+            strips = list(self.pool.map(self._cast_strip_in_thread, [(job, dir_x, dir_y, correction) for job in jobs]))
+        
+        return RayHits(np.concatenate([strip.distances for strip in strips]),
+                       np.concatenate([strip.sides for strip in strips]),
+                       np.concatenate([strip.offsets for strip in strips]),
+                       np.concatenate([strip.tiles for strip in strips]))
+
+    def _cast_strip_in_thread(self, job: tuple) -> RayHits:
+        """Casts one strip of columns on a pool thread against World.padded."""
+        (x, y, _, _, _, first, last, max_depth), dir_x, dir_y, correction = job
+        return cast_columns_numpy(self.world.padded, self.world.tile_size, x, y, dir_x[first:last], dir_y[first:last],
+                                  correction[first:last], max_depth)
+
+    def close(self):
+        """Stops the workers and releases the shared map memory."""
+        if self.mode == "process":
+            self.pool.terminate()
+            self.pool.join()
+        else:
+            self.pool.shutdown()
+        if self.shared_map is not None:
+            self.shared_padded = None # Drop the view before unmapping the memory
+            self.shared_map.close()
+            self.shared_map.unlink()
+            self.shared_map = None
+
+def cast_rays_parallel(config: RaycastingConfig, player: Player, world: World) -> RayHits:
+    """
+    Multi-core cast engine: casts strips of columns on a persistent ParallelCaster pool.
+    The pool is created on first use and recreated only when the world changes.
+    """
+    caster = config.parallel_caster
+    if caster is None or caster.world is not world or caster.workers != max(1, config.workers) or caster.mode != config.parallel_mode:
+        if caster is not None:
+            caster.close()
+        caster = config.parallel_caster = ParallelCaster(world, config.workers, config.parallel_mode)
+    return caster.cast(config, player)
+
+# Available cast engines, selectable via RaycastingConfig.engine
+CAST_ENGINES = {
+    "march": cast_rays_march,
+    "dda": cast_rays_dda,
+    "numpy": cast_rays_numpy,
+    "parallel": cast_rays_parallel,
+}
+
+@dataclass
+class FrameCache:
+    """
+    Temporal coherence cache for the cast and the rendered 3D view, used by render_frame.
+    Frames are keyed on the player position, the map (identity and version) and the cast settings
+    (resolution, FOV, depth, engine):
+    - Same key and same view angle: the last RayHits are returned as they are, and the 3D view
+      that is still on the screen can be kept without casting or drawing anything.
+    - Same key, only the view angle changed (pure rotation): every column whose ray direction
+      is within `tolerance` columns of a ray cast earlier reuses that ray's hit, re-corrected for
+      the new view angle; only the newly exposed columns are cast (with the vectorized kernel).
+    - Anything else: a full cast with the configured engine.
+    Reused columns keep the exact direction of the ray they came from, so errors never add up
+    over several frames. With the default tolerance of half a column a reused wall edge is at most
+    half a column off, which is below what the resolution itself can show.
+    """
+    tolerance: float = 0.5 # Largest direction difference for reusing a ray, in columns
+    key: tuple | None = None     # Key of the cached frame
+    view_angle: float = 0.0      # View angle of the cached frame
+    angles: np.ndarray | None = None # Exact direction of the ray behind every cached column
+    raw: np.ndarray | None = None    # Distance along each cached ray before the fish-eye correction
+    hits: RayHits | None = None      # Cached hits (NumPy arrays)
+    view_valid: bool = False     # The screen still shows the 3D view of the cached hits
+    frames: int = 0              # Counters for stats()
+    full_hits: int = 0
+    partial_hits: int = 0
+    reused_columns: int = 0
+    columns: int = 0
+
+    # Engines with exact DDA hits, whose rays can be mixed with rays from the vectorized kernel
+    REPROJECT_ENGINES = ("dda", "numpy", "parallel")
+
+    def cast(self, info: Information, config: RaycastingConfig, player: Player, world: World) -> tuple[RayHits, bool]:
+        """Returns the hits for this frame and whether the 3D view on the screen can be kept as it is."""
+        key = (id(world), world.version, player.x, player.y, config.num_rays, config.fov, config.max_depth, config.engine)
+        same_place = key == self.key
+        self.frames += 1
+        self.columns += config.num_rays
+        if same_place and player.angle == self.view_angle:
+            self.full_hits += 1
+            self.reused_columns += config.num_rays
+            return self.hits, self.view_valid
+
+        angles = config.ray_angles(player.angle)
+        hits = None
+        if (same_place and config.engine in self.REPROJECT_ENGINES and config.num_rays > 1
+                and abs(player.angle - self.view_angle) < config.fov):
+            hits = self.reproject(config, player, world, angles)
+        if hits is None:
+            hits = config.cast(info, player, world)
+            self.store(hits, angles, player.angle)
+        self.key = key
+        return hits, False
+
+    def reproject(self, config: RaycastingConfig, player: Player, world: World, angles: np.ndarray) -> RayHits | None:
+        """Builds the hits of a rotated view from cached rays plus newly cast ones, or returns None if nothing can be reused."""
+        # Cached ray closest in direction to every new column (ray directions increase from left to right)
+        right = np.clip(np.searchsorted(self.angles, angles), 1, self.angles.size - 1)
+        left = right - 1
+        nearest = np.where(angles - self.angles[left] <= self.angles[right] - angles, left, right)
+        spacing = np.abs(np.gradient(angles)) # Angle between neighbouring columns
+        reuse = np.abs(self.angles[nearest] - angles) <= self.tolerance * spacing
+        if not reuse.any():
+            return None
+
+        source = nearest[reuse]
+        fresh = ~reuse
+        actual = angles.copy()
+        actual[reuse] = self.angles[source]
+        raw = np.empty(angles.size)
+        sides = np.empty(angles.size, dtype=np.int8)
+        offsets = np.empty(angles.size)
+        tiles = np.empty(angles.size, dtype=np.uint8)
+        raw[reuse], sides[reuse] = self.raw[source], self.hits.sides[source]
+        offsets[reuse], tiles[reuse] = self.hits.offsets[source], self.hits.tiles[source]
+        if fresh.any():
+            dir_x, dir_y, correction = config.ray_directions(player.angle)
+            new = cast_columns_numpy(world.padded, world.tile_size, player.x, player.y,
+                                     dir_x[fresh], dir_y[fresh], correction[fresh], config.max_depth)
+            raw[fresh] = new.distances / correction[fresh]
+            sides[fresh], offsets[fresh], tiles[fresh] = new.sides, new.offsets, new.tiles
+
+        distances = raw * np.cos(player.angle - actual) # Fish-eye correction for the new view angle
+        distances[sides < 0] = config.max_depth
+        hits = RayHits(distances, sides, offsets, tiles)
+        self.partial_hits += 1
+        self.reused_columns += int(reuse.sum())
+        self.angles, self.raw, self.hits, self.view_angle = actual, raw, hits, player.angle
+        self.view_valid = False
+        return hits
+
+    def store(self, hits: RayHits, angles: np.ndarray, view_angle: float):
+        """Caches a fully cast frame."""
+        sides = np.asarray(hits.sides, dtype=np.int8)
+        self.hits = RayHits(np.asarray(hits.distances, dtype=np.float64), sides,
+                            np.asarray(hits.offsets, dtype=np.float64), np.asarray(hits.tiles, dtype=np.uint8))
+        self.raw = self.hits.distances / np.cos(view_angle - angles) # Undo the fish-eye correction
+        self.angles, self.view_angle = angles, view_angle
+        self.view_valid = False
+
+    def invalidate_view(self):
+        """Marks the screen as overwritten (menus, window exposure), so the next frame is drawn again."""
+        self.view_valid = False
+
+    def stats(self) -> dict[str, float]:
+        """Returns the frame counts and hit rates: full frames reused, rotated frames and columns reused."""
+        frames = max(1, self.frames)
+        return {
+            "frames": self.frames,
+            "hit_rate": self.full_hits / frames,
+            "partial_rate": self.partial_hits / frames,
+            "column_reuse": self.reused_columns / max(1, self.columns),
+        }
+
+@dataclass
+class ResolutionController:
+    """
+    Dynamic resolution: scales RaycastingConfig.num_rays so the time spent per frame stays inside
+    the budget of the target FPS. The renderer stretches the columns to the full screen width.
+    Frame times are smoothed, and nothing changes while the smoothed time is inside the band between
+    `low` and `high` share of the budget (hysteresis). After each change the controller waits
+    `cooldown` frames, so it sees the effect of one change before making the next.
+    """
+    max_rays: int              # Upper limit, normally the screen width (100% resolution)
+    target_fps: int = 60       # Frame rate to hold, normally Information.fps
+    min_rays: int = 64         # Lower limit
+    low: float = 0.70          # Raise the resolution below this share of the frame budget
+    high: float = 0.90         # Lower the resolution above this share of the frame budget
+    smoothing: float = 0.1     # Weight of the newest frame in the moving average
+    cooldown: int = 15         # Frames to wait after a change
+    step: int = 8              # num_rays is kept a multiple of this, so small jitters do not resize buffers
+    average_ms: float = 0.0    # Smoothed frame time
+    wait: int = 0              # Frames left in the current cooldown
+    changes: int = 0           # Number of resolution changes so far
+    rays: int = 0              # num_rays after the last update
+
+    def update(self, config: RaycastingConfig, frame_ms: float) -> bool:
+        """Feeds in the last frame's time and adjusts config.num_rays. Returns True if it changed."""
+        self.rays = config.num_rays
+        if self.average_ms == 0.0:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += self.smoothing * (frame_ms - self.average_ms)
+        if self.wait > 0:
+            self.wait -= 1
+            return False
+
+        budget = 1000 / self.target_fps
+        if budget * self.low <= self.average_ms <= budget * self.high:
+            return False # Inside the band: leave it alone
+
+        # Frame time grows roughly linearly with the ray count: aim for the middle of the band,
+        # but never change by more than a quarter per step so one slow frame cannot crash the resolution
+        factor = min(1.25, max(0.75, budget * (self.low + self.high) / 2 / self.average_ms))
+        rays = round(config.num_rays * factor / self.step) * self.step
+        rays = min(self.max_rays, max(self.min_rays, rays))
+        if rays == config.num_rays:
+            return False
+        self.average_ms *= rays / config.num_rays # Expected time at the new resolution
+        config.num_rays = self.rays = rays
+        self.wait = self.cooldown
+        self.changes += 1
+        return True
+
+    @property
+    def resolution(self) -> float:
+        """The effective resolution after the last update in percent of max_rays."""
+        return self.rays / self.max_rays * 100
+
+def block_average(image: np.ndarray, ys: np.ndarray, xs: np.ndarray) -> np.ndarray:
+    """
+    Returns the average color of the 2x2 pixel blocks (ys, xs) of an (height, width, 3) image.
+    Pixels past the right or bottom edge count as black, like the padding of the next mip level.
+    """
+    height, width = image.shape[:2]
+    total = np.zeros((len(ys), 3), dtype=np.uint16)
+    for dy in (0, 1):
+        for dx in (0, 1):
+            y, x = 2 * ys + dy, 2 * xs + dx
+            inside = (y < height) & (x < width)
+            total[inside] += image[y[inside], x[inside]]
+    return (total // 4).astype(np.uint8)
+
+def downsample(image: np.ndarray) -> np.ndarray:
+    """Halves an (height, width, 3) image by averaging 2x2 blocks (odd edges are padded with black)."""
+    height, width = image.shape[:2]
+    padded = np.zeros(((height + 1) // 2 * 2, (width + 1) // 2 * 2, 3), dtype=np.uint16)
+    padded[:height, :width] = image
+    total = padded[0::2, 0::2] + padded[1::2, 0::2] + padded[0::2, 1::2] + padded[1::2, 1::2]
+    return (total // 4).astype(np.uint8)
 
 @dataclass
 class Minimap:
-    """Manages the drawing and state of the in-game minimap."""
-    size: Size                      # Dimensions of the minimap surface in pixels
-    tile_size: int                  # Size of a single tile on the minimap in pixels
-    minimap_static: pygame.Surface = pygame.Surface((0, 0)) # Pre-rendered static minimap background
-    
+    """
+    Manages the drawing and state of the in-game minimap.
+    The map is kept as an image with one pixel per tile, built from the tile array in one vectorized
+    pass, plus mip levels that each halve the previous one (level k has 2^k tiles per pixel).
+    Small maps are shown whole; on big maps (follow=True) the minimap is a window centered on the player
+    that can be zoomed. Tile changes are painted into the images without rebuilding them.
+    """
+    size: Size                      # Dimensions of the minimap on screen in pixels
+    tile_size: float                # Size of a single tile on the minimap in pixels (a power of two when following)
+    follow: bool = False            # Show a window around the player instead of the whole map
+    levels: list[np.ndarray] = field(default_factory=list, repr=False)        # Mip levels as (height, width, 3) RGB
+    surfaces: list[pygame.Surface] = field(default_factory=list, repr=False) # The same levels as Surfaces
+    tiles: np.ndarray | None = field(default=None, repr=False) # Copy of the tiles the images were built from
+    colors: np.ndarray | None = field(default=None, repr=False) # RGB per map value (palette applied)
+    version: int = -1               # World version the images match
+    view: pygame.Surface | None = field(default=None, repr=False) # Scaled part of a mip level, reused between frames
+    view_key: tuple | None = None   # What `view` shows: (level, left, top, tile size, version)
+
+    # Zoom steps in pixels per tile for the follow mode; powers of two keep the scaling exact
+    ZOOM_LEVELS = (0.125, 0.25, 0.5, 1, 2, 4, 8, 16)
+    # Tiles that may change at once before the images are rebuilt instead of patched
+    PATCH_LIMIT = 4096
+
     def create_minimap_surface(self, world: World):
         """
-        Creates and stores a static Pygame Surface representing the minimap background.
-        This includes drawing walls and walkable paths.
+        Builds the minimap images from the world's tiles: walls dark gray, paths white and
+        map values with a palette entry in their palette color.
         """
-        # Create a new surface for the minimap
-        minimap_surface = pygame.Surface((self.size.width, self.size.height))
-        minimap_surface.fill(Colors.black)  # Fill background of minimap area
+        colors = np.empty((256, 3), dtype=np.uint8)
+        colors[:] = Colors.dark_gray
+        colors[0] = Colors.white
+        for value, color in world.palette.items():
+            colors[value] = color
+        self.colors = colors
+        self.tiles = world.grid.copy()
+        self.levels = [colors[self.tiles]] # One fancy-indexing pass instead of a rect per tile
+        # Mip levels are only needed down to the smallest zoom, and not past a single pixel
+        smallest = self.ZOOM_LEVELS[0] if self.follow else self.tile_size
+        while max(self.levels[-1].shape[:2]) > 1 and 2 ** len(self.levels) <= 1 / smallest:
+            self.levels.append(downsample(self.levels[-1]))
+        # surfarray uses (x, y) indexing, so the (row, column) images are transposed
+        self.surfaces = [pygame.surfarray.make_surface(level.transpose(1, 0, 2)) for level in self.levels]
+        self.version = world.version
+        self.view_key = None
 
-        # Iterate through the game map to draw each tile
-        for i, row in enumerate(world.game_map):
-            for j, col in enumerate(row):
-                if col == 1:
-                    # If it's a wall, draw it as a dark gray rectangle
-                    color = Colors.dark_gray
-                else:
-                    # If it's a walkable path, draw it as a white rectangle
-                    color = Colors.white
-                
-                # Calculate position for the current tile on the minimap surface
-                x = j * self.tile_size
-                y = i * self.tile_size
-                
-                pygame.draw.rect(minimap_surface, color, (x, y, self.tile_size, self.tile_size))
-        
-        self.minimap_static = minimap_surface # Store the created surface
+    def update_tiles(self, world: World):
+        """
+        Brings the images up to date after tiles changed (world.version moved on).
+        Only the changed pixels and the mip pixels above them are recomputed.
+        """
+        if self.version == world.version:
+            return
+        grid = world.grid
+        if self.tiles is None or self.tiles.shape != grid.shape:
+            self.create_minimap_surface(world)
+            return
+        # flatnonzero on the flat mask is much faster than a 2D nonzero on big maps
+        ys, xs = np.divmod(np.flatnonzero(grid != self.tiles), grid.shape[1])
+        if len(ys) > self.PATCH_LIMIT:
+            self.create_minimap_surface(world)
+            return
+
+        self.tiles[ys, xs] = grid[ys, xs]
+        colors = self.colors[grid[ys, xs]]
+        for level, (image, surface) in enumerate(zip(self.levels, self.surfaces)):
+            if level > 0:
+                # Each changed pixel of the level below changes one block average here
+                ys, xs = np.unique(np.stack((ys // 2, xs // 2)), axis=1)
+                colors = block_average(self.levels[level - 1], ys, xs)
+            image[ys, xs] = colors
+            pixels = pygame.surfarray.pixels3d(surface)
+            pixels[xs, ys] = colors
+            del pixels # Unlocks the surface
+        self.version = world.version
+
+    def zoom(self, steps: int):
+        """Zooms the follow view in (positive steps) or out (negative steps)."""
+        if not self.follow:
+            return
+        index = self.ZOOM_LEVELS.index(self.tile_size) + steps
+        self.tile_size = self.ZOOM_LEVELS[max(0, min(len(self.ZOOM_LEVELS) - 1, index))]
+
+    def origin(self, player: Player, world: World) -> tuple[float, float]:
+        """Returns the map position in tiles that is drawn at the top left corner of the minimap."""
+        if not self.follow:
+            return 0.0, 0.0
+        return (player.x / world.tile_size - self.size.width / 2 / self.tile_size,
+                player.y / world.tile_size - self.size.height / 2 / self.tile_size)
 
-    def draw_minimap(self, info: Information):
-        """Draws the static minimap background onto the main game screen."""
-        # Blit (copy) the pre-rendered static minimap surface to the main screen.
-        # It's positioned in the top-right corner of the screen.
-        info.screen.blit(self.minimap_static, (info.size.width - self.size.width, 0))
+    def render_view(self, origin: tuple[float, float]):
+        """
+        Renders the part of the map around `origin` from the coarsest mip level that still has
+        at least one pixel per minimap pixel. The result covers a margin of whole level pixels,
+        so it is only re-rendered when the view moves past a level pixel or the tiles change.
+        """
+        level = min(len(self.surfaces) - 1, max(0, int(math.log2(1 / self.tile_size)))) if self.tile_size < 1 else 0
+        scale = self.tile_size * 2 ** level # Screen pixels per level pixel (>= 1 for the zoom levels)
+        left = math.floor(origin[0] / 2 ** level)
+        top = math.floor(origin[1] / 2 ** level)
+        key = (level, left, top, self.tile_size, self.version)
+        if key == self.view_key:
+            return
+        width = math.ceil(self.size.width / scale) + 1
+        height = math.ceil(self.size.height / scale) + 1
+        part = pygame.Surface((width, height))
+        part.fill(Colors.black) # Outside the map
+        part.blit(self.surfaces[level], (-left, -top))
+        self.view = pygame.transform.scale(part, (round(width * scale), round(height * scale)))
+        self.view_key = key
+
+    def draw_minimap(self, info: Information, player: Player, world: World):
+        """Draws the map part of the minimap in the top-right corner of the screen."""
+        self.update_tiles(world)
+        origin = self.origin(player, world)
+        self.render_view(origin)
+        level, left, top = self.view_key[:3]
+        # Offset of the (whole level pixel) view against the exact origin, for smooth scrolling
+        offset_x = (left * 2 ** level - origin[0]) * self.tile_size
+        offset_y = (top * 2 ** level - origin[1]) * self.tile_size
+        area = pygame.Rect(info.size.width - self.size.width, 0, self.size.width, self.size.height)
+        info.screen.fill(Colors.black, area)
+        clip = info.screen.get_clip()
+        info.screen.set_clip(area)
+        info.screen.blit(self.view, (area.x + round(offset_x), area.y + round(offset_y)))
+        info.screen.set_clip(clip)
 
     def draw_player_on_minimap(self, info: Information, player: Player, world: World):
         """
         Draws the player's position and direction on top of the minimap.
         """
         # Calculate player's position relative to the minimap's coordinate system
-        px_on_minimap = (player.x / world.tile_size) * self.tile_size
-        py_on_minimap = (player.y / world.tile_size) * self.tile_size
+        origin_x, origin_y = self.origin(player, world)
+        px_on_minimap = (player.x / world.tile_size - origin_x) * self.tile_size
+        py_on_minimap = (player.y / world.tile_size - origin_y) * self.tile_size
         
         # Calculate the absolute screen coordinates where the minimap is drawn
         minimap_screen_x = info.size.width - self.size.width
         minimap_screen_y = 0
         
         # Draw the player as a green circle on the minimap
+        marker_size = max(3, self.tile_size) # Stays visible when zoomed out
         pygame.draw.circle(info.screen, Colors.green, 
                            (int(minimap_screen_x + px_on_minimap), int(minimap_screen_y + py_on_minimap)), 
-                           int(self.tile_size * 0.5)) # Player icon size on minimap
+                           int(marker_size * 0.5)) # Player icon size on minimap
         
         # Draw a yellow line to indicate player's viewing direction
-        line_length = self.tile_size * 1.5 # Length of the direction line
+        line_length = marker_size * 1.5 # Length of the direction line
         line_end_x = px_on_minimap + math.cos(player.angle) * line_length
         line_end_y = py_on_minimap + math.sin(player.angle) * line_length
         
@@ -262,6 +1562,246 @@ class Minimap:
                          (int(minimap_screen_x + line_end_x), int(minimap_screen_y + line_end_y)),
                          2) # Line thickness
 
+def make_textures(size: int = 64) -> dict[int, pygame.Surface]:
+    """
+    Generates the built-in wall textures, keyed by the map value that selects them.
+    Map value 1 stays a flat shaded wall; 2 = brick, 3 = stone blocks, 4 = wood planks.
+    """
+    y, x = np.mgrid[0:size, 0:size] # Texel coordinates (row, column)
+    rng = np.random.default_rng(7)  # Fixed seed so the textures look the same on every start
+    noise = rng.integers(-12, 13, (size, size)) # Slight grain so large walls do not look flat
+
+    # Brick: offset rows of red bricks with light mortar joints
+    brick_h = size // 4
+    brick_w = size // 2
+    shifted_x = (x + (y // brick_h % 2) * brick_w // 2) % brick_w
+    mortar = (y % brick_h < 2) | (shifted_x < 2)
+    brick = np.where(mortar[..., None], [170, 170, 160], [150, 60, 40]) + noise[..., None]
+
+    # Stone: large grey-blue blocks with dark joints
+    block = size // 2
+    joints = (y % block < 2) | (x % block < 2)
+    stone = np.where(joints[..., None], [40, 40, 50], [110, 115, 130]) + noise[..., None] * 2
+
+    # Wood: vertical planks with a darker seam between them
+    plank = size // 4
+    seam = x % plank == 0
+    wood = np.where(seam[..., None], [60, 35, 15], [140, 90, 45]) + (noise[..., None] + (np.sin(y / 3.0) * 8).astype(int)[..., None])
+
+    textures = {}
+    for value, texels in ((2, brick), (3, stone), (4, wood)):
+        # surfarray uses (x, y) indexing, so the (row, column) arrays are transposed
+        textures[value] = pygame.surfarray.make_surface(np.clip(texels, 0, 255).astype(np.uint8).transpose(1, 0, 2))
+    return textures
+
+def size_bucket(size: float, max_size: int | None = None) -> int:
+    """
+    Rounds an on-screen size in pixels (capped at max_size) to its bucket for the scaled-image caches.
+    Buckets grow with the size (about 3% wide), so nearby sizes share one cached image.
+    """
+    size = int(size) if max_size is None else min(int(size), max_size)
+    step = max(2, size // 32)
+    return max(step, (size + step // 2) // step * step)
+
+class TextureCache:
+    """
+    Bounded LRU cache of pre-scaled wall texture strips.
+    Every texture is sliced into 1-pixel column strips once. A strip scaled to a projected wall
+    height is cached under (texture, column, height bucket), so a frame mostly reuses strips
+    that were scaled in earlier frames. Least recently used strips are dropped once max_bytes is exceeded.
+    """
+    def __init__(self, textures: dict[int, pygame.Surface], max_bytes: int = 64 * 1024 * 1024, max_height: int = 65536):
+        self.max_bytes = max_bytes   # Memory cap for the scaled strips
+        self.max_height = max_height # Largest projected wall height that gets its own bucket
+        self.columns: dict[tuple[int, int], list[pygame.Surface]] = {} # (map value, side) -> 1-pixel column strips
+        for value, texture in textures.items():
+            # Side 1 (horizontal faces) gets a darker copy, which makes corners easy to read
+            dark = texture.copy()
+            dark.fill((160, 160, 160), special_flags=pygame.BLEND_RGB_MULT)
+            for side, surface in ((0, texture), (1, dark)):
+                self.columns[(value, side)] = [surface.subsurface((x, 0, 1, surface.get_height())).copy()
+                                               for x in range(surface.get_width())]
+        self.strips: OrderedDict[tuple, tuple[pygame.Surface, int]] = OrderedDict() # key -> (strip, offset from wall top)
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def has_texture(self, value: int) -> bool:
+        """Returns True if the map value selects a texture."""
+        return (value, 0) in self.columns
+
+    def height_bucket(self, height: float) -> int:
+        """Rounds a projected wall height to its bucket (see size_bucket)."""
+        return size_bucket(height, self.max_height)
+
+    def strip(self, value: int, side: int, offset: float, height: float, view_height: int) -> tuple[pygame.Surface, int]:
+        """
+        Returns the 1-pixel wide texture strip for a wall hit at `offset` (0..1), scaled to the height
+        bucket, together with the strip's vertical offset from the top of the wall.
+        Walls taller than the view are only scaled for the rows that are actually visible.
+        """
+        columns = self.columns[(value, side)]
+        column = min(len(columns) - 1, int(offset * len(columns)))
+        bucket = self.height_bucket(height)
+        key = (value, side, column, bucket, view_height)
+        
+        entry = self.strips.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.strips.move_to_end(key) # Mark as most recently used
+            return entry
+        
+        self.misses += 1
+        texels = columns[column]
+        if bucket <= view_height:
+            entry = (pygame.transform.scale(texels, (1, bucket)), 0)
+        else:
+            # Only the middle view_height rows of the wall are on screen: scale just the texels behind them
+            texture_h = texels.get_height()
+            first = int((bucket - view_height) / 2 * texture_h / bucket)
+            last = min(texture_h, math.ceil((bucket + view_height) / 2 * texture_h / bucket))
+            visible = texels.subsurface((0, first, 1, last - first))
+            entry = (pygame.transform.scale(visible, (1, round((last - first) * bucket / texture_h))), round(first * bucket / texture_h))
+        
+        self.strips[key] = entry
+        self.bytes_used += self.strip_bytes(entry[0])
+        while self.bytes_used > self.max_bytes and len(self.strips) > 1:
+            _, (evicted, _) = self.strips.popitem(last=False) # Drop the least recently used strip
+            self.bytes_used -= self.strip_bytes(evicted)
+            self.evictions += 1
+        return entry
+
+    @staticmethod
+    def strip_bytes(strip: pygame.Surface) -> int:
+        """Returns the pixel memory used by a cached strip."""
+        return strip.get_width() * strip.get_height() * strip.get_bytesize()
+
+    def stats(self) -> dict[str, float]:
+        """Returns the cache counters: hits, misses, hit rate, evictions, cached strips and bytes used."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "strips": len(self.strips),
+            "bytes": self.bytes_used,
+            "max_bytes": self.max_bytes,
+        }
+
+def make_sprites(size: int = 64) -> dict[int, pygame.Surface]:
+    """
+    Generates the built-in sprite images with transparent backgrounds, keyed by Sprite.texture.
+    1 = gold coin pickup, 2 = green NPC, 3 = lamp post. Sprites stand on the bottom edge of their image.
+    """
+    y, x = (np.mgrid[0:size, 0:size] + 0.5) / size # Texel centers in 0..1 (row, column)
+    images = {}
+
+    # Coin: shaded gold disc in the lower part of the image
+    distance = np.hypot(x - 0.5, y - 0.72)
+    coin_alpha = distance < 0.26
+    coin = np.stack([255 - distance * 300, 200 - distance * 350, 40 + 0 * x], axis=-1)
+    images[1] = (coin, coin_alpha)
+
+    # NPC: body, head and legs
+    body = (np.abs(x - 0.5) < 0.18) & (y > 0.3) & (y < 0.72)
+    head = np.hypot(x - 0.5, y - 0.2) < 0.12
+    legs = (y >= 0.72) & (np.abs(np.abs(x - 0.5) - 0.09) < 0.06)
+    npc = np.where(head[..., None], [230, 190, 150], np.where(legs[..., None], [40, 60, 120], [40, 170, 60]))
+    images[2] = (npc, body | head | legs)
+
+    # Lamp post: dark pole with a bright lamp on top
+    pole = (np.abs(x - 0.5) < 0.05) & (y > 0.15)
+    lamp = np.hypot(x - 0.5, y - 0.12) < 0.1
+    post = np.where(lamp[..., None], [255, 240, 150], [60, 60, 70])
+    images[3] = (post, pole | lamp)
+
+    sprites = {}
+    for value, (texels, alpha) in images.items():
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        # surfarray uses (x, y) indexing, so the (row, column) arrays are transposed
+        pygame.surfarray.pixels3d(surface)[...] = np.clip(texels, 0, 255).astype(np.uint8).transpose(1, 0, 2)
+        pygame.surfarray.pixels_alpha(surface)[...] = np.where(alpha, 255, 0).astype(np.uint8).T
+        sprites[value] = surface
+    return sprites
+
+class SpriteCache:
+    """
+    Bounded LRU cache of sprite images pre-scaled to their size on screen.
+    Sizes are rounded to buckets (see size_bucket), so sprites at similar distances
+    share one scaled image. Least recently used images are dropped once max_bytes is exceeded.
+    """
+    COLOR_KEY = (255, 0, 255) # Transparent color of the converted images
+
+    def __init__(self, images: dict[int, pygame.Surface], max_bytes: int = 32 * 1024 * 1024, max_pixels: int = 512 * 512):
+        if pygame.display.get_surface() is not None:
+            # Display format with a color key instead of per-pixel alpha: blits are several times faster.
+            # Pixels are either fully transparent or opaque, as in make_sprites.
+            keyed = {}
+            for value, image in images.items():
+                surface = pygame.Surface(image.get_size()).convert()
+                surface.fill(self.COLOR_KEY)
+                surface.blit(image, (0, 0))
+                surface.set_colorkey(self.COLOR_KEY)
+                keyed[value] = surface
+            images = keyed
+        self.images = images
+        self.max_bytes = max_bytes   # Memory cap for the scaled images
+        self.max_pixels = max_pixels # Larger sprites are scaled every frame (they are close and change size quickly)
+        self.scaled_images: OrderedDict[tuple[int, int, int], pygame.Surface] = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def scaled(self, texture: int, width: float, height: float) -> pygame.Surface:
+        """Returns the sprite image scaled to (about) width x height pixels."""
+        key = (texture, size_bucket(width), size_bucket(height))
+        image = self.scaled_images.get(key)
+        if image is not None:
+            self.hits += 1
+            self.scaled_images.move_to_end(key) # Mark as most recently used
+            return image
+
+        self.misses += 1
+        image = pygame.transform.scale(self.images[texture], key[1:])
+        self.scaled_images[key] = image
+        self.bytes_used += key[1] * key[2] * image.get_bytesize()
+        while self.bytes_used > self.max_bytes and len(self.scaled_images) > 1:
+            (_, width, height), evicted = self.scaled_images.popitem(last=False) # Drop the least recently used image
+            self.bytes_used -= width * height * evicted.get_bytesize()
+            self.evictions += 1
+        return image
+
+    def scaled_part(self, texture: int, width: float, height: float, area: pygame.Rect) -> tuple[pygame.Surface, int, int]:
+        """
+        Scales only the `area` (in pixels of the width x height image) of a sprite, for sprites close
+        enough to be too large for the cache (they can be much larger than the screen). The part is
+        widened to whole texels, so it is returned with its position in the scaled image.
+        """
+        image = self.images[texture]
+        scale_x, scale_y = width / image.get_width(), height / image.get_height()
+        x0, y0 = int(area.left / scale_x), int(area.top / scale_y)
+        x1 = min(image.get_width(), math.ceil(area.right / scale_x))
+        y1 = min(image.get_height(), math.ceil(area.bottom / scale_y))
+        part = image.subsurface((x0, y0, max(1, x1 - x0), max(1, y1 - y0)))
+        size = (max(1, round((x1 - x0) * scale_x)), max(1, round((y1 - y0) * scale_y)))
+        return pygame.transform.scale(part, size), round(x0 * scale_x), round(y0 * scale_y)
+
+    def stats(self) -> dict[str, float]:
+        """Returns the cache counters: hits, misses, hit rate, evictions, cached images and bytes used."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "images": len(self.scaled_images),
+            "bytes": self.bytes_used,
+            "max_bytes": self.max_bytes,
+        }
+
 @dataclass
 class DrawConfig:
     """Configuration for drawing 3D scene elements like walls and floor."""
@@ -271,27 +1811,254 @@ class DrawConfig:
     floor_start_shade: int = 85 # Minimum shade for floor
     floor_end_shade: int = 170  # Maximum shade for floor
     
-    def draw_floor(self, info: Information):
-        """Draws the floor with a gradient effect, simulating depth."""
-        for i in range(info.size.height // 2, info.size.height):  # Iterate from horizon to bottom of screen
-            # Calculate shade: closer to horizon (info.size.height // 2) is darker, closer to bottom is brighter
-            shade = min(255, int((i - info.size.height // 2) / (info.size.height // 2) * self.floor_end_shade) + self.floor_start_shade)
+    background: pygame.Surface | None = field(default=None, repr=False, compare=False) # Cached ceiling + floor image
+    background_key: tuple = field(default=(), repr=False, compare=False) # Screen size and shades the cache was built for
+    cleared_pixels: int = field(default=0, repr=False, compare=False) # Pixels written by the background in the last frame
+    
+    column_buffer: bool = True # Rasterize all wall columns into one pixel buffer instead of one draw call per column
+    background_column: np.ndarray | None = field(default=None, repr=False, compare=False) # Mapped pixels of one background column
+    column_surface: pygame.Surface | None = field(default=None, repr=False, compare=False) # Reused low-resolution column image
+    row_index: np.ndarray | None = field(default=None, repr=False, compare=False) # Cached (height, 1) array of row numbers
+    
+    textured: bool = True # Draw walls with map values 2+ using the built-in textures
+    texture_cache: TextureCache | None = field(default=None, repr=False, compare=False) # Created on first textured frame
+    
+    sprite_cache: SpriteCache | None = field(default=None, repr=False, compare=False) # Created when the first sprite is drawn
+    sprite_key: tuple = field(default=(), repr=False, compare=False) # Sprite set and version that were drawn last
+    visible_sprites: int = field(default=0, repr=False, compare=False) # Sprites drawn in the last frame
+    
+    def draw_floor(self, surface: pygame.Surface):
+        """Draws the floor with a gradient effect, simulating depth, into the lower half of the surface."""
+        width, height = surface.get_size()
+        for i in range(height // 2, height):  # Iterate from horizon to bottom of the surface
+            # Calculate shade: closer to horizon (height // 2) is darker, closer to bottom is brighter
+            shade = min(255, int((i - height // 2) / (height // 2) * self.floor_end_shade) + self.floor_start_shade)
             # Draw a horizontal line for each row of pixels
-            pygame.draw.line(info.screen, (shade, shade, shade), (0, i), (info.size.width, i)) # FIX: use info.size.width
+            pygame.draw.line(surface, (shade, shade, shade), (0, i), (width, i))
+
+    def build_background(self, size: Size) -> pygame.Surface:
+        """Renders the static background (ceiling and floor gradient) once for the given screen size."""
+        background = pygame.Surface((size.width, size.height))
+        if pygame.display.get_surface() is not None:
+            background = background.convert() # Match the display pixel format so the blit is a plain copy
+        background.fill(Colors.dark_gray) # Base color, visible only if the halves do not cover everything
+        
+        # Draw a distinct ceiling area (optional, can be same as background)
+        pygame.draw.rect(background, Colors.gray, (0, 0, size.width, size.height // 2))
+        
+        self.draw_floor(background) # Draw the floor beneath the walls
+        return background
+
+    def draw_background(self, info: Information):
+        """
+        Draws the ceiling and the floor gradient behind the walls with a single blit.
+        The background image is rebuilt only when the screen size or the floor shades change.
+        """
+        key = (info.size.width, info.size.height, self.floor_start_shade, self.floor_end_shade)
+        if self.background is None or self.background_key != key:
+            self.background = self.build_background(info.size)
+            self.background_key = key
+            # The background only changes from row to row, so one column describes it completely
+            # (only that column is copied out, not the whole screen-sized image)
+            first_column = self.background.subsurface((0, 0, 1, info.size.height))
+            self.background_column = map_colors(info.screen, pygame.surfarray.array3d(first_column)[0])
+            self.row_index = np.arange(info.size.height, dtype=np.int32)[:, None]
+        
+        if self.column_buffer:
+            return # The column rasterizer writes the background together with the walls
+        
+        # The blit covers the whole screen, so no separate clear is needed
+        self.cleared_pixels = self.background.get_width() * self.background.get_height()
+        info.screen.blit(self.background, (0, 0))
 
-    def draw_walls(self, info: Information, raycasting_config: RaycastingConfig, world: World, distances: list[float]):
+    def draw_walls(self, info: Information, raycasting_config: RaycastingConfig, world: World, distances: list[float],
+                   hits: RayHits | None = None):
         """
         Draws the 3D walls based on the distances calculated by raycasting.
-        Applies shading for depth perception.
+        Applies shading for depth perception. The background has to be drawn first (see draw_background).
+        If the full RayHits are given, walls with texture map values are drawn textured.
         """
-        info.screen.fill(Colors.dark_gray) # Fill the top half (sky/ceiling) with a base color
+        textured_columns = None
+        if self.textured and hits is not None:
+            tiles = np.asarray(hits.tiles)
+            textured_columns = np.flatnonzero(tiles >= 2)
+            if textured_columns.size:
+                if self.texture_cache is None:
+                    # Built when the first textured wall is seen, so untextured maps never pay for it
+                    self.texture_cache = TextureCache(make_textures())
+                # Draw those columns as far away as possible; the texture pass below covers them
+                distances = np.asarray(distances, dtype=np.float64).copy()
+                distances[textured_columns] = raycasting_config.max_depth
+            else:
+                textured_columns = None
         
-        # Draw a distinct ceiling area (optional, can be same as background)
-        pygame.draw.rect(info.screen, Colors.gray, (0, 0, info.size.width, info.size.height // 2))
+        if self.column_buffer:
+            self.draw_walls_buffer(info, raycasting_config, world, distances)
+        else:
+            self.draw_walls_rects(info, raycasting_config, world, distances)
+        
+        if textured_columns is not None:
+            self.draw_textured_columns(info, world, hits, textured_columns)
+
+    def draw_textured_columns(self, info: Information, world: World, hits: RayHits, columns: np.ndarray):
+        """
+        Draws the given columns with texture strips from the texture cache, batched into one blits() call.
+        Columns whose map value has no texture fall back to the plain wall color.
+        """
+        width, height = info.size.width, info.size.height
+        count = len(hits.distances)
+        blits = []
+        for i in columns.tolist():
+            value = int(hits.tiles[i])
+            if not self.texture_cache.has_texture(value):
+                value = 2 # Unknown texture ids use the first texture
+            dist = float(hits.distances[i])
+            wall_h = world.tile_size * height / (dist + 0.0001)
+            bucket = self.texture_cache.height_bucket(wall_h)
+            strip, top_offset = self.texture_cache.strip(value, int(hits.sides[i]), float(hits.offsets[i]), wall_h, height)
+            y = height // 2 - bucket // 2 + top_offset
+            # Columns wider than one pixel (lower resolutions) repeat the same strip
+            for x in range(i * width // count, (i + 1) * width // count):
+                blits.append((strip, (x, y)))
+        info.screen.blits(blits, doreturn=False)
+
+    def draw_walls_buffer(self, info: Information, raycasting_config: RaycastingConfig, world: World, distances: list[float]):
+        """
+        Column-buffer rasterizer: builds the whole 3D view (background and walls) as one pixel array
+        with NumPy and pushes it to the screen in a single blit.
+        Any number of columns is supported; fewer columns than screen pixels are stretched to the
+        full width with nearest-neighbour scaling, so there is no gap at the right edge.
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        columns = distances.size
+        width, height = info.size.width, info.size.height
+        
+        # Same geometry as the per-rect path: a strip of int(wall_h) rows starting at height//2 - wall_h//2
+        wall_h = world.tile_size * height / (distances + 0.0001) # Add small value to prevent division by zero
+        top = np.clip(height // 2 - wall_h // 2, -1, height).astype(np.int32)
+        bottom = np.clip(top + np.floor(wall_h), 0, height).astype(np.int32)
         
-        self.draw_floor(info) # Draw the floor beneath the walls
+        # Closer walls are brighter; rays that reached max depth are drawn black
+        shade = np.clip(self.wall_end_shade - (distances / raycasting_config.max_depth * self.wall_end_shade).astype(np.int32), 0, 255)
+        shade[distances >= raycasting_config.max_depth] = 0
+        colors = map_colors(info.screen, np.repeat(shade[:, None], 3, axis=1))
+        
+        # (height, columns) frame: wall color inside each strip, background everywhere else
+        is_wall = (self.row_index >= top) & (self.row_index < bottom)
+        frame = np.where(is_wall, colors, self.background_column[:, None])
+        
+        if columns == width:
+            pygame.surfarray.blit_array(info.screen, frame.T)
+        else:
+            if self.column_surface is None or self.column_surface.get_size() != (columns, height):
+                self.column_surface = pygame.Surface((columns, height), 0, info.screen)
+            pygame.surfarray.blit_array(self.column_surface, frame.T)
+            pygame.transform.scale(self.column_surface, (width, height), info.screen) # Nearest-neighbour upscale
+        
+        self.cleared_pixels = width * height # Every pixel is written exactly once by the buffer
+
+    def draw_sprites(self, info: Information, raycasting_config: RaycastingConfig, world: World, player: Player,
+                     distances: list[float]):
+        """
+        Draws the world's sprites as billboards over the walls, using the per-column wall distances as a z-buffer:
+        - only sprites in the spatial hash cells around the view cone are looked at,
+        - sprites behind the camera, beyond max_depth or outside the field of view are culled,
+          and so are sprites on tiles that cannot be seen from the player's tile if the world has a PVS,
+        - the rest are drawn far to near, each only in the columns where it is in front of the wall,
+          from images pre-scaled by the sprite cache.
+        Sprites and walls share one projection: a sprite with scale 1 is as tall as a wall at the same distance.
+        """
+        self.sprite_key = (id(world.sprites), world.sprites.version)
+        self.visible_sprites = 0
+        if not world.sprites:
+            return
+        if self.sprite_cache is None:
+            self.sprite_cache = SpriteCache(make_sprites())
 
-        ray_width = info.size.width // len(distances) # Width of each vertical wall strip
+        # Bounding box of the view cone (the edge rays reach max_depth in front of the camera at max_depth / cos(fov / 2))
+        max_depth, half_fov = raycasting_config.max_depth, raycasting_config.fov / 2
+        reach = max_depth / math.cos(half_fov)
+        corners_x = [player.x] + [player.x + math.cos(player.angle + side * half_fov) * reach for side in (-1, 1)]
+        corners_y = [player.y] + [player.y + math.sin(player.angle + side * half_fov) * reach for side in (-1, 1)]
+        margin = world.tile_size # Sprites are at most about a tile wide
+        candidates = world.sprites.query_rect(min(corners_x) - margin, min(corners_y) - margin,
+                                              max(corners_x) + margin, max(corners_y) + margin)
+        if not candidates:
+            return
+
+        # Camera-space position of every candidate: depth along the view direction and offset to the right
+        count = len(candidates)
+        xs = np.fromiter((sprite.x for sprite in candidates), np.float64, count) - player.x
+        ys = np.fromiter((sprite.y for sprite in candidates), np.float64, count) - player.y
+        scales = np.fromiter((sprite.scale for sprite in candidates), np.float64, count)
+        cos_a, sin_a = math.cos(player.angle), math.sin(player.angle)
+        depth = xs * cos_a + ys * sin_a
+        side = ys * cos_a - xs * sin_a
+        plane = math.tan(half_fov) # Half-width of the camera plane one unit in front of the camera
+        half_width = scales * world.tile_size / 2
+        near = world.tile_size * 0.25 # Closer sprites would cover the screen: the camera is inside them
+        visible = (depth > near) & (depth < max_depth) & (np.abs(side) - half_width < plane * depth)
+        pvs = world.pvs
+        if pvs is not None and pvs.version == world.version:
+            mask = pvs.visible_mask(int(player.x // world.tile_size), int(player.y // world.tile_size))
+            if mask is not None: # (None if the player's tile is not walkable)
+                tile_xs = np.clip((xs + player.x) // world.tile_size, 0, world.size.width - 1).astype(np.intp)
+                tile_ys = np.clip((ys + player.y) // world.tile_size, 0, world.size.height - 1).astype(np.intp)
+                visible &= mask[tile_ys, tile_xs]
+        indices = np.flatnonzero(visible)
+        indices = indices[np.argsort(-depth[indices], kind="stable")] # Far to near, so nearer sprites cover farther ones
+
+        width, height = info.size.width, info.size.height
+        zbuffer = np.asarray(distances, dtype=np.float64)
+        columns = len(zbuffer)
+        for i in indices:
+            sprite, z = candidates[i], depth[i]
+            image = self.sprite_cache.images.get(sprite.texture)
+            if image is None:
+                continue
+            sprite_h = sprite.scale * world.tile_size * height / z # Same projection as the walls
+            # Horizontal projection of the camera plane: the plane's width spans the screen
+            sprite_w = sprite.scale * world.tile_size * image.get_width() / image.get_height() * width / (2 * plane * z)
+            center_x = (side[i] / (plane * z) + 1) * width / 2
+            floor_y = height / 2 + world.tile_size * height / (2 * z) # Sprites stand on the floor
+            first = max(0, int((center_x - sprite_w / 2) * columns / width))
+            last = min(columns, math.ceil((center_x + sprite_w / 2) * columns / width))
+            if first >= last:
+                continue
+            in_front = z < zbuffer[first:last]
+            # Runs of columns where the sprite is in front of the wall, as screen x ranges
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], in_front.view(np.int8), [0]))))
+            if not edges.size:
+                continue # Hidden behind walls
+            runs = [((first + start) * width // columns, (first + end) * width // columns)
+                    for start, end in zip(edges[::2].tolist(), edges[1::2].tolist())]
+
+            if sprite_w * sprite_h <= self.sprite_cache.max_pixels:
+                scaled = self.sprite_cache.scaled(sprite.texture, sprite_w, sprite_h)
+                left = round(center_x - scaled.get_width() / 2)
+                top = round(floor_y - scaled.get_height())
+            else:
+                # Too large to cache: scale just the part that is on screen and not hidden
+                bounds = pygame.Rect(round(center_x - sprite_w / 2), round(floor_y - sprite_h), round(sprite_w), round(sprite_h))
+                shown = pygame.Rect(runs[0][0], 0, runs[-1][1] - runs[0][0], height)
+                area = bounds.clip(shown).move(-bounds.left, -bounds.top)
+                if not area:
+                    continue
+                scaled, offset_x, offset_y = self.sprite_cache.scaled_part(sprite.texture, bounds.width, bounds.height, area)
+                left, top = bounds.left + offset_x, bounds.top + offset_y
+            image_w, image_h = scaled.get_size()
+            self.visible_sprites += 1
+            if len(runs) == 1 and runs[0][0] <= left and left + image_w <= runs[0][1]:
+                info.screen.blit(scaled, (left, top)) # Not hidden anywhere
+                continue
+            for x0, x1 in runs:
+                x0, x1 = max(left, x0), min(left + image_w, x1)
+                if x1 > x0:
+                    info.screen.blit(scaled, (x0, top), (x0 - left, 0, x1 - x0, image_h))
+
+    def draw_walls_rects(self, info: Information, raycasting_config: RaycastingConfig, world: World, distances: list[float]):
+        """Draws the walls with one pygame.draw.rect call per column (used when column_buffer is off)."""
+        count = len(distances)
         
         for i, dist in enumerate(distances):
             # Calculate the apparent height of the wall strip on screen
@@ -302,7 +2069,8 @@ class DrawConfig:
             shade = max(0, min(255, self.wall_end_shade - int(dist / raycasting_config.max_depth * self.wall_end_shade)))
             color = (shade, shade, shade) # Grayscale color based on shade
             
-            x = i * ray_width # X-coordinate of the current wall strip
+            x = i * info.size.width // count # X-coordinate of the current wall strip
+            ray_width = (i + 1) * info.size.width // count - x # Columns are stretched over the full screen width
             y = info.size.height // 2 - wall_h // 2 # Y-coordinate (centered vertically)
 
             # If the ray hit the max depth (meaning no wall was found within max_depth),
@@ -313,12 +2081,140 @@ class DrawConfig:
                 # Otherwise, draw the shaded wall strip
                 pygame.draw.rect(info.screen, color, (x, y, ray_width, wall_h))
 
+def map_colors(surface: pygame.Surface, rgb: np.ndarray) -> np.ndarray:
+    """
+    Vectorized Surface.map_rgb: converts an (..., 3) array of RGB values into the surface's
+    mapped pixel integers, as used by pygame.surfarray.blit_array with 2D arrays.
+    """
+    rgb = np.asarray(rgb, dtype=np.uint32)
+    shifts = surface.get_shifts()
+    losses = surface.get_losses()
+    mapped = ((rgb[..., 0] >> losses[0]) << shifts[0]) | ((rgb[..., 1] >> losses[1]) << shifts[1]) | ((rgb[..., 2] >> losses[2]) << shifts[2])
+    return mapped | np.uint32(surface.get_masks()[3]) # Fully opaque if the surface has an alpha channel
+
+class FrameTimer:
+    """
+    Collects per-stage timings for every rendered frame.
+    Each call to lap() records the milliseconds since the previous lap under a stage name.
+    """
+    def __init__(self):
+        self.frames: list[dict[str, float]] = [] # One {stage: milliseconds} entry per finished frame
+        self.current: dict[str, float] = {}      # Stages of the frame that is being rendered
+        self.last = 0.0                          # perf_counter() value of the previous lap
+
+    def begin_frame(self):
+        """Starts timing a new frame."""
+        self.current = {}
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str):
+        """Records the time since the previous lap (or the frame start) as `stage`."""
+        now = time.perf_counter()
+        self.current[stage] = self.current.get(stage, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        """Stores the finished frame, including its total time."""
+        self.current["total"] = sum(self.current.values())
+        self.frames.append(self.current)
+
+class Profiler(FrameTimer):
+    """
+    FrameTimer for the interactive game loop, behind the on-screen profiling overlay (toggled with F3)
+    and the --trace export. It keeps only a short history for the overlay, plus every frame while tracing.
+    main_loop passes no timer at all while the overlay is hidden and no trace is recorded,
+    so the instrumentation costs nothing then.
+    """
+    GRAPH_HEIGHT = 60 # Height of the frame-time graph in pixels
+    BAR_WIDTH = 2     # Width of one frame in the graph in pixels
+
+    def __init__(self, history: int = 120, tracing: bool = False):
+        super().__init__()
+        self.history: deque[dict[str, float]] = deque(maxlen=history) # Recent frames for the overlay
+        self.tracing = tracing  # Keep every frame for export_trace
+        self.trace: list[dict[str, float]] = []
+        self.overlay = False    # Draw the overlay on the screen
+        self.rays = 0           # Rays cast in the current frame, set by the caller
+        self.resolution = 100.0 # Effective resolution in percent of the screen width, set by the caller
+        self.cache_hit_rate: float | None = None # FrameCache hit rate, set by the caller if a cache is used
+        self.fps = 0.0          # Measured frames per second, set by the caller
+        self.started = time.perf_counter()
+        self.font: pygame.font.Font | None = None
+        self.text: pygame.Surface | None = None # Rendered overlay text, refreshed a few times per second
+        self.text_age = 0
+
+    def end_frame(self):
+        """Stores the finished frame in the history and, while tracing, in the trace."""
+        self.current["total"] = sum(self.current.values())
+        self.history.append(self.current)
+        if self.tracing:
+            self.trace.append({"frame": len(self.trace), "time": time.perf_counter() - self.started,
+                               "fps": self.fps, "rays": self.rays, "resolution": self.resolution,
+                               "cache_hit_rate": self.cache_hit_rate or 0.0, **self.current})
+
+    def averages(self) -> dict[str, float]:
+        """Returns the mean milliseconds per stage over the history."""
+        totals: dict[str, float] = {}
+        for frame in self.history:
+            for stage, ms in frame.items():
+                totals[stage] = totals.get(stage, 0.0) + ms
+        return {stage: ms / len(self.history) for stage, ms in totals.items()}
+
+    def draw_overlay(self, info: Information):
+        """Draws FPS, rays per second, per-stage milliseconds and a frame-time graph in the top left corner."""
+        if self.font is None:
+            self.font = get_font(16, "monospace")
+        self.text_age -= 1
+        if self.text is None or self.text_age <= 0:
+            # Re-rendering text every frame would cost more than most stages, so refresh it 4 times per second
+            lines = [f"FPS {self.fps:5.1f}  rays {self.rays} ({self.resolution:.0f}%)",
+                     f"rays/s {self.rays * self.fps / 1e6:.2f} M"]
+            if self.cache_hit_rate is not None:
+                lines.append(f"frame cache {self.cache_hit_rate:.0%} hits")
+            lines += [f"{stage:>8} {ms:6.2f} ms" for stage, ms in self.averages().items()]
+            rendered = [self.font.render(line, True, Colors.white) for line in lines]
+            width = max(self.history.maxlen * self.BAR_WIDTH, *(line.get_width() for line in rendered)) + 8
+            height = sum(line.get_height() for line in rendered) + self.GRAPH_HEIGHT + 12
+            self.text = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.text.fill((0, 0, 0, 170))
+            y = 4
+            for line in rendered:
+                self.text.blit(line, (4, y))
+                y += line.get_height()
+            self.text_age = max(1, info.fps // 4)
+        info.screen.blit(self.text, (0, 0))
+
+        # Frame-time graph: one bar per frame, the yellow line is the time budget of the target FPS
+        budget = 1000 / info.fps
+        bottom = self.text.get_height() - 4
+        scale = self.GRAPH_HEIGHT / (2 * budget)
+        for i, frame in enumerate(self.history):
+            height = min(self.GRAPH_HEIGHT, max(1, int(frame["total"] * scale)))
+            color = Colors.green if frame["total"] <= budget else (255, 60, 60)
+            pygame.draw.rect(info.screen, color, (4 + i * self.BAR_WIDTH, bottom - height, self.BAR_WIDTH, height))
+        budget_y = bottom - int(budget * scale)
+        pygame.draw.line(info.screen, Colors.yellow, (4, budget_y), (4 + self.history.maxlen * self.BAR_WIDTH, budget_y))
+
+    def export_trace(self, path: str):
+        """Writes the traced frames to `path`, as CSV if it ends in .csv and as JSON otherwise."""
+        stages = list(dict.fromkeys(key for frame in self.trace for key in frame)) # Every column, in first-seen order
+        with open(path, "w", newline="") as file:
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(file, fieldnames=stages, restval=0.0)
+                writer.writeheader()
+                writer.writerows(self.trace)
+            else:
+                json.dump({"columns": stages, "frames": self.trace}, file)
 
 # === CORE PYGAME INITIALIZATION ===
 
 def init_pygame() -> Information:
-    """Initializes Pygame modules and sets up the display. Returns core info."""
-    pygame.init()
+    """
+    Initializes the Pygame modules the game uses (display and font) and sets up the display. Returns core info.
+    pygame.init() would also start audio, joystick and other subsystems that are never used.
+    """
+    pygame.display.init()
+    pygame.font.init()
     # Set display mode to fullscreen. (0,0) tells Pygame to use current desktop resolution.
     screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
     info = pygame.display.Info() # Get information about the current display mode
@@ -329,192 +2225,219 @@ def init_pygame() -> Information:
     # Return an Information dataclass instance with all relevant setup data
     return Information(screen, info, clock, Size(WIDTH, HEIGHT))
 
+def init_headless(width: int, height: int) -> Information:
+    """
+    Initializes Pygame without a visible window: the SDL dummy video driver renders
+    into an offscreen surface of the given size. Used for benchmarks and automated runs.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((width, height))
+    info = pygame.display.Info()
+    clock = pygame.time.Clock()
+    return Information(screen, info, clock, Size(width, height))
+
 # === GENERAL UI / MENU FUNCTIONS ===
 
+# Font instances shared by all menus and overlays, keyed by (name, point size); created on first use
+_fonts: dict[tuple[str | None, int], pygame.font.Font] = {}
+# Rendered text surfaces keyed by (text, size, color), least recently used first
+_text_cache: OrderedDict[tuple[str, int, tuple[int, int, int]], pygame.Surface] = OrderedDict()
+TEXT_CACHE_SIZE = 256 # Enough for every menu line plus recent numeral_input states
+
+def get_font(size: int, name: str | None = None) -> pygame.font.Font:
+    """
+    Returns a shared font in the given size: Pygame's bundled default font, or the system font `name`.
+    The default font is loaded directly, which skips the slow system font discovery that
+    SysFont() runs on first use (SysFont(None, ...) ends up with the same font anyway).
+    """
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.Font(None, size) if name is None else pygame.font.SysFont(name, size)
+    return font
+
+def render_text(text: str, size: int, color: tuple[int, int, int]) -> pygame.Surface:
+    """Returns the rendered text surface, rendering it only the first time it is needed."""
+    key = (text, size, color)
+    surface = _text_cache.get(key)
+    if surface is None:
+        surface = _text_cache[key] = get_font(size).render(text, True, color)
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+    return surface
+
+@dataclass
+class MenuText:
+    """One line of a menu screen: centered horizontally (shifted by dx) at height y."""
+    text: str
+    y: int
+    size: int = 36
+    color: tuple[int, int, int] = Colors.white
+    dx: int = 0
+
+def draw_menu(info: Information, lines: list[MenuText]):
+    """Draws a menu screen from cached text surfaces and shows it."""
+    info.screen.fill(Colors.black)
+    for line in lines:
+        surface = render_text(line.text, line.size, line.color)
+        info.screen.blit(surface, (info.size.width // 2 - surface.get_width() // 2 + line.dx, line.y))
+    pygame.display.flip()
+
+def menu_events(info: Information, lines: list[MenuText]):
+    """
+    Shows a menu and yields its key presses. Blocks in pygame.event.wait() between events, so an
+    idle menu uses no CPU. The menu is redrawn only after a key press (the handler may have changed
+    `lines` or shown another screen in between) and when the window needs repainting.
+    Closing the window quits the game.
+    """
+    draw_menu(info, lines)
+    while True:
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        elif event.type == pygame.KEYDOWN:
+            yield event
+            draw_menu(info, lines)
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+            draw_menu(info, lines)
+
 def numeral_input(info: Information, prompt: str, legal_range_start: int, legal_range_end: int, error_msg: str = "Please enter a number.") -> int:
     """
     Handles numerical input from the user via the Pygame UI.
     Displays a prompt and accepts digit input until Enter is pressed.
     Ensures the input is within a specified range.
     """
-    font = pygame.font.SysFont(None, 72) # Font for input text
-    small_font = pygame.font.SysFont(None, 36) # Font for prompt text
-    
-    input_text = ""  # String to build the user's numerical input
+    prompt_line = MenuText(prompt, info.size.height // 4, 36, Colors.light_gray)
+    input_line = MenuText("", info.size.height // 3, 72) # Shows the user's numerical input (or an error)
     
-    while True: # Loop indefinitely until valid input or quit
-        info.screen.fill(Colors.black) # Clear the screen for redrawing
-        
-        # Render and blit the prompt text
-        prompt_text_surface = small_font.render(prompt, True, Colors.light_gray)
-        info.screen.blit(prompt_text_surface, (info.size.width // 2 - prompt_text_surface.get_width() // 2, info.size.height // 4))
-
-        # Render and blit the current user input text
-        input_text_surface = font.render(input_text, True, Colors.white)
-        info.screen.blit(input_text_surface, (info.size.width // 2 - input_text_surface.get_width() // 2, info.size.height // 3))
-
-        pygame.display.flip() # Update the entire display to show changes
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit() # Exit if user closes the window
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:  # User pressed Enter
-                    try:
-                        user_number = int(input_text)  # Attempt to convert input to integer
-                        if legal_range_start <= user_number <= legal_range_end:
-                            return user_number # Valid input, return it
-                        else:
-                            # Input out of range, update input_text to show error
-                            input_text = f"Number must be between {legal_range_start} and {legal_range_end}."
-                    except ValueError:
-                        # Input is not a valid number, show error message
-                        input_text = error_msg
-                elif event.key == pygame.K_BACKSPACE:  # User pressed Backspace
-                    input_text = input_text[:-1] # Remove the last character
+    for event in menu_events(info, [prompt_line, input_line]):
+        if event.key == pygame.K_RETURN:  # User pressed Enter
+            try:
+                user_number = int(input_line.text)  # Attempt to convert input to integer
+                if legal_range_start <= user_number <= legal_range_end:
+                    return user_number # Valid input, return it
                 else:
-                    if event.unicode.isdigit():  # Only append digits to the input string
-                        input_text += event.unicode
+                    # Input out of range, show the error in place of the input
+                    input_line.text = f"Number must be between {legal_range_start} and {legal_range_end}."
+            except ValueError:
+                # Input is not a valid number, show error message
+                input_line.text = error_msg
+        elif event.key == pygame.K_BACKSPACE:  # User pressed Backspace
+            input_line.text = input_line.text[:-1] # Remove the last character
+        elif event.unicode.isdigit():  # Only append digits to the input string
+            input_line.text += event.unicode
 
 def menu(info: Information):
     """
     Displays the in-game pause menu with options to return to game or quit.
     Called when ESC is pressed during gameplay.
     """
-    font = pygame.font.SysFont(None, 72)
-    small_font = pygame.font.SysFont(None, 36)
-    running = True
-
-    while running:
-        info.screen.fill(Colors.black) # Clear screen for menu drawing
-        title_text = font.render("Enti 3D", True, Colors.light_gray)
-        
-        # Options text
-        return_text = small_font.render("Press [S] to return", True, Colors.white)
-        quit_text = small_font.render("Press [Q] to quit", True, Colors.white)
-
-        # Blit all text surfaces to the screen
-        info.screen.blit(title_text, (info.size.width // 2 - title_text.get_width() // 2, info.size.height // 3))
-        info.screen.blit(return_text, (info.size.width // 2 - return_text.get_width() // 2, info.size.height // 2))
-        info.screen.blit(quit_text, (info.size.width // 2 - quit_text.get_width() // 2, info.size.height // 2 + 50))
-
-        pygame.display.flip() # Update display
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit() # Quit game if window is closed
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_s:
-                    running = False  # Exit menu loop, return to game
-                elif event.key == pygame.K_q:
-                    pygame.quit()
-                    sys.exit() # Quit game immediately
+    lines = [
+        MenuText("Enti 3D", info.size.height // 3, 72, Colors.light_gray),
+        MenuText("Press [S] to return", info.size.height // 2),
+        MenuText("Press [Q] to quit", info.size.height // 2 + 50),
+    ]
+    for event in menu_events(info, lines):
+        if event.key == pygame.K_s:
+            return  # Return to game
+        elif event.key == pygame.K_q:
+            pygame.quit()
+            sys.exit() # Quit game immediately
 
 def display_error_message(info: Information, message: str):
     """
     Displays a temporary error message on the screen and waits for any key press to dismiss it.
     Used for feedback when map files are not found.
     """
-    small_font = pygame.font.SysFont(None, 36)
-    while True:
-        info.screen.fill(Colors.black) # Clear screen
-        error_text_surface = small_font.render(message, True, Colors.white)
-        info.screen.blit(error_text_surface, (info.size.width // 2 - error_text_surface.get_width() // 2, info.size.height // 3))
-        pygame.display.flip() # Update display
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                return # Exit error message on any key press
+    for _ in menu_events(info, [MenuText(message, info.size.height // 3)]):
+        return # Exit error message on any key press
 
-def map_selection_menu(info: Information) -> list[list[int]] | None:
+def map_selection_menu(info: Information) -> list[list[int]] | World | None:
     """
-    Presents a menu for selecting between a custom 'maze.py' map or a generated map.
-    Returns the selected game map (list of lists) or None if the user cancels.
+    Presents a menu for selecting between a custom map ('maze.rcmap' or 'maze.py'), a generated map or an endless maze.
+    Returns the selected game map (list of lists, or a ready World for binary and endless maps) or None if the user cancels.
     """
-    font = pygame.font.SysFont(None, 72)
-    small_font = pygame.font.SysFont(None, 36)
-    
-    while True: # Loop until a map is chosen or user returns
-        info.screen.fill(Colors.black) # Clear screen for menu
-        title_text = font.render("Maze Switcher", True, Colors.white)
-        
-        # Options text
-        own_map_text = small_font.render("Press [O] for own map", True, Colors.white)
-        generated_map_text = small_font.render("Press [G] for generated maze", True, Colors.white)
-        return_to_last_menu_text = small_font.render("Press [R] or [ESC] to return", True, Colors.white)
-        
-        # Blit options to screen
-        info.screen.blit(title_text, (info.size.width // 2 - title_text.get_width() // 2, info.size.height // 3))
-        info.screen.blit(own_map_text, (info.size.width // 2 - own_map_text.get_width() // 2, info.size.height // 2))
-        info.screen.blit(generated_map_text, (info.size.width // 2 - generated_map_text.get_width() // 2, info.size.height // 2 + 50))
-        info.screen.blit(return_to_last_menu_text, (info.size.width // 2 - return_to_last_menu_text.get_width() // 2, info.size.height // 2 + 100))
-        
-        pygame.display.flip() # Update display
+    lines = [
+        MenuText("Maze Switcher", info.size.height // 3, 72),
+        MenuText("Press [O] for own map", info.size.height // 2),
+        MenuText("Press [G] for generated maze", info.size.height // 2 + 50),
+        MenuText("Press [E] for endless maze", info.size.height // 2 + 100),
+        MenuText("Press [R] or [ESC] to return", info.size.height // 2 + 150),
+    ]
+    for event in menu_events(info, lines):
+        if event.key == pygame.K_o or event.key == pygame.K_0:
+            # Prefer the binary map: it is memory-mapped instead of imported as Python code
+            binary_map_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maze.rcmap")
+            if os.path.exists(binary_map_path):
+                try:
+                    import mapformat
+                    return World.from_map_file(mapformat.load_map(binary_map_path)) # Return the mapped world
+                except (ImportError, OSError, ValueError) as error:
+                    display_error_message(info, f"Could not load 'maze.rcmap': {error}. Press any key to return.")
+                continue
+            try:
+                import maze # type: ignore # Attempt to import custom maze file
+                return maze.game_map # Return the loaded map
+            except ImportError:
+                display_error_message(info, "The file 'maze.py' was not found. Press any key to return.")
+        elif event.key == pygame.K_g:
+            try:
+                import mazegenerator as mg # Attempt to import maze generator
+                # Get maze size from user via input UI
+                maze_size = numeral_input(info, "Please enter the maze size (1-1000):", legal_range_start = 1, legal_range_end = 1000)
+                return mg.generateMaze(maze_size) # Return the generated map
+            except ImportError:
+                display_error_message(info, "The file 'mazegenerator.py' was not found. Press any key to return.")
+        elif event.key == pygame.K_e:
+            try:
+                return ChunkedWorld(64, seed=int(time.time())) # Chunks are generated while walking
+            except ImportError:
+                display_error_message(info, "The file 'mazegenerator.py' was not found. Press any key to return.")
+        elif event.key == pygame.K_r or event.key == pygame.K_ESCAPE:
+            return None # User chose to return without selecting a map
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_o or event.key == pygame.K_0:
-                    try:
-                        import maze # type: ignore # Attempt to import custom maze file
-                        return maze.game_map # Return the loaded map
-                    except ImportError:
-                        display_error_message(info, "The file 'maze.py' was not found. Press any key to return.")
-                elif event.key == pygame.K_g:
-                    try:
-                        import mazegenerator as mg # Attempt to import maze generator
-                        # Get maze size from user via input UI
-                        maze_size = numeral_input(info, "Please enter the maze size (1-100):", legal_range_start = 1, legal_range_end = 100)
-                        return mg.getMaze(maze_size) # Return the generated map
-                    except ImportError:
-                        display_error_message(info, "The file 'mazegenerator.py' was not found. Press any key to return.")
-                elif event.key == pygame.K_r or event.key == pygame.K_ESCAPE:
-                    return None # User chose to return without selecting a map
-
-def start_game_menu(info: Information) -> list[list[int]]:
+def start_game_menu(info: Information) -> list[list[int]] | World:
     """
     Displays the initial game start menu. Allows the user to enter the map selection
     menu or quit the game. Returns the final chosen game map.
     """
-    font = pygame.font.SysFont(None, 72)
-    small_font = pygame.font.SysFont(None, 36)
-    
-    while True: # Loop until game starts or quits
-        info.screen.fill(Colors.black) # Clear screen for menu
-        title_text = font.render("Enti 3D", True, Colors.light_gray)
-        
-        # Options text
-        start_text = small_font.render("Press [S] to enter Map Menu", True, Colors.white)
-        quit_text = small_font.render("Press [Q] to quit", True, Colors.white)
+    lines = [
+        MenuText("Enti 3D", info.size.height // 3, 72, Colors.light_gray),
+        MenuText("Press [S] to enter Map Menu", info.size.height // 2),
+        MenuText("Press [Q] to quit", info.size.height // 2 + 50),
+    ]
+    for event in menu_events(info, lines):
+        if event.key == pygame.K_s:
+            chosen_map = map_selection_menu(info) # Go to map selection
+            if chosen_map is not None:
+                return chosen_map # A map was successfully chosen, return it to start the game
+        elif event.key == pygame.K_q:
+            pygame.quit()
+            sys.exit() # User chose to quit
 
-        # Blit options to screen
-        info.screen.blit(title_text, (info.size.width // 2 - title_text.get_width() // 2, info.size.height // 3))
-        info.screen.blit(start_text, (info.size.width // 2 - start_text.get_width() // 2, info.size.height // 2))
-        info.screen.blit(quit_text, (info.size.width // 2 - quit_text.get_width() // 2, info.size.height // 2 + 50))
-
-        pygame.display.flip() # Update display
+# === GAME COMPONENT SETUP FUNCTIONS ===
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_s:
-                    chosen_map = map_selection_menu(info) # Go to map selection
-                    if chosen_map is not None:
-                        return chosen_map # A map was successfully chosen, return it to start the game
-                elif event.key == pygame.K_q:
-                    pygame.quit()
-                    sys.exit() # User chose to quit
+# Height of the built-in sprites (see make_sprites) relative to a wall, and the collision radius
+# of the solid ones in tiles (coins can be walked through)
+SPRITE_SCALES = {1: 0.4, 2: 0.8, 3: 1.0}
+SPRITE_RADII = {2: 0.2, 3: 0.15}
 
-# === GAME COMPONENT SETUP FUNCTIONS ===
+def scatter_sprites(world: World, count: int, seed: int | None = None):
+    """Places `count` built-in sprites in the centers of random walkable tiles (several may share a tile)."""
+    free = np.argwhere(world.grid == 0)
+    if not count or not free.size:
+        return
+    rng = np.random.default_rng(seed)
+    tiles = free[rng.integers(0, len(free), count)]
+    textures = rng.integers(1, len(SPRITE_SCALES) + 1, count)
+    for (ty, tx), texture in zip(tiles.tolist(), textures.tolist()):
+        world.sprites.insert(Sprite((tx + 0.5) * world.tile_size, (ty + 0.5) * world.tile_size,
+                                    texture, SPRITE_SCALES[texture], SPRITE_RADII.get(texture, 0.0) * world.tile_size))
 
 def setup_player(world: World) -> Player:
     """Creates and initializes the player object with a spawn point on the map."""
@@ -522,79 +2445,75 @@ def setup_player(world: World) -> Player:
     new_player.find_spawn_point(world) # Find actual spawn point on the map
     return new_player
 
+# Smallest tile size in pixels for showing the whole map, and the starting zoom of the player-centered window
+MINIMAP_MIN_TILE = 3
+MINIMAP_FOLLOW_TILE = 4
+
 def setup_minimap(info: Information, world: World) -> Minimap:
     """
     Configures and creates the minimap object.
-    Calculates minimap dimensions and pre-renders its static background.
+    Small maps are shown whole; maps too big for MINIMAP_MIN_TILE pixels per tile get a
+    window around the player instead. Pre-renders the map images.
     """
     minimap_size_base = info.size.min // 4 # Base size relative to smallest screen dimension
     
     # Calculate tile size for the minimap, ensuring it fits the largest map dimension
     minimap_tile_size = minimap_size_base // max(world.size.width, world.size.height)
     
-    # Adjust minimap size if the map is very large
-    # This logic aims to make the minimap larger for big maps (original code used world.size.min > 30)
-    if world.size.min > 30: 
-        minimap_size_base *= 2 # Scale up the base size
-        
-    # Final dimensions of the minimap surface
-    minimap_width = minimap_tile_size * world.size.width
-    minimap_height = minimap_tile_size * world.size.height
-
-    # Create the Minimap instance
-    minimap = Minimap(Size(minimap_width, minimap_height), minimap_tile_size)
-    minimap.create_minimap_surface(world) # Pre-render the static map background
+    if minimap_tile_size >= MINIMAP_MIN_TILE:
+        # Final dimensions of the minimap surface
+        minimap_width = minimap_tile_size * world.size.width
+        minimap_height = minimap_tile_size * world.size.height
+        minimap = Minimap(Size(minimap_width, minimap_height), minimap_tile_size)
+    else:
+        # The map does not fit: show a square window around the player, twice as large for big maps
+        if world.size.min > 30:
+            minimap_size_base = min(minimap_size_base * 2, info.size.min // 2)
+        minimap = Minimap(Size(minimap_size_base, minimap_size_base), MINIMAP_FOLLOW_TILE, follow=True)
+    minimap.create_minimap_surface(world) # Pre-render the map images
     return minimap
 
-def setup_resolution_menu(info: Information) -> int:
+# Returned by setup_resolution_menu when the resolution should adapt to the frame rate
+ADAPTIVE_RESOLUTION = 0
+
+def setup_resolution_menu(info: Information) -> int | None:
     """
     Sets up the rendering resolution, which affects the number of rays cast.
+    Returns a percentage, ADAPTIVE_RESOLUTION for dynamic resolution (see ResolutionController),
+    or None if the user goes back.
     """
-    font = pygame.font.SysFont(None, 72)
-    small_font = pygame.font.SysFont(None, 36)
-    
-    res = 100
-    
-    while True: # Loop until a map is chosen or user returns
-        info.screen.fill(Colors.black) # Clear screen for menu
-        title_text = font.render("Display Resolution", True, Colors.white)
-        
-        # Options text
-        ten_text = small_font.render("Press [1] for 10%", True, Colors.white)
-        fifty_text = small_font.render("Press [5] for 50%", True, Colors.white)
-        full_text = small_font.render("Press [0] for 100%", True, Colors.white)
-        custom_text = small_font.render("Or press [C] for custom", True, Colors.white)
-        return_to_last_menu_text = small_font.render("Press [R] or [ESC] to return", True, Colors.white)
-        
-        # Blit options to screen
-        info.screen.blit(title_text, (info.size.width // 2 - title_text.get_width() // 2, info.size.height // 3))
-        info.screen.blit(ten_text, (info.size.width // 2 - ten_text.get_width() // 2, info.size.height // 2))
-        info.screen.blit(fifty_text, (info.size.width // 2 - fifty_text.get_width() // 2, info.size.height // 2 + 50))
-        info.screen.blit(full_text, (info.size.width // 2 - full_text.get_width() // 2, info.size.height // 2 + 100))
-        info.screen.blit(custom_text, (info.size.width // 2 - custom_text.get_width() // 2 + 150, info.size.height // 2 + 200))
-        info.screen.blit(return_to_last_menu_text, (info.size.width // 2 - return_to_last_menu_text.get_width() // 2, info.size.height // 2 + 250))
-        
-        pygame.display.flip() # Update display
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_o or event.key == pygame.K_1:
-                    return 10
-                elif event.key == pygame.K_5:
-                    return 50
-                elif event.key == pygame.K_5:
-                    return 50
-                elif event.key == pygame.K_c:
-                    return numeral_input(info, "Enter a custom resolution percentage (1-100):", legal_range_start=1, legal_range_end=100)
-                elif event.key == pygame.K_r or event.key == pygame.K_ESCAPE:
-                    break;
+    lines = [
+        MenuText("Display Resolution", info.size.height // 3, 72),
+        MenuText("Press [1] for 10%", info.size.height // 2),
+        MenuText("Press [5] for 50%", info.size.height // 2 + 50),
+        MenuText("Press [0] for 100%", info.size.height // 2 + 100),
+        MenuText("Press [A] for adaptive (holds the frame rate)", info.size.height // 2 + 150),
+        MenuText("Or press [C] for custom", info.size.height // 2 + 200, dx=150),
+        MenuText("Press [R] or [ESC] to return", info.size.height // 2 + 250),
+    ]
+    for event in menu_events(info, lines):
+        if event.key == pygame.K_o or event.key == pygame.K_1:
+            return 10
+        elif event.key == pygame.K_5:
+            return 50
+        elif event.key == pygame.K_0:
+            return 100
+        elif event.key == pygame.K_a:
+            return ADAPTIVE_RESOLUTION
+        elif event.key == pygame.K_c:
+            return numeral_input(info, "Enter a custom resolution percentage (1-100):", legal_range_start=1, legal_range_end=100)
+        elif event.key == pygame.K_r or event.key == pygame.K_ESCAPE:
+            return None # User chose to return to the start menu
     # This value determines the detail of the 3D scene (higher = more rays = more detail)
 
-def setup_raycasting(info: Information, world: World, res: int) -> RaycastingConfig:
-    """Creates and configures the raycasting parameters based on world and resolution."""
+def setup_raycasting(info: Information, world: World, res: int, engine: str = "dda", frame_cache: bool = False) -> RaycastingConfig:
+    """
+    Creates and configures the raycasting parameters based on world and resolution.
+    The engine selects the cast algorithm ("dda" for tile stepping, "numpy" for vectorized
+    tile stepping of all rays at once, "parallel" for the vectorized caster spread over
+    several workers, "march" for the original pixel marcher).
+    With frame_cache, unchanged and purely rotated frames reuse earlier casts (see FrameCache).
+    """
     fov = math.pi / 2.8 # Field of View (e.g., ~64 degrees)
     num_rays = int(info.size.width * res / 100) # Number of rays directly scales with screen width and resolution
     tile_depth = world.tile_size / 1.2 # Base depth derived from tile size
@@ -607,66 +2526,291 @@ def setup_raycasting(info: Information, world: World, res: int) -> RaycastingCon
         max_depth = tile_depth * 10
     
     # Return the configured RaycastingConfig object
-    return RaycastingConfig(fov, num_rays, max_depth)
+    return RaycastingConfig(fov, num_rays, max_depth, engine, frame_cache=FrameCache() if frame_cache else None)
+
+# === RENDERING ===
+
+def render_frame(info: Information, world: World, player: Player, raycasting_config: RaycastingConfig,
+                 minimap: Minimap, draw_config: DrawConfig, timer: FrameTimer | None = None):
+    """
+    Renders one frame from the player's current position and shows it.
+    If a timer is given, the cast, floor, walls, sprites, minimap and flip stages are timed separately;
+    the caller begins and ends the timer's frame. A Profiler with its overlay enabled is drawn before the flip.
+    With a FrameCache on the raycasting config, unchanged frames skip the cast and the 3D view is kept.
+    """
+    overlay = isinstance(timer, Profiler) and timer.overlay
+    frame_cache = raycasting_config.frame_cache
+
+    # Perform raycasting to get distances to walls from the player's perspective
+    if frame_cache is not None:
+        hits, keep_view = frame_cache.cast(info, raycasting_config, player, world)
+    else:
+        hits, keep_view = raycasting_config.cast(info, player, world), False
+    if timer is not None:
+        timer.lap("cast")
+
+    if keep_view and draw_config.sprite_key != (id(world.sprites), world.sprites.version):
+        keep_view = False # Sprites moved since the kept view was drawn
+    if not keep_view:
+        draw_config.draw_background(info) # Draw ceiling and floor (this also clears the previous frame)
+    if timer is not None:
+        timer.lap("floor")
+
+    if not keep_view:
+        draw_config.draw_walls(info, raycasting_config, world, hits.distances, hits) # Draw the 3D first-person view of the walls
+    if timer is not None:
+        timer.lap("walls")
+
+    if not keep_view:
+        draw_config.draw_sprites(info, raycasting_config, world, player, hits.distances) # Billboards, hidden by nearer walls
+        if frame_cache is not None:
+            frame_cache.view_valid = True
+    if timer is not None:
+        timer.lap("sprites")
+
+    minimap.draw_minimap(info, player, world) # Draw the map part of the minimap
+    minimap.draw_player_on_minimap(info, player, world) # Draw the dynamic player icon on the minimap
+    if timer is not None:
+        timer.lap("minimap")
+        if overlay:
+            timer.draw_overlay(info)
+            if frame_cache is not None:
+                frame_cache.view_valid = False # The translucent overlay would stack up on a kept view
+            timer.lap("overlay")
+
+    pygame.display.flip() # Update the entire screen to show the rendered frame
+    if timer is not None:
+        timer.lap("flip")
 
 # === MAIN GAME LOOP ===
 
-def main_loop(info: Information, world: World, player: Player, raycasting_config: RaycastingConfig, minimap: Minimap, draw_config: DrawConfig):
+def main_loop(info: Information, world: World, player: Player, raycasting_config: RaycastingConfig, minimap: Minimap,
+              draw_config: DrawConfig, trace_path: str | None = None, profile: bool = False,
+              resolution_controller: ResolutionController | None = None, recorder=None):
     """
     The main game loop, responsible for handling events, updating game state,
     and rendering the scene each frame.
+    F3 toggles the profiling overlay, + and - zoom the minimap. With a trace_path every frame's stage timings are recorded
+    and written there (CSV or JSON) when the game ends.
+    With a resolution_controller the number of rays is adapted every frame to hold info.fps.
+    With a recorder (an inputlog.InputRecorder) the controls of every frame are recorded (see start_recording).
     """
     running = True # Flag to control the game loop
     clock = info.clock # Pygame clock for frame rate control
+    profiler = Profiler(tracing=True) if trace_path else None # Only exists while it is needed
+    if profile:
+        profiler = profiler or Profiler()
+        profiler.overlay = True
 
     while running:
         # Event handling loop
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False # Set flag to exit game loop if window is closed
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE) and raycasting_config.frame_cache is not None:
+                raycasting_config.frame_cache.invalidate_view() # The window contents may have been lost
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     menu(info) # Call the pause menu when ESC is pressed
+                    if raycasting_config.frame_cache is not None:
+                        raycasting_config.frame_cache.invalidate_view() # The menu drew over the 3D view
+                elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                    minimap.zoom(1) # Zoom the minimap in (only on maps that do not fit whole)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    minimap.zoom(-1)
+                elif event.key == pygame.K_F3:
+                    profiler = profiler or Profiler()
+                    profiler.overlay = not profiler.overlay
+                    if not profiler.overlay and not profiler.tracing:
+                        profiler = None # Nothing left to measure for: drop the timers entirely
 
-        player.move(info, world)  # Update player's position and angle based on input
-
-        # Perform raycasting to get distances to walls from the player's perspective
-        distances = raycasting_config.cast_rays(info, player, world)
+        frame_start = time.perf_counter()
+        if profiler is not None:
+            profiler.begin_frame()
+            profiler.rays = raycasting_config.num_rays
+            profiler.resolution = raycasting_config.num_rays / info.size.width * 100
+            profiler.fps = clock.get_fps()
+            if raycasting_config.frame_cache is not None:
+                profiler.cache_hit_rate = raycasting_config.frame_cache.stats()["hit_rate"]
 
-        # === RENDERING ===
-        info.screen.fill(Colors.black)  # Clear the entire screen (can be optimized if draw_walls fills it completely)
-        draw_config.draw_walls(info, raycasting_config, world, distances) # Draw the 3D first-person view of walls and floor
-        minimap.draw_minimap(info) # Draw the static minimap background
-        minimap.draw_player_on_minimap(info, player, world) # Draw the dynamic player icon on the minimap
+        controls = Controls.from_keys(pygame.key.get_pressed())
+        if recorder is not None:
+            recorder.append(controls.to_bits())
+        player.move(info, world, controls)  # Update player's position and angle based on input
+        if world.update(player): # Endless worlds move their tiles (and the player) when the player walks on
+            minimap.create_minimap_surface(world)
+        if profiler is not None:
+            profiler.lap("move")
 
-        pygame.display.flip() # Update the entire screen to show the rendered frame
+        render_frame(info, world, player, raycasting_config, minimap, draw_config, profiler) # Cast, draw and show the frame
+        if profiler is not None:
+            profiler.end_frame()
+        if resolution_controller is not None:
+            # Only the work counts, not the time clock.tick() sleeps afterwards
+            resolution_controller.update(raycasting_config, (time.perf_counter() - frame_start) * 1000)
         clock.tick(info.fps)  # Control the frame rate to target FPS
 
+    if profiler is not None and profiler.tracing:
+        profiler.export_trace(trace_path)
+        print(f"Wrote {len(profiler.trace)} frames to {trace_path}")
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.frames} frames to {recorder.path}")
+    raycasting_config.close() # Stop cast worker pools, if any
+    world.close() # Stop chunk prefetching, if any
     pygame.quit() # Uninitialize Pygame modules
     sys.exit() # Exit the application
 
+# === HEADLESS MODE ===
+
+def run_headless(game_map: list[list[int]] | World, res: int, camera_path, size: tuple[int, int] = (1920, 1080),
+                 tile_size: int = 64, engine: str = "numpy", timer: FrameTimer | None = None,
+                 draw_config: DrawConfig | None = None,
+                 resolution_controller: ResolutionController | None = None,
+                 frame_cache: FrameCache | None = None, sprites: int = 0, pvs: bool = False,
+                 after_frame=None) -> Information:
+    """
+    Renders the given map (or World, e.g. one from replay_recording) without a window, one frame per camera position.
+    camera_path is an iterable of (x, y, angle) tuples in world pixels / radians.
+    A DrawConfig can be passed in to change the drawing settings or read its counters afterwards.
+    With a resolution_controller the number of rays adapts to hold its target FPS, starting at `res`.
+    A FrameCache can be passed in to reuse casts between frames and read its stats afterwards.
+    With sprites > 0 that many built-in sprites are scattered over the map (always the same ones).
+    With pvs, the map's potentially visible sets are loaded (or built) first and used to skip hidden sprites.
+    after_frame is called with the Information after every frame, outside the timed part (e.g. to hash the frame).
+    Returns the Information object so the caller can inspect the last rendered frame.
+    """
+    info = init_headless(*size)
+    world = game_map if isinstance(game_map, World) else World(game_map, tile_size)
+    scatter_sprites(world, sprites, seed=0)
+    player = setup_player(world)
+    minimap = setup_minimap(info, world)
+    raycasting_config = setup_raycasting(info, world, res, engine)
+    raycasting_config.frame_cache = frame_cache
+    if pvs:
+        import pvs as pvs_module
+        world.pvs = pvs_module.load_or_build(world, max_distance=raycasting_config.max_depth / world.tile_size + 1)
+    if draw_config is None:
+        draw_config = DrawConfig()
+
+    try:
+        for player.x, player.y, player.angle in camera_path:
+            frame_start = time.perf_counter()
+            if timer is not None:
+                timer.begin_frame()
+            render_frame(info, world, player, raycasting_config, minimap, draw_config, timer)
+            if timer is not None:
+                timer.end_frame()
+            if resolution_controller is not None:
+                resolution_controller.update(raycasting_config, (time.perf_counter() - frame_start) * 1000)
+            if after_frame is not None:
+                after_frame(info)
+    finally:
+        raycasting_config.close()
+    return info
+
+def start_recording(path: str, info: Information, world: World, player: Player, sprites: int = 0):
+    """
+    Starts an input recording of the game about to be played (see inputlog.py): stores the map,
+    the player's starting state and the screen size, and returns the recorder for main_loop.
+    The sprites must have been scattered with seed 0, so a replay can place the same ones.
+    """
+    import inputlog
+    if isinstance(world, ChunkedWorld):
+        raise ValueError("Endless worlds cannot be recorded: their tiles are generated while walking.")
+    recording = inputlog.Recording(np.array(world.grid), world.tile_size, (player.x, player.y, player.angle),
+                                   player.move_speed, player.rot_speed, player.radius,
+                                   (info.size.width, info.size.height), sprites, dict(world.palette))
+    return inputlog.InputRecorder(path, recording)
+
+def replay_recording(recording) -> tuple[World, list[tuple[float, float, float]]]:
+    """
+    Plays an inputlog.Recording back without rendering: returns its world (with the recorded sprites)
+    and the camera position of every frame, to be rendered by run_headless as fast as possible.
+    Nothing depends on time, so the same recording always gives exactly the same path.
+    """
+    world = World(recording.tiles, recording.tile_size)
+    world.palette = dict(recording.palette)
+    scatter_sprites(world, recording.sprites, seed=0) # They block the player, so they are needed to walk the same way
+    player = Player(*recording.start, recording.move_speed, recording.rot_speed, recording.radius)
+    path = []
+    for bits in recording.frames:
+        player.move(None, world, Controls.from_bits(bits))
+        path.append((player.x, player.y, player.angle))
+    return world, path
+
 # === APPLICATION ENTRY POINT ===
 if __name__ == "__main__":
+    # 0. Parse command line options, e.g. `python main.py --engine dda`
+    parser = argparse.ArgumentParser(description="Enti 3D raycaster")
+    parser.add_argument("--engine", choices=list(CAST_ENGINES), default="numpy",
+                        help="Ray cast engine to use (default: numpy)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker count for the parallel engine (default: CPU count)")
+    parser.add_argument("--parallel-mode", choices=["process", "thread"], default="process",
+                        help="Worker pool type for the parallel engine (default: process)")
+    parser.add_argument("--no-frame-cache", action="store_true",
+                        help="Cast and draw every frame from scratch, even when the view did not change")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Adapt the resolution every frame to hold the target frame rate")
+    parser.add_argument("--profile", action="store_true",
+                        help="Start with the profiling overlay shown (toggle in game with F3)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record per-frame stage timings and write them to PATH on exit (.csv or .json)")
+    parser.add_argument("--sprites", type=int, default=0, metavar="N",
+                        help="Scatter N sprites (coins, NPCs, lamps) over the map")
+    parser.add_argument("--pvs", action="store_true",
+                        help="Precompute which tiles can see each other (cached in pvs_cache/) and skip hidden sprites")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Record the controls of every frame to PATH, for 'benchmark.py replay'")
+    args = parser.parse_args()
+    
     # 1. Initialize Pygame and gather essential display information
     information = init_pygame()
     
-    # 2. Display the initial start menu and get the chosen game map from the user.
-    # This function handles quitting the application if the user chooses to.
-    chosen_game_map = start_game_menu(information) 
+    # 2. Display the initial start menu and get the chosen game map and rendering quality from the user.
+    # This function handles quitting the application if the user chooses to; going back from the
+    # resolution menu shows the start menu again.
+    resolution = None
+    while resolution is None:
+        chosen_game_map = start_game_menu(information)
+        resolution = setup_resolution_menu(information) # Get rendering quality setting
+        if resolution is None and isinstance(chosen_game_map, World):
+            chosen_game_map.close() # An endless maze stops prefetching chunks
     
     # 3. Define the constant tile size (in pixels)
     TILE_SIZE = 64 
     
-    # 4. Create the World object, encapsulating the game map and tile size
-    world = World(chosen_game_map, TILE_SIZE)
+    # 4. Create the World object, encapsulating the game map and tile size (binary maps arrive as a World already)
+    world = chosen_game_map if isinstance(chosen_game_map, World) else World(chosen_game_map, TILE_SIZE)
+    scatter_sprites(world, args.sprites, seed=0 if args.record else None) # A replay needs the same sprites
 
     # 5. Set up other core game components based on the chosen map and display info
-    resolution = setup_resolution_menu(information)          # Get rendering quality setting
+    resolution_controller = None
+    if args.adaptive or resolution == ADAPTIVE_RESOLUTION:
+        # Start at full resolution and let the controller lower it if the frame rate cannot be held
+        resolution_controller = ResolutionController(information.size.width, information.fps)
+        resolution = resolution or 100
     player = setup_player(world)                        # Initialize player, finding a spawn point on the map
     minimap = setup_minimap(information, world)         # Configure and create the minimap
-    raycasting_config = setup_raycasting(information, world, resolution) # Set up raycasting parameters
+    raycasting_config = setup_raycasting(information, world, resolution, args.engine, # Set up raycasting parameters
+                                         frame_cache=not args.no_frame_cache)
+    raycasting_config.workers = args.workers
+    raycasting_config.parallel_mode = args.parallel_mode
+    if args.pvs and not isinstance(world, ChunkedWorld): # A streamed window changes as the player walks
+        import pvs
+        # One tile beyond the view distance, since the player can stand anywhere in their tile
+        world.pvs = pvs.load_or_build(world, max_distance=raycasting_config.max_depth / world.tile_size + 1,
+                                      workers=args.workers)
     draw_config = DrawConfig()                          # Initialize drawing configurations (colors, shading)
+    recorder = None
+    if args.record:
+        try:
+            recorder = start_recording(args.record, information, world, player, args.sprites)
+        except (OSError, ValueError) as error:
+            print(f"Warning: not recording: {error}")
 
     # 6. Start the main game loop, passing all configured game objects
-    main_loop(information, world, player, raycasting_config, minimap, draw_config)
+    main_loop(information, world, player, raycasting_config, minimap, draw_config, args.trace, args.profile,
+              resolution_controller, recorder)
 
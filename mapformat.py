@@ -0,0 +1,206 @@
+"""
+Binary map format (.rcmap) for the raycaster.
+
+A map file is a small header followed by the raw tile grid, one byte per tile:
+
+    offset  size  field
+    0       4     magic b"RCMP"
+    4       2     format version (1)
+    6       2     grid offset (header size incl. palette, padded to 16 bytes)
+    8       4     width in tiles
+    12      4     height in tiles
+    16      2     tile size in pixels
+    18      2     palette entry count
+    20      4     spawn x in tiles (-1 = automatic)
+    24      4     spawn y in tiles (-1 = automatic)
+    28      4*n   palette entries: map value, red, green, blue (one byte each)
+    offset  ...   (height + 2) * (width + 2) tile bytes, row by row
+
+The grid is stored with the solid one-tile border that World uses internally (see main.World),
+so a file can be memory-mapped and used as the World's tile storage without copying.
+All numbers are little-endian.
+
+Usage:
+    python mapformat.py convert maze.py maze.rcmap
+    python mapformat.py convert game_maps.md maps/
+    python mapformat.py info maze.rcmap
+"""
+from dataclasses import dataclass, field
+import argparse
+import ast
+import mmap
+import os
+import re
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"RCMP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIHHii") # Fixed part of the header, followed by the palette
+PALETTE_ENTRY = struct.Struct("<BBBB")
+
+
+@dataclass
+class MapFile:
+    """A loaded map file: dimensions, settings and the padded tile bytes."""
+    width: int
+    height: int
+    tile_size: int
+    cells: memoryview | bytearray # (height + 2) * (width + 2) tile bytes including the border
+    spawn: tuple[int, int] | None = None # Spawn tile, or None to let the game pick one
+    palette: dict[int, tuple[int, int, int]] = field(default_factory=dict) # Map value -> RGB color
+
+
+def grid_offset(palette_count: int) -> int:
+    """Returns where the tile grid starts for a header with palette_count entries (16-byte aligned)."""
+    size = HEADER.size + palette_count * PALETTE_ENTRY.size
+    return (size + 15) // 16 * 16
+
+
+def save_map(path: str, game_map, tile_size: int = 64, spawn: tuple[int, int] | None = None,
+             palette: dict[int, tuple[int, int, int]] | None = None):
+    """Writes a game map (list of lists or 2D array of tile values 0-255) as a .rcmap file."""
+    tiles = np.asarray(game_map, dtype=np.uint8)
+    height, width = tiles.shape
+    save_rows(path, width, height, (row.tobytes() for row in tiles), tile_size, spawn, palette)
+
+
+def save_rows(path: str, width: int, height: int, rows, tile_size: int = 64, spawn: tuple[int, int] | None = None,
+              palette: dict[int, tuple[int, int, int]] | None = None):
+    """
+    Writes a .rcmap file from an iterable of `height` rows of `width` tile bytes each.
+    Rows are written as they arrive, so a generator can produce maps larger than memory.
+    """
+    palette = palette or {}
+    spawn_x, spawn_y = spawn if spawn is not None else (-1, -1)
+    offset = grid_offset(len(palette))
+    header = HEADER.pack(MAGIC, VERSION, offset, width, height, tile_size, len(palette), spawn_x, spawn_y)
+    header += b"".join(PALETTE_ENTRY.pack(value, *color) for value, color in sorted(palette.items()))
+
+    with open(path, "wb") as file:
+        file.write(header.ljust(offset, b"\0"))
+        file.write(b"\x01" * (width + 2)) # Solid border, as used by World
+        written = 0
+        for row in rows:
+            if len(row) != width:
+                raise ValueError(f"Row {written} has {len(row)} tiles, expected {width}.")
+            file.write(b"\x01" + bytes(row) + b"\x01")
+            written += 1
+        if written != height:
+            raise ValueError(f"Got {written} rows, expected {height}.")
+        file.write(b"\x01" * (width + 2))
+
+
+def load_map(path: str) -> MapFile:
+    """
+    Memory-maps a .rcmap file. The tiles are not read up front: pages are loaded by the OS
+    when they are first touched, so even huge maps open instantly.
+    The mapping is copy-on-write, so tile changes in the game never modify the file.
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY) # Raises ValueError for an empty file
+
+    if len(mapped) < HEADER.size:
+        raise ValueError(f"'{path}' is truncated: expected at least {HEADER.size} header bytes, got {len(mapped)}.")
+    magic, version, offset, width, height, tile_size, palette_count, spawn_x, spawn_y = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"'{path}' is not a map file (bad magic {magic!r}).")
+    if version != VERSION:
+        raise ValueError(f"'{path}' has unsupported map format version {version}.")
+    size = (width + 2) * (height + 2)
+    if len(mapped) < offset + size:
+        raise ValueError(f"'{path}' is truncated: expected {offset + size} bytes, got {len(mapped)}.")
+
+    palette = {}
+    for i in range(palette_count):
+        value, r, g, b = PALETTE_ENTRY.unpack_from(mapped, HEADER.size + i * PALETTE_ENTRY.size)
+        palette[value] = (r, g, b)
+
+    spawn = (spawn_x, spawn_y) if spawn_x >= 0 and spawn_y >= 0 else None
+    cells = memoryview(mapped)[offset:offset + size]
+    return MapFile(width, height, tile_size, cells, spawn, palette)
+
+
+def read_python_maps(source: str) -> list[list[list[int]]]:
+    """
+    Extracts every `game_map = [...]` literal from Python source without running it.
+    Maps that are computed by code instead of written out cannot be read this way.
+    """
+    maps = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == "game_map" for target in node.targets):
+            maps.append(ast.literal_eval(node.value))
+    return maps
+
+
+def read_markdown_maps(text: str) -> list[tuple[str, list[list[int]]]]:
+    """Extracts the maps from the ```python blocks of a markdown file such as game_maps.md, named after their heading."""
+    maps = []
+    heading = "map"
+    for line_heading, block in re.findall(r"^#+[ \t]*([^\n]+)$|```python\n(.*?)```", text, flags=re.MULTILINE | re.DOTALL):
+        if line_heading:
+            heading = line_heading.strip()
+        elif block:
+            for game_map in read_python_maps(block):
+                maps.append((heading, game_map))
+    return maps
+
+
+def slugify(name: str) -> str:
+    """Turns a heading into a file name, e.g. 'Game Map 1' -> 'game-map-1'."""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "map"
+
+
+def convert(source: str, destination: str, tile_size: int = 64) -> list[str]:
+    """
+    Converts the maps in a maze.py-style Python file or a game_maps.md-style markdown file to .rcmap.
+    A single map is written to `destination`; several maps are written into the `destination` directory.
+    Returns the written paths.
+    """
+    with open(source, encoding="utf-8") as file:
+        text = file.read()
+    if source.endswith(".md"):
+        named_maps = read_markdown_maps(text)
+    else:
+        named_maps = [(os.path.splitext(os.path.basename(source))[0], game_map) for game_map in read_python_maps(text)]
+    if not named_maps:
+        raise ValueError(f"No 'game_map = [...]' literal found in '{source}'.")
+
+    written = []
+    if len(named_maps) == 1 and not os.path.isdir(destination):
+        save_map(destination, named_maps[0][1], tile_size)
+        written.append(destination)
+    else:
+        os.makedirs(destination, exist_ok=True)
+        for name, game_map in named_maps:
+            path = os.path.join(destination, slugify(name) + ".rcmap")
+            save_map(path, game_map, tile_size)
+            written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert and inspect .rcmap map files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="Convert maze.py / game_maps.md maps to .rcmap")
+    convert_parser.add_argument("source", help="Python file with `game_map = [...]` or markdown file with ```python blocks")
+    convert_parser.add_argument("destination", help="Output file (one map) or directory (several maps)")
+    convert_parser.add_argument("--tile-size", type=int, default=64, help="Tile size in pixels (default: 64)")
+
+    info_parser = commands.add_parser("info", help="Print the header of a .rcmap file")
+    info_parser.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        try:
+            for path in convert(args.source, args.destination, args.tile_size):
+                print(f"Wrote {path}")
+        except (OSError, ValueError, SyntaxError) as error:
+            sys.exit(f"Error: {error}")
+    else:
+        map_file = load_map(args.path)
+        print(f"{args.path}: {map_file.width}x{map_file.height} tiles, tile size {map_file.tile_size}, "
+              f"spawn {map_file.spawn or 'automatic'}, {len(map_file.palette)} palette entries")
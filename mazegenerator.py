@@ -1,5 +1,10 @@
+from array import array
+from collections.abc import Iterator
+import argparse
 import random
 
+import numpy as np
+
 
 class Cell:
     """Cell class that defines each walkable Cell on the grid"""
@@ -110,4 +115,350 @@ def getMaze(size: int) -> list[list[int]]:
     return displayMaze(grid)
 
 
+def blankGrid(width: int, height: int) -> bytearray:
+    """
+    Flat (2*height+1) x (2*width+1) byte grid in the getMaze layout (1 = wall, 0 = path) with
+    every cell open and every wall between cells still standing. The grid algorithms only remove walls.
+    """
+    columns = width * 2 + 1
+    wall_row = b"\x01" * columns
+    cell_row = b"\x01\x00" * width + b"\x01"
+    return bytearray(wall_row + (cell_row + wall_row) * height)
+
+
+def backtrackerMaze(width: int, height: int, rng: random.Random) -> bytearray:
+    """
+    Recursive backtracker (depth-first search) without recursion: the visited flags are a bytearray
+    and the backtracking stack is an array of cell indices. Produces long, winding corridors,
+    but the stack can grow to the size of the whole maze.
+    """
+    columns = width * 2 + 1
+    grid = blankGrid(width, height)
+    visited = bytearray(width * height)
+    stack = array("I", [0]) # Cell indices (y * width + x); start in the top left cell like getMaze
+    visited[0] = 1
+
+    # Directions right, left, down, up: step in cell indices and in grid positions
+    cell_steps = (1, -1, width, -width)
+    grid_steps = (1, -1, columns, -columns)
+    children = [] # Reused list of open directions, so the loop allocates nothing per step
+
+    while stack:
+        cell = stack[-1]
+        y, x = divmod(cell, width)
+
+        # Directions that lead to an unvisited neighbour
+        children.clear()
+        if x + 1 < width and not visited[cell + 1]:
+            children.append(0)
+        if x > 0 and not visited[cell - 1]:
+            children.append(1)
+        if y + 1 < height and not visited[cell + width]:
+            children.append(2)
+        if y > 0 and not visited[cell - width]:
+            children.append(3)
+
+        if not children:
+            stack.pop() # Dead end: backtrack
+            continue
+
+        direction = rng.choice(children)
+        choice = cell + cell_steps[direction]
+        visited[choice] = 1
+        grid[(y * 2 + 1) * columns + x * 2 + 1 + grid_steps[direction]] = 0 # Remove the wall between both cells
+        stack.append(choice)
+
+    return grid
+
+
+def kruskalMaze(width: int, height: int, rng: random.Random) -> bytearray:
+    """
+    Randomized Kruskal: visits every inner wall in random order and removes it when the cells on
+    both sides are not connected yet. Connectivity is tracked with a union-find (path halving,
+    union by size) stored in two integer arrays. Gives many short dead ends.
+    """
+    columns = width * 2 + 1
+    grid = blankGrid(width, height)
+    parent = array("I", range(width * height))
+    size = array("I", [1]) * (width * height)
+
+    # Inner walls encoded as cell * 2 + direction (0 = wall to the right, 1 = wall below)
+    walls = array("I")
+    for cell in range(width * height):
+        y, x = divmod(cell, width)
+        if x + 1 < width:
+            walls.append(cell * 2)
+        if y + 1 < height:
+            walls.append(cell * 2 + 1)
+    rng.shuffle(walls)
+
+    def find(cell: int) -> int:
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]] # Path halving
+            cell = parent[cell]
+        return cell
+
+    remaining = width * height - 1 # A spanning tree has one edge less than it has cells
+    for wall in walls:
+        cell, direction = wall >> 1, wall & 1
+        first = find(cell)
+        second = find(cell + (width if direction else 1))
+        if first == second:
+            continue # Already connected: removing this wall would create a loop
+
+        if size[first] < size[second]:
+            first, second = second, first
+        parent[second] = first
+        size[first] += size[second]
+
+        y, x = divmod(cell, width)
+        grid[(y * 2 + 1 + direction) * columns + x * 2 + 1 + (1 - direction)] = 0
+        remaining -= 1
+        if not remaining:
+            break
+
+    return grid
+
+
+def wilsonMaze(width: int, height: int, rng: random.Random) -> bytearray:
+    """
+    Wilson's algorithm: loop-erased random walks from every cell that is not in the maze yet until
+    the walk hits the maze. Produces a uniform spanning tree (every maze equally likely), no bias.
+    Instead of storing the walks, each cell remembers the direction it was last left in,
+    which erases loops for free.
+    """
+    columns = width * 2 + 1
+    grid = blankGrid(width, height)
+    in_maze = bytearray(width * height)
+    exits = bytearray(width * height) # Direction the current walk last left each cell in
+
+    # Directions right, left, down, up: step in cell indices and in grid positions
+    cell_steps = (1, -1, width, -width)
+    grid_steps = (1, -1, columns, -columns)
+
+    order = array("I", range(width * height))
+    rng.shuffle(order)
+    in_maze[order[0]] = 1
+
+    for start in order:
+        # Random walk until the maze is hit
+        cell = start
+        while not in_maze[cell]:
+            y, x = divmod(cell, width)
+            while True:
+                direction = rng.randrange(4)
+                if (direction == 0 and x + 1 < width) or (direction == 1 and x > 0) \
+                        or (direction == 2 and y + 1 < height) or (direction == 3 and y > 0):
+                    break
+            exits[cell] = direction
+            cell += cell_steps[direction]
+
+        # Add the loop-erased path to the maze
+        cell = start
+        while not in_maze[cell]:
+            in_maze[cell] = 1
+            y, x = divmod(cell, width)
+            direction = exits[cell]
+            grid[(y * 2 + 1) * columns + x * 2 + 1 + grid_steps[direction]] = 0
+            cell += cell_steps[direction]
+
+    return grid
+
+
+def ellerRows(width: int, height: int, rng: random.Random) -> Iterator[bytes]:
+    """
+    Eller's algorithm, one grid row at a time. Only the set label of each cell in the current row
+    is kept, so memory is O(width) no matter how tall the maze is.
+    Per maze row: cells in different sets are joined at random, then every set carves down at least
+    once so nothing gets cut off. The last row joins all remaining sets.
+    """
+    columns = width * 2 + 1
+    yield b"\x01" * columns # Top border
+
+    sets = [0] * width # Set label per cell, 0 = not in a set yet
+    next_label = 1
+    for y in range(height):
+        last = y == height - 1
+
+        members = {} # Set label -> columns of this row in that set
+        for x in range(width):
+            if not sets[x]:
+                sets[x] = next_label
+                next_label += 1
+            members.setdefault(sets[x], []).append(x)
+
+        # Cell row: join neighbours in different sets
+        row = bytearray(b"\x01\x00" * width + b"\x01")
+        for x in range(1, width):
+            first, second = sets[x - 1], sets[x]
+            if first != second and (last or rng.random() < 0.5):
+                row[x * 2] = 0
+                if len(members[first]) < len(members[second]):
+                    first, second = second, first
+                for column in members[second]: # Relabel the smaller set
+                    sets[column] = first
+                members[first] += members.pop(second)
+        yield bytes(row)
+
+        # Wall row below: at least one downward passage per set
+        below = bytearray(b"\x01") * columns
+        if not last:
+            next_sets = [0] * width
+            for label, set_columns in members.items():
+                down = [x for x in set_columns if rng.random() < 0.5] or [rng.choice(set_columns)]
+                for x in down:
+                    below[x * 2 + 1] = 0
+                    next_sets[x] = label
+            sets = next_sets
+        yield bytes(below) # The last one is the bottom border
+
+
+def sidewinderRows(width: int, height: int, rng: random.Random) -> Iterator[bytes]:
+    """
+    Sidewinder, one grid row at a time. The top row is one long corridor; every later row is split
+    into runs of cells, and each run opens a single passage up into the row above.
+    The wall row above a maze row is only yielded once that row is decided, so memory is O(width).
+    """
+    columns = width * 2 + 1
+    yield b"\x01" * columns # Top border
+    yield b"\x01" + b"\x00" * (columns - 2) + b"\x01" # First row: one open corridor
+
+    for _ in range(1, height):
+        above = bytearray(b"\x01") * columns
+        row = bytearray(b"\x01\x00" * width + b"\x01")
+        run_start = 0
+        for x in range(width):
+            if x + 1 < width and rng.random() < 0.5:
+                row[x * 2 + 2] = 0 # Extend the run to the right
+            else:
+                above[rng.randrange(run_start, x + 1) * 2 + 1] = 0 # Close the run with a passage up
+                run_start = x + 1
+        yield bytes(above)
+        yield bytes(row)
+
+    yield b"\x01" * columns # Bottom border
+
+
+def binaryTreeRows(width: int, height: int, rng: random.Random) -> Iterator[bytes]:
+    """
+    Binary tree, one grid row at a time: every cell opens a passage either up or to the right.
+    The top row and the right column become long straight corridors (strong diagonal bias),
+    but it is the simplest and fastest algorithm and needs O(width) memory.
+    """
+    columns = width * 2 + 1
+    yield b"\x01" * columns # Top border
+
+    for y in range(height):
+        above = bytearray(b"\x01") * columns
+        row = bytearray(b"\x01\x00" * width + b"\x01")
+        for x in range(width):
+            right = x + 1 < width
+            if right and (y == 0 or rng.random() < 0.5):
+                row[x * 2 + 2] = 0
+            elif y > 0:
+                above[x * 2 + 1] = 0
+        if y > 0:
+            yield bytes(above)
+        yield bytes(row)
+
+    yield b"\x01" * columns # Bottom border
+
+
+# Algorithms that build the whole grid at once: (width, height, rng) -> flat grid bytes
+GRID_ALGORITHMS = {
+    "backtracker": backtrackerMaze,
+    "kruskal": kruskalMaze,
+    "wilson": wilsonMaze,
+}
+# Algorithms that stream the grid row by row: (width, height, rng) -> iterator of grid rows
+ROW_ALGORITHMS = {
+    "eller": ellerRows,
+    "sidewinder": sidewinderRows,
+    "binary-tree": binaryTreeRows,
+}
+ALGORITHMS = [*GRID_ALGORITHMS, *ROW_ALGORITHMS]
+
+
+def mazeRows(width: int, height: int, seed: int | None = None, algorithm: str = "eller") -> Iterator[bytes]:
+    """
+    Yields the (2*height+1) grid rows of a maze, each 2*width+1 bytes (1 = wall, 0 = path).
+    Row algorithms are lazy and never hold more than a couple of rows; grid algorithms
+    are built in full first and then handed out row by row.
+    """
+    rng = random.Random(seed)
+    if algorithm in ROW_ALGORITHMS:
+        yield from ROW_ALGORITHMS[algorithm](width, height, rng)
+    elif algorithm in GRID_ALGORITHMS:
+        columns = width * 2 + 1
+        grid = GRID_ALGORITHMS[algorithm](width, height, rng)
+        for start in range(0, len(grid), columns):
+            yield bytes(grid[start:start + columns])
+    else:
+        raise ValueError(f"Unknown maze algorithm '{algorithm}'. Use one of: {', '.join(ALGORITHMS)}.")
+
+
+def generateMaze(size: int, seed: int | None = None, algorithm: str = "backtracker", height: int | None = None) -> np.ndarray:
+    """
+    Generates a maze carved straight into a flat byte grid.
+    Same layout as getMaze (a (2*size+1) x (2*size+1) grid, 1 = wall, 0 = path, solid border),
+    but without Cell objects or string grids, so it scales to 1000x1000 cells and more.
+    `algorithm` is one of ALGORITHMS, `height` (in cells) defaults to `size` for a square maze.
+    Passing a seed makes the maze reproducible.
+    """
+    height = size if height is None else height
+    if algorithm in GRID_ALGORITHMS:
+        grid = GRID_ALGORITHMS[algorithm](size, height, random.Random(seed))
+    else:
+        grid = bytearray()
+        for row in mazeRows(size, height, seed, algorithm):
+            grid += row
+    return np.frombuffer(grid, dtype=np.uint8).reshape(height * 2 + 1, size * 2 + 1)
+
+
+def generateChunk(chunk_x: int, chunk_y: int, size: int, seed: int | None = None, algorithm: str = "backtracker") -> bytearray:
+    """
+    One chunk of an endless maze as a flat (2*size) x (2*size) tile grid (1 = wall, 0 = path).
+    The chunk is a size x size cell maze without its right and bottom border: the neighbouring
+    chunks' own top and left walls close those sides. Each chunk opens one door in its top and
+    one in its left wall, so every chunk is reachable from the chunks above and to the left of it
+    and the whole endless maze stays connected.
+    The chunk only depends on (seed, chunk_x, chunk_y), so it can be regenerated at any time.
+    """
+    rng = random.Random(f"{seed}:{chunk_x}:{chunk_y}")
+    if algorithm in GRID_ALGORITHMS:
+        grid = GRID_ALGORITHMS[algorithm](size, size, rng)
+    elif algorithm in ROW_ALGORITHMS:
+        grid = b"".join(ROW_ALGORITHMS[algorithm](size, size, rng))
+    else:
+        raise ValueError(f"Unknown maze algorithm '{algorithm}'. Use one of: {', '.join(ALGORITHMS)}.")
+
+    columns = size * 2 + 1
+    tiles = size * 2
+    chunk = bytearray(tiles * tiles)
+    for y in range(tiles): # Drop the right and bottom border
+        chunk[y * tiles:(y + 1) * tiles] = grid[y * columns:y * columns + tiles]
+    chunk[(rng.randrange(size) * 2 + 1) * tiles] = 0 # Door in the left wall
+    chunk[rng.randrange(size) * 2 + 1] = 0           # Door in the top wall
+    return chunk
+
+
+def writeMaze(path: str, width: int, height: int, seed: int | None = None, algorithm: str = "eller", tile_size: int = 64):
+    """
+    Streams a maze straight into a .rcmap file (see mapformat.py). With a row algorithm
+    the whole grid is never in memory, so mazes far taller than RAM allows can be written.
+    """
+    import mapformat
+    mapformat.save_rows(path, width * 2 + 1, height * 2 + 1, mazeRows(width, height, seed, algorithm), tile_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a maze and write it as a .rcmap file")
+    parser.add_argument("path", help="Output .rcmap file")
+    parser.add_argument("--width", type=int, default=50, help="Width in cells (default: 50)")
+    parser.add_argument("--height", type=int, help="Height in cells (default: same as width)")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="eller", help="Maze algorithm (default: eller)")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible maze")
+    args = parser.parse_args()
 
+    writeMaze(args.path, args.width, args.height or args.width, args.seed, args.algorithm)
+    print(f"Wrote {args.path}")
@@ -0,0 +1,256 @@
+"""
+Pathfinding on the tile grid of a main.World.
+
+Two ways to find a way through the map:
+
+    astar(world, start, goal)       one path between two tiles (A*, Manhattan heuristic)
+    distance_field(world, target)   the walking distance from every tile to one target tile (BFS)
+
+A FlowField wraps a distance field: from any tile, the next tile towards the target is the neighbor
+that is one step closer, so any number of agents can walk to the same target without searching
+on their own (see FlowField.next_tiles for moving many agents at once). A Pathfinder caches flow
+fields per target with LRU eviction and drops them all when the world's tiles change.
+
+Movement is 4-connected (no diagonal steps) and every step costs 1, which makes a breadth-first
+search exactly as good as Dijkstra here. Tiles are (x, y) tuples; only map value 0 is walkable.
+
+Usage:
+    python pathfinding.py [--size 100] [--seed 1]   (prints the path length through a generated maze)
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+import argparse
+import heapq
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from main import World
+
+UNREACHABLE = -1 # Distance of walls and of tiles that have no way to the target
+
+
+def check_walkable(world: "World", tile: tuple[int, int], name: str):
+    """Raises ValueError if the tile is outside the map or not walkable."""
+    if not world.is_walkable(*tile):
+        raise ValueError(f"The {name} tile {tile} is not a walkable tile of the map.")
+
+
+def astar(world: "World", start: tuple[int, int], goal: tuple[int, int]) -> list[tuple[int, int]] | None:
+    """
+    Returns the shortest path from start to goal as a list of tiles (both included),
+    or None if the goal cannot be reached.
+    """
+    check_walkable(world, start, "start")
+    check_walkable(world, goal, "goal")
+    cells, stride = world.cells, world.stride
+    start_index, goal_index = world.index(*start), world.index(*goal)
+    goal_x, goal_y = goal
+
+    # Works on indices into the padded storage: the solid border makes bounds checks unnecessary
+    came_from = {start_index: start_index}
+    cost = {start_index: 0}
+    heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start_index)]
+    while heap:
+        _, g, index = heapq.heappop(heap)
+        if index == goal_index:
+            path = [index]
+            while index != start_index:
+                index = came_from[index]
+                path.append(index)
+            return [(i % stride - 1, i // stride - 1) for i in reversed(path)]
+        if g > cost[index]:
+            continue # Outdated entry, the tile was reached on a shorter way since
+        g += 1
+        for neighbor in (index - 1, index + 1, index - stride, index + stride):
+            if cells[neighbor] == 0 and g < cost.get(neighbor, g + 1):
+                cost[neighbor] = g
+                came_from[neighbor] = index
+                heuristic = abs(neighbor % stride - 1 - goal_x) + abs(neighbor // stride - 1 - goal_y)
+                heapq.heappush(heap, (g + heuristic, g, neighbor))
+    return None
+
+
+def distance_field(world: "World", target: tuple[int, int]) -> np.ndarray:
+    """
+    Returns a (height, width) int32 array with the number of steps from every tile to the target
+    (UNREACHABLE for walls and for tiles that are cut off from it).
+    """
+    check_walkable(world, target, "target")
+    stride = world.stride
+    # Walls start as -2 so a single comparison finds the tiles that are walkable and not yet reached
+    distances = np.where(world.padded == 0, UNREACHABLE, -2).astype(np.int32).ravel().tolist()
+    start = world.index(*target)
+    distances[start] = 0
+    queue = [start]
+    append = queue.append
+    for index in queue: # The loop also visits the tiles appended while it runs
+        step = distances[index] + 1
+        # Unrolled over the four neighbors: this loop runs once per walkable tile of the map
+        if distances[index - 1] == UNREACHABLE:
+            distances[index - 1] = step
+            append(index - 1)
+        if distances[index + 1] == UNREACHABLE:
+            distances[index + 1] = step
+            append(index + 1)
+        if distances[index - stride] == UNREACHABLE:
+            distances[index - stride] = step
+            append(index - stride)
+        if distances[index + stride] == UNREACHABLE:
+            distances[index + stride] = step
+            append(index + stride)
+
+    result = np.array(distances, dtype=np.int32).reshape(world.padded.shape)[1:-1, 1:-1]
+    result[result < 0] = UNREACHABLE
+    return np.ascontiguousarray(result)
+
+
+@dataclass
+class FlowField:
+    """Walking distances to one target tile, with helpers to step agents towards it."""
+    target: tuple[int, int]
+    distances: np.ndarray # (height, width) steps to the target, UNREACHABLE for walls and cut-off tiles
+    padded: np.ndarray = field(init=False, repr=False) # distances with an UNREACHABLE border, for neighbor lookups
+    flat: memoryview = field(init=False, repr=False)   # The padded distances as a flat view (fast scalar reads)
+
+    def __post_init__(self):
+        self.padded = np.pad(self.distances, 1, constant_values=UNREACHABLE)
+        self.distances = self.padded[1:-1, 1:-1] # A view, so the distances are stored once
+        self.flat = memoryview(self.padded.reshape(-1))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the field's arrays."""
+        return self.padded.nbytes
+
+    def distance(self, x: int, y: int) -> int:
+        """Returns the number of steps from tile (x, y) to the target, or UNREACHABLE."""
+        return self.flat[(y + 1) * self.padded.shape[1] + x + 1]
+
+    def next_tile(self, x: int, y: int) -> tuple[int, int] | None:
+        """Returns the neighbor of tile (x, y) that is one step closer to the target (None at the target or if cut off)."""
+        step = self.next_index((y + 1) * self.padded.shape[1] + x + 1)
+        if step is None:
+            return None
+        y, x = divmod(step, self.padded.shape[1])
+        return x - 1, y - 1
+
+    def next_index(self, index: int) -> int | None:
+        """next_tile on positions in the flat padded distances."""
+        flat, stride = self.flat, self.padded.shape[1]
+        distance = flat[index]
+        if distance <= 0:
+            return None
+        for neighbor in (index + 1, index - 1, index + stride, index - stride):
+            if flat[neighbor] == distance - 1:
+                return neighbor
+        return None
+
+    def path(self, x: int, y: int) -> list[tuple[int, int]] | None:
+        """Returns the path from tile (x, y) to the target (both included), or None if there is none."""
+        if self.distance(x, y) == UNREACHABLE:
+            return None
+        stride = self.padded.shape[1]
+        path = [(y + 1) * stride + x + 1]
+        while (step := self.next_index(path[-1])) is not None:
+            path.append(step)
+        return [(index % stride - 1, index // stride - 1) for index in path]
+
+    def next_tiles(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized next_tile for many agents: returns the next tiles for the tiles (xs, ys).
+        Agents on the target or on tiles without a way to it stay where they are.
+        """
+        xs = np.asarray(xs, dtype=np.intp) + 1 # Into the padded array
+        ys = np.asarray(ys, dtype=np.intp) + 1
+        offsets = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.intp)
+        neighbors = self.padded[ys[:, None] + offsets[:, 1], xs[:, None] + offsets[:, 0]].astype(np.int64)
+        neighbors[neighbors == UNREACHABLE] = np.iinfo(np.int64).max
+        best = np.argmin(neighbors, axis=1)
+        here = self.padded[ys, xs]
+        move = (here > 0) & (neighbors[np.arange(len(xs)), best] == here - 1)
+        return (xs - 1 + np.where(move, offsets[best, 0], 0),
+                ys - 1 + np.where(move, offsets[best, 1], 0))
+
+
+class Pathfinder:
+    """
+    Pathfinding service for one world. Flow fields are computed once per target and kept in a
+    bounded LRU cache, so agents heading for the same tile share one field. Any tile change
+    (a new world.version) drops all fields, since the distances may no longer hold.
+    """
+    def __init__(self, world: "World", max_bytes: int = 128 * 1024 * 1024):
+        self.world = world
+        self.max_bytes = max_bytes # Memory cap for the cached fields (a 2001 x 2001 field takes 16 MB)
+        self.fields: OrderedDict[tuple[int, int], FlowField] = OrderedDict() # target -> field, oldest first
+        self.bytes_used = 0
+        self.version = world.version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def check_version(self):
+        """Drops the cached fields if the world's tiles changed since they were computed."""
+        if self.version != self.world.version:
+            if self.fields:
+                self.invalidations += 1
+            self.fields.clear()
+            self.bytes_used = 0
+            self.version = self.world.version
+
+    def field(self, target: tuple[int, int]) -> FlowField:
+        """Returns the flow field towards the target tile, computing it on first use."""
+        self.check_version()
+        flow = self.fields.get(target)
+        if flow is not None:
+            self.hits += 1
+            self.fields.move_to_end(target) # Mark as most recently used
+            return flow
+
+        self.misses += 1
+        flow = FlowField(target, distance_field(self.world, target))
+        self.fields[target] = flow
+        self.bytes_used += flow.nbytes
+        while self.bytes_used > self.max_bytes and len(self.fields) > 1:
+            _, evicted = self.fields.popitem(last=False) # Least recently used
+            self.bytes_used -= evicted.nbytes
+            self.evictions += 1
+        return flow
+
+    def find_path(self, start: tuple[int, int], goal: tuple[int, int]) -> list[tuple[int, int]] | None:
+        """
+        Returns a shortest path from start to goal (both included), or None if there is none.
+        Follows the goal's flow field if it is cached, and runs A* otherwise.
+        """
+        self.check_version()
+        flow = self.fields.get(goal)
+        if flow is not None:
+            self.hits += 1
+            self.fields.move_to_end(goal)
+            check_walkable(self.world, start, "start")
+            return flow.path(*start)
+        return astar(self.world, start, goal)
+
+    def stats(self) -> dict[str, float]:
+        """Returns cache counters: hits, misses, evictions, invalidations, cached fields and their size in MB."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "invalidations": self.invalidations, "fields": len(self.fields),
+                "mbytes": self.bytes_used / (1024 * 1024)}
+
+
+if __name__ == "__main__":
+    import main
+    import mazegenerator
+
+    parser = argparse.ArgumentParser(description="Find the way through a generated maze")
+    parser.add_argument("--size", type=int, default=100, help="Maze size in cells per side (default: 100)")
+    parser.add_argument("--seed", type=int, default=1, help="Maze seed (default: 1)")
+    args = parser.parse_args()
+
+    world = main.World(mazegenerator.generateMaze(args.size, seed=args.seed), 64)
+    start, goal = (1, 1), (world.size.width - 2, world.size.height - 2)
+    path = astar(world, start, goal)
+    print(f"{world.size.width}x{world.size.height} maze: " +
+          (f"{len(path) - 1} steps from {start} to {goal}" if path else f"no way from {start} to {goal}"))
@@ -0,0 +1,86 @@
+"""Checks that the cast engines see the same walls on the bundled maps."""
+import math
+
+import numpy as np
+import pytest
+
+import main
+import maze
+
+EXACT = 1e-6 # dda, numpy and the parallel caster step through the same tile boundaries, so they must agree on every ray
+MARCH_TOLERANCE = 1.5     # Pixels; march steps one pixel at a time, so its distances are that coarse
+MARCH_MIN_AGREEMENT = 0.99 # Share of rays march must agree on (it can graze past a corner the exact engines hit)
+
+
+def textured(game_map: list[list[int]]) -> list[list[int]]:
+    """The map with its walls spread over the textured map values 2-4."""
+    return [[2 + (x + 2 * y) % 3 if tile != 0 else 0 for x, tile in enumerate(row)] for y, row in enumerate(game_map)]
+
+
+MAPS = {
+    "default": main.initial_game_map,
+    "maze": maze.game_map,
+    "maze-textured": textured(maze.game_map),
+}
+
+
+def cameras(world: main.World, count: int, seed: int) -> list[tuple[float, float, float]]:
+    """Seeded camera positions inside walkable tiles (away from their walls) with random angles."""
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(world.grid == 0)
+    tiles = free[rng.integers(0, len(free), count)]
+    offsets = rng.uniform(0.2, 0.8, (count, 2)) * world.tile_size
+    angles = rng.uniform(0, 2 * math.pi, count)
+    return [(tx * world.tile_size + ox, ty * world.tile_size + oy, angle)
+            for (ty, tx), (ox, oy), angle in zip(tiles.tolist(), offsets.tolist(), angles.tolist())]
+
+
+def cast_all(world: main.World, casters: dict) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Casts from every camera with every caster; returns the joined (distances, tiles) per caster."""
+    player = main.Player(0, 0, 0, 3, 0.05, 10)
+    # Deep enough that every ray of these closed maps ends at a wall
+    config = main.RaycastingConfig(math.pi / 2.8, 64, world.tile_size * (world.size.width + world.size.height))
+    results = {name: ([], []) for name in casters}
+    for player.x, player.y, player.angle in cameras(world, 20, seed=1):
+        for name, cast in casters.items():
+            hits = cast(config, player)
+            results[name][0].append(np.asarray(hits.distances, dtype=np.float64))
+            results[name][1].append(np.asarray(hits.tiles, dtype=np.int64))
+    return {name: (np.concatenate(distances), np.concatenate(tiles)) for name, (distances, tiles) in results.items()}
+
+
+@pytest.mark.parametrize("map_name", MAPS)
+def test_exact_engines_agree(map_name: str):
+    world = main.World(MAPS[map_name], 64)
+    process_caster = main.ParallelCaster(world, 2, "process")
+    thread_caster = main.ParallelCaster(world, 2, "thread")
+    try:
+        results = cast_all(world, {
+            "dda": lambda config, player: main.cast_rays_dda(config, player, world),
+            "numpy": lambda config, player: main.cast_rays_numpy(config, player, world),
+            "parallel-process": process_caster.cast,
+            "parallel-thread": thread_caster.cast,
+        })
+    finally:
+        process_caster.close()
+        thread_caster.close()
+
+    distances, tiles = results.pop("dda")
+    assert (tiles != 0).all(), "every ray should hit a wall"
+    for name, (other_distances, other_tiles) in results.items():
+        assert np.abs(other_distances - distances).max() <= EXACT, f"{name} distances differ from dda"
+        assert np.array_equal(other_tiles, tiles), f"{name} hit tiles differ from dda"
+
+
+@pytest.mark.parametrize("map_name", MAPS)
+def test_march_agrees(map_name: str):
+    world = main.World(MAPS[map_name], 64)
+    results = cast_all(world, {
+        "dda": lambda config, player: main.cast_rays_dda(config, player, world),
+        "march": lambda config, player: main.cast_rays_march(config, player, world),
+    })
+    (distances, tiles), (march_distances, march_tiles) = results["dda"], results["march"]
+    close = np.abs(march_distances - distances) <= MARCH_TOLERANCE
+    same_tile = march_tiles == tiles
+    assert close.mean() >= MARCH_MIN_AGREEMENT, f"only {close.mean():.1%} of march distances agree with dda"
+    assert same_tile.mean() >= MARCH_MIN_AGREEMENT, f"only {same_tile.mean():.1%} of march hit tiles agree with dda"
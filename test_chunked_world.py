@@ -0,0 +1,45 @@
+"""Checks that an endless ChunkedWorld serves the same chunks with and without its prefetch thread."""
+import threading
+
+import main
+import mazegenerator
+
+
+def generated(world: main.ChunkedWorld, key: tuple[int, int]) -> bytes:
+    """The chunk as generated directly, without the world's cache."""
+    return bytes(mazegenerator.generateChunk(key[0], key[1], world.chunk_tiles // 2, world.seed, world.algorithm))
+
+
+def queue_prefetches(world: main.ChunkedWorld, release: threading.Event) -> list[tuple[int, int]]:
+    """Queues the prefetches ahead of a player facing east behind a task that waits for `release`."""
+    world.prefetcher.submit(release.wait)
+    world.prefetch_ahead(main.Player(0, 0, 0, 3, 0.05, 10))
+    return list(world.pending)
+
+
+def test_chunk_waits_for_a_running_prefetch():
+    world = main.ChunkedWorld(64, seed=3, chunk_cells=4)
+    release = threading.Event()
+    keys = queue_prefetches(world, release)
+    assert keys
+    release.set()
+    for key in keys:
+        assert world.chunk(*key) == generated(world, key)
+    world.close()
+
+
+def test_chunk_after_close_generates_cancelled_prefetches():
+    world = main.ChunkedWorld(64, seed=3, chunk_cells=4)
+    release = threading.Event()
+    keys = queue_prefetches(world, release)
+    threading.Timer(0.1, release.set).start() # close() waits for the running task, but cancels the queued ones
+    world.close()
+    assert not world.pending
+    for key in keys:
+        assert world.chunk(*key) == generated(world, key)
+
+    # Walking on re-centers the window without a prefetch thread
+    player = main.Player(0, 0, 0, 3, 0.05, 10)
+    player.x = player.y = (world.radius + 2) * world.chunk_tiles * world.tile_size
+    assert world.update(player)
+    assert world.counters["recentered"] == 1
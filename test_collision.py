@@ -0,0 +1,83 @@
+"""Checks that sweep_circle keeps a moving circle out of the walls and slides it along them."""
+import math
+
+import numpy as np
+import pytest
+
+import main
+import maze
+
+RADIUS = 10 # The player's collision radius (see setup_player)
+MAPS = {
+    "default": main.initial_game_map,
+    "maze": maze.game_map,
+}
+
+
+def overlaps_wall(world: main.World, x: float, y: float, radius: float) -> bool:
+    """Returns whether the circle overlaps a wall tile (touching within a rounding error is allowed)."""
+    tile_size = world.tile_size
+    for gy in range(int((y - radius) // tile_size), int((y + radius) // tile_size) + 1):
+        for gx in range(int((x - radius) // tile_size), int((x + radius) // tile_size) + 1):
+            if world.is_walkable(gx, gy):
+                continue
+            near_x = min(max(x, gx * tile_size), (gx + 1) * tile_size) # Closest point of the tile
+            near_y = min(max(y, gy * tile_size), (gy + 1) * tile_size)
+            if math.hypot(x - near_x, y - near_y) < radius - 1e-9:
+                return True
+    return False
+
+
+@pytest.mark.parametrize("map_name", MAPS)
+def test_fast_diagonal_moves_stay_out_of_walls(map_name: str):
+    world = main.World(MAPS[map_name], 64)
+    rng = np.random.default_rng(1)
+    free = np.argwhere(world.grid == 0)
+    for tile_y, tile_x in free[rng.integers(0, len(free), 20)].tolist():
+        x, y = (tile_x + 0.5) * world.tile_size, (tile_y + 0.5) * world.tile_size
+        for _ in range(100):
+            # Mostly exact diagonals, which aim the circle right at wall corners, and up to four tiles long
+            angle = (rng.integers(0, 4) + 0.5) * math.pi / 2 + rng.choice([0, rng.normal(0, 0.2)])
+            length = rng.uniform(0.5, 4) * world.tile_size
+            x, y, _ = main.sweep_circle(world, x, y, length * math.cos(angle), length * math.sin(angle), RADIUS)
+            assert not overlaps_wall(world, x, y, RADIUS), f"circle at ({x:.3f}, {y:.3f}) overlaps a wall"
+
+
+@pytest.mark.parametrize("start, move, expected", [
+    ((96, 75), (200, -50), (296, 74)),  # Along the top wall of the default map, pushing up into it
+    ((75, 96), (-50, 150), (74, 246)),  # Along the left wall, pushing left into it
+    ((600, 620), (-200, 30), (400, 630)), # Along the bottom wall, pushing down into it
+])
+def test_slide_keeps_tangential_motion(start, move, expected):
+    world = main.World(main.initial_game_map, 64)
+    x, y, touched = main.sweep_circle(world, *start, *move, RADIUS)
+    assert touched
+    # The whole move along the wall is kept, and the circle rests against the wall (plus the skin gap)
+    assert x == pytest.approx(expected[0], abs=2 * main.COLLISION_SKIN)
+    assert y == pytest.approx(expected[1], abs=2 * main.COLLISION_SKIN)
+    assert not overlaps_wall(world, x, y, RADIUS)
+
+
+def test_corner_stops_both_components():
+    world = main.World(main.initial_game_map, 64)
+    x, y, touched = main.sweep_circle(world, 100, 100, -200, -200, RADIUS)
+    assert touched
+    assert (x, y) == (pytest.approx(74, abs=2 * main.COLLISION_SKIN), pytest.approx(74, abs=2 * main.COLLISION_SKIN))
+
+
+def test_no_slide_stops_at_contact():
+    world = main.World(main.initial_game_map, 64)
+    x, y, touched = main.sweep_circle(world, 96, 96, -100, -50, RADIUS, slide=False)
+    assert touched
+    # Stopped where the left wall was first touched, on the line of the move
+    assert x == pytest.approx(74, abs=2 * main.COLLISION_SKIN)
+    assert y == pytest.approx(96 - (96 - 74) / 2, abs=2 * main.COLLISION_SKIN)
+
+
+def test_can_move_far_outside_the_map():
+    world = main.World(main.initial_game_map, 64)
+    player = main.Player(0, 0, 0, 3, 0.05, RADIUS)
+    assert player.can_move(96, 96, world)
+    # Positions far outside the map (e.g. after a bad teleport) are blocked instead of indexing past the storage
+    for x, y in ((-500, 96), (96, 10_000), (10_000, 10_000), (-5000, -5000)):
+        assert not player.can_move(x, y, world)
@@ -0,0 +1,90 @@
+"""Checks that input recordings round-trip and that cut-off recordings keep their frames."""
+import numpy as np
+import pytest
+
+import inputlog
+import main
+
+FRAMES = 1000
+
+
+def recording() -> inputlog.Recording:
+    """A recording of the default map with a palette, and no frames yet."""
+    return inputlog.Recording(np.array(main.initial_game_map, dtype=np.uint8), 64, (96.5, 100.25, 1.25), 3, 0.05, 10,
+                              screen=(1280, 720), sprites=40, palette={1: (10, 20, 30), 2: (200, 100, 50)})
+
+
+def frame_bits(count: int) -> list[int]:
+    """Seeded control bits, as Controls.to_bits packs them."""
+    rng = np.random.default_rng(1)
+    return [main.Controls(*rng.random(4) < 0.4).to_bits() for _ in range(count)]
+
+
+def test_recorder_round_trip(tmp_path):
+    path = str(tmp_path / "session.rcinput")
+    original = recording()
+    bits = frame_bits(FRAMES)
+    recorder = inputlog.InputRecorder(path, original, flush_frames=64)
+    for frame in bits:
+        recorder.append(frame)
+    recorder.close()
+
+    loaded = inputlog.load_recording(path)
+    assert np.array_equal(loaded.tiles, original.tiles)
+    assert (loaded.tile_size, loaded.start, loaded.move_speed, loaded.rot_speed, loaded.radius) == \
+        (original.tile_size, original.start, original.move_speed, original.rot_speed, original.radius)
+    assert (loaded.screen, loaded.sprites, loaded.palette) == (original.screen, original.sprites, original.palette)
+    assert list(loaded.frames) == bits
+    assert [main.Controls.from_bits(frame).to_bits() for frame in loaded.frames] == bits
+
+
+def test_save_recording_round_trip(tmp_path):
+    path = str(tmp_path / "session.rcinput")
+    original = recording()
+    original.frames = bytearray(frame_bits(FRAMES))
+    inputlog.save_recording(path, original)
+    loaded = inputlog.load_recording(path)
+    assert np.array_equal(loaded.tiles, original.tiles)
+    assert (loaded.start, loaded.palette, loaded.frames) == (original.start, original.palette, original.frames)
+
+
+def test_cut_off_recording_keeps_its_frames(tmp_path):
+    path = str(tmp_path / "session.rcinput")
+    original = recording()
+    bits = frame_bits(FRAMES)
+    recorder = inputlog.InputRecorder(path, original, flush_frames=64)
+    for frame in bits:
+        recorder.append(frame)
+    # The game crashes before close(): only the blocks written so far are in the file
+    recorder.file.flush()
+    with open(path, "rb") as file:
+        data = file.read()
+    recorder.close()
+
+    frames_start = len(original.header())
+    assert len(data) == frames_start + FRAMES // 64 * 64
+    for cut in (frames_start, frames_start + 1, frames_start + 333, len(data)):
+        with open(path, "wb") as file:
+            file.write(data[:cut])
+        loaded = inputlog.load_recording(path)
+        assert np.array_equal(loaded.tiles, original.tiles)
+        assert list(loaded.frames) == bits[:cut - frames_start]
+
+
+@pytest.mark.parametrize("cut", [0, 20, inputlog.HEADER.size + 2, -1])
+def test_recording_cut_off_before_its_frames_raises(tmp_path, cut):
+    path = str(tmp_path / "session.rcinput")
+    header = recording().header()
+    with open(path, "wb") as file:
+        file.write(header[:cut]) # In the fixed header, in the palette, or one map byte short
+    with pytest.raises(ValueError):
+        inputlog.load_recording(path)
+
+
+def test_bad_magic_raises(tmp_path):
+    path = str(tmp_path / "session.rcinput")
+    inputlog.save_recording(path, recording())
+    with open(path, "r+b") as file:
+        file.write(b"RCMP")
+    with pytest.raises(ValueError, match="magic"):
+        inputlog.load_recording(path)
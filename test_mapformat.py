@@ -0,0 +1,79 @@
+"""Checks that .rcmap files round-trip and that damaged files are rejected."""
+import os
+
+import numpy as np
+import pytest
+
+import main
+import mapformat
+import maze
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def tiles(map_file: mapformat.MapFile) -> np.ndarray:
+    """The map's tiles without the border."""
+    cells = np.frombuffer(map_file.cells, dtype=np.uint8).reshape(map_file.height + 2, map_file.width + 2)
+    return cells[1:-1, 1:-1]
+
+
+def test_convert_round_trip(tmp_path):
+    path = str(tmp_path / "maze.rcmap")
+    assert mapformat.convert(os.path.join(HERE, "maze.py"), path, tile_size=32) == [path]
+    map_file = mapformat.load_map(path)
+    assert (map_file.width, map_file.height, map_file.tile_size) == (len(maze.game_map[0]), len(maze.game_map), 32)
+    assert np.array_equal(tiles(map_file), maze.game_map)
+    assert map_file.spawn is None and map_file.palette == {}
+    world = main.World.from_map_file(map_file)
+    assert np.array_equal(world.grid, maze.game_map) and world.tile_size == 32
+
+
+def test_convert_markdown_round_trip(tmp_path):
+    source = os.path.join(HERE, "game_maps.md")
+    with open(source, encoding="utf-8") as file:
+        named_maps = mapformat.read_markdown_maps(file.read())
+    paths = mapformat.convert(source, str(tmp_path / "maps"))
+    assert len(paths) == len(named_maps) > 1
+    for path, (_, game_map) in zip(paths, named_maps):
+        map_file = mapformat.load_map(path)
+        assert np.array_equal(tiles(map_file), game_map) and map_file.tile_size == 64
+
+
+def test_spawn_and_palette_round_trip(tmp_path):
+    path = str(tmp_path / "map.rcmap")
+    palette = {2: (200, 40, 40), 3: (40, 200, 40), 7: (1, 2, 3)} # Odd entry count: the grid offset is padded
+    mapformat.save_map(path, main.initial_game_map, 48, spawn=(3, 5), palette=palette)
+    map_file = mapformat.load_map(path)
+    assert map_file.spawn == (3, 5) and map_file.palette == palette and map_file.tile_size == 48
+    assert np.array_equal(tiles(map_file), main.initial_game_map)
+
+
+@pytest.mark.parametrize("size", [0, 10, mapformat.HEADER.size, "grid"])
+def test_truncated_file_raises(tmp_path, size):
+    path = str(tmp_path / "map.rcmap")
+    mapformat.save_map(path, main.initial_game_map)
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(data[:-1] if size == "grid" else data[:size]) # Cut in the header, or one tile short
+    with pytest.raises(ValueError):
+        mapformat.load_map(path)
+
+
+def test_bad_magic_raises(tmp_path):
+    path = str(tmp_path / "map.rcmap")
+    mapformat.save_map(path, main.initial_game_map)
+    with open(path, "r+b") as file:
+        file.write(b"RCMX")
+    with pytest.raises(ValueError, match="magic"):
+        mapformat.load_map(path)
+
+
+def test_unsupported_version_raises(tmp_path):
+    path = str(tmp_path / "map.rcmap")
+    mapformat.save_map(path, main.initial_game_map)
+    with open(path, "r+b") as file:
+        file.seek(4)
+        file.write((mapformat.VERSION + 1).to_bytes(2, "little"))
+    with pytest.raises(ValueError, match="version"):
+        mapformat.load_map(path)
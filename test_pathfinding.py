@@ -0,0 +1,94 @@
+"""Checks the paths and distance fields of pathfinding.py against a plain BFS, and the Pathfinder's cache."""
+from collections import deque
+
+import numpy as np
+import pytest
+
+import main
+import mazegenerator
+import pathfinding
+
+MAPS = {
+    "default": lambda: main.initial_game_map, # Open rooms with pillars: many paths of the same length
+    "maze": lambda: mazegenerator.generateMaze(15, seed=1),
+}
+
+
+def bfs_distances(grid: np.ndarray, target: tuple[int, int]) -> np.ndarray:
+    """Reference distances: a textbook BFS over the walkable tiles, -1 where the target cannot be reached."""
+    height, width = grid.shape
+    distances = np.full(grid.shape, -1)
+    distances[target[1], target[0]] = 0
+    queue = deque([target])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < width and 0 <= ny < height and grid[ny, nx] == 0 and distances[ny, nx] < 0:
+                distances[ny, nx] = distances[y, x] + 1
+                queue.append((nx, ny))
+    return distances
+
+
+def check_path(world: main.World, path: list[tuple[int, int]], start: tuple[int, int], goal: tuple[int, int]):
+    """Asserts that the path runs from start to goal over walkable tiles in single 4-connected steps."""
+    assert path[0] == start and path[-1] == goal
+    assert all(world.is_walkable(*tile) for tile in path)
+    assert all(abs(ax - bx) + abs(ay - by) == 1 for (ax, ay), (bx, by) in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("map_name", MAPS)
+def test_paths_match_bfs(map_name: str):
+    world = main.World(MAPS[map_name](), 64)
+    rng = np.random.default_rng(1)
+    free = [tuple(tile) for tile in np.argwhere(world.grid == 0)[:, ::-1].tolist()]
+    for _ in range(10):
+        goal = free[rng.integers(len(free))]
+        expected = bfs_distances(world.grid, goal)
+        flow = pathfinding.FlowField(goal, pathfinding.distance_field(world, goal))
+        assert np.array_equal(flow.distances, expected)
+        for _ in range(10):
+            start = free[rng.integers(len(free))]
+            path = pathfinding.astar(world, start, goal)
+            check_path(world, path, start, goal)
+            assert len(path) - 1 == expected[start[1], start[0]]
+            flow_path = flow.path(*start)
+            check_path(world, flow_path, start, goal)
+            assert len(flow_path) == len(path)
+
+
+def test_unreachable_goal():
+    world = main.World(main.initial_game_map, 64)
+    for x in range(1, world.size.width - 1): # Close the pillar row above the bottom corridor
+        world.set_tile(x, world.size.height - 3, 1)
+    assert pathfinding.astar(world, (1, 1), (1, 9)) is None
+    assert pathfinding.distance_field(world, (1, 9))[1, 1] == pathfinding.UNREACHABLE
+    with pytest.raises(ValueError):
+        pathfinding.astar(world, (0, 0), (1, 9)) # A wall start
+
+
+def test_set_tile_invalidates_fields():
+    world = main.World(main.initial_game_map, 64)
+    finder = pathfinding.Pathfinder(world)
+    before = finder.field((9, 1))
+    assert before.distance(1, 1) == 8
+    world.set_tile(5, 1, 1) # Block the top corridor: the way now goes down to the next corridor and back
+    after = finder.field((9, 1))
+    assert after is not before
+    assert after.distance(1, 1) == 12
+    assert np.array_equal(after.distances, bfs_distances(world.grid, (9, 1)))
+    assert finder.stats()["invalidations"] == 1
+    assert (5, 1) not in finder.find_path((1, 1), (9, 1))
+
+
+def test_eviction_keeps_bytes_within_budget():
+    world = main.World(mazegenerator.generateMaze(15, seed=1), 64)
+    field_bytes = pathfinding.FlowField((1, 1), pathfinding.distance_field(world, (1, 1))).nbytes
+    finder = pathfinding.Pathfinder(world, max_bytes=3 * field_bytes)
+    targets = [(x, 1) for x in range(1, world.size.width - 1, 2)]
+    for target in targets:
+        finder.field(target)
+        finder.field(targets[0]) # Used all the time, so it is never the least recently used one
+        assert finder.bytes_used <= finder.max_bytes
+        assert finder.bytes_used == sum(flow.nbytes for flow in finder.fields.values())
+    assert list(finder.fields) == [targets[-2], targets[-1], targets[0]]
+    assert finder.stats()["evictions"] == len(targets) - 3
@@ -0,0 +1,75 @@
+"""Checks that the potentially visible sets never miss a tile that is in line of sight."""
+import numpy as np
+import pytest
+
+import main
+import maze
+import pvs
+
+MAPS = {
+    "default": main.initial_game_map,
+    "maze": maze.game_map,
+}
+SOURCE_POINTS = 32 # Random points per source tile the brute force looks from
+TARGET_POINTS = np.array([(x, y) for x in (0.1, 0.5, 0.9) for y in (0.1, 0.5, 0.9)]) # Points looked at in every tile
+
+
+def line_of_sight(solid: np.ndarray, start_x: np.ndarray, start_y: np.ndarray, end_x: np.ndarray,
+                  end_y: np.ndarray) -> np.ndarray:
+    """
+    Returns, for every segment (in tiles), whether it reaches its end point's tile without passing
+    through a wall tile on the way. Walks every tile each segment passes through, like cast_rays_dda.
+    """
+    length = np.hypot(end_x - start_x, end_y - start_y)
+    dir_x, dir_y = (end_x - start_x) / length, (end_y - start_y) / length
+    with np.errstate(divide="ignore"):
+        delta_x, delta_y = np.abs(1 / dir_x), np.abs(1 / dir_y)
+    tile_x, tile_y = np.floor(start_x).astype(np.intp), np.floor(start_y).astype(np.intp)
+    end_tile = np.floor(end_y).astype(np.intp) * solid.shape[1] + np.floor(end_x).astype(np.intp)
+    step_x, step_y = np.where(dir_x < 0, -1, 1), np.where(dir_y < 0, -1, 1)
+    side_x = np.where(dir_x < 0, start_x - tile_x, tile_x + 1 - start_x) * delta_x
+    side_y = np.where(dir_y < 0, start_y - tile_y, tile_y + 1 - start_y) * delta_y
+
+    seen = np.zeros(len(length), dtype=bool)
+    active = np.flatnonzero(tile_y * solid.shape[1] + tile_x != end_tile)
+    seen[tile_y * solid.shape[1] + tile_x == end_tile] = True
+    while active.size:
+        step_in_x = side_x[active] < side_y[active]
+        tile_x[active] += np.where(step_in_x, step_x[active], 0)
+        tile_y[active] += np.where(step_in_x, 0, step_y[active])
+        side_x[active] += np.where(step_in_x, delta_x[active], 0)
+        side_y[active] += np.where(step_in_x, 0, delta_y[active])
+        arrived = tile_y[active] * solid.shape[1] + tile_x[active] == end_tile[active]
+        seen[active[arrived]] = True
+        active = active[~arrived & ~solid[tile_y[active], tile_x[active]]]
+    return seen
+
+
+def visible_tiles(world: main.World, points: np.ndarray) -> np.ndarray:
+    """Returns a (height, width) bool array of the tiles a segment from any of the points (in tiles) sees."""
+    height, width = world.size.height, world.size.width
+    ys, xs = np.divmod(np.arange(width * height), width)
+    targets_x = (xs[:, None] + TARGET_POINTS[:, 0]).ravel()
+    targets_y = (ys[:, None] + TARGET_POINTS[:, 1]).ravel()
+    seen = line_of_sight(world.grid != 0, np.repeat(points[:, 0], len(targets_x)), np.repeat(points[:, 1], len(targets_x)),
+                         np.tile(targets_x, len(points)), np.tile(targets_y, len(points)))
+    return seen.reshape(len(points), height, width, len(TARGET_POINTS)).any(axis=(0, 3))
+
+
+@pytest.mark.parametrize("map_name", MAPS)
+def test_visible_mask_covers_line_of_sight(map_name: str):
+    world = main.World(MAPS[map_name], 64)
+    visible_set = pvs.build(world, workers=1)
+    rng = np.random.default_rng(1)
+    for tile_y, tile_x in np.argwhere(world.grid == 0).tolist():
+        points = np.array([tile_x, tile_y]) + rng.uniform(0.01, 0.99, (SOURCE_POINTS, 2))
+        missed = np.argwhere(visible_tiles(world, points) & ~visible_set.visible_mask(tile_x, tile_y))
+        assert not missed.size, f"tiles (y, x) {missed.tolist()} are in sight of tile ({tile_x}, {tile_y}) but not in its set"
+
+
+def test_visible_mask_covers_corner_gap():
+    # The line from (3.828, 4.829) to the center of tile (6, 7) passes within a thousandth of a tile of
+    # three pillar corners: no sampled ray gets through, but the tile must still be in the set
+    world = main.World(main.initial_game_map, 64)
+    visible_set = pvs.build(world, workers=1)
+    assert visible_set.visible_mask(3, 4)[7, 6]
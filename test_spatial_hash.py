@@ -0,0 +1,116 @@
+"""Checks the SpatialHash queries against brute force over all entities."""
+import math
+
+import numpy as np
+import pytest
+
+import main
+
+CELL_SIZE = 128
+
+
+def entities(seed: int, count: int = 300) -> list[main.Sprite]:
+    """Seeded entities around the origin (cells on both sides of 0); a third sit on or straddle cell borders."""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-4 * CELL_SIZE, 4 * CELL_SIZE, (count, 2))
+    # Snap some coordinates onto a cell border, or just next to it, so their circles reach into the next cell
+    borders = np.round(positions / CELL_SIZE) * CELL_SIZE + rng.choice([0, -1e-9, 1e-9, -3, 3], (count, 2))
+    positions = np.where(rng.random((count, 2)) < 0.33, borders, positions)
+    radii = np.where(rng.random(count) < 0.5, 0.0, rng.uniform(1, 40, count))
+    return [main.Sprite(x, y, radius=radius) for (x, y), radius in zip(positions.tolist(), radii.tolist())]
+
+
+def filled_hash(items: list[main.Sprite]) -> main.SpatialHash:
+    """A SpatialHash holding the items."""
+    spatial = main.SpatialHash(CELL_SIZE)
+    for item in items:
+        spatial.insert(item)
+    return spatial
+
+
+def queries(seed: int, count: int = 200) -> np.ndarray:
+    """Seeded query points, a third of them on cell borders or corners."""
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-5 * CELL_SIZE, 5 * CELL_SIZE, (count, 2))
+    return np.where(rng.random((count, 1)) < 0.33, np.round(points / CELL_SIZE) * CELL_SIZE, points)
+
+
+def ray_hit(item: main.Sprite, x: float, y: float, dir_x: float, dir_y: float, radius: float) -> float | None:
+    """Distance along the unit ray at which it comes within the item's radius plus `radius`, or None."""
+    size = item.radius + radius
+    ox, oy = item.x - x, item.y - y
+    if ox * ox + oy * oy <= size * size:
+        return 0.0
+    along = ox * dir_x + oy * dir_y
+    squared = size * size - (ox * ox + oy * oy - along * along)
+    if along < 0 or squared < 0:
+        return None
+    return along - math.sqrt(squared)
+
+
+def test_query_radius_matches_brute_force():
+    items = entities(1)
+    spatial = filled_hash(items)
+    rng = np.random.default_rng(2)
+    for x, y in queries(3).tolist():
+        radius = rng.uniform(0, 2 * CELL_SIZE)
+        expected = {id(item) for item in items if (item.x - x) ** 2 + (item.y - y) ** 2 <= radius * radius}
+        found = spatial.query_radius(x, y, radius)
+        assert len(found) == len(expected) and {id(item) for item in found} == expected
+
+
+@pytest.mark.parametrize("max_distance", [math.inf, CELL_SIZE / 2])
+def test_nearest_matches_brute_force(max_distance: float):
+    items = entities(4)
+    spatial = filled_hash(items)
+    for x, y in queries(5).tolist():
+        exclude = min(items, key=lambda item: (item.x - x) ** 2 + (item.y - y) ** 2)
+        for skip in (None, exclude):
+            distances = [math.hypot(item.x - x, item.y - y) for item in items if item is not skip]
+            expected = min(distances)
+            found = spatial.nearest(x, y, max_distance, exclude=skip)
+            if expected > max_distance:
+                assert found is None
+            else:
+                assert found is not skip and math.hypot(found.x - x, found.y - y) == expected
+
+
+@pytest.mark.parametrize("radius", [0.0, 12.0])
+def test_query_ray_matches_brute_force(radius: float):
+    items = entities(6)
+    spatial = filled_hash(items)
+    rng = np.random.default_rng(7)
+    for x, y in queries(8).tolist():
+        angle = rng.uniform(0, 2 * math.pi)
+        if rng.random() < 0.25:
+            angle = rng.integers(0, 8) * math.pi / 4 # Along cell borders and through cell corners
+        dir_x, dir_y = math.cos(angle), math.sin(angle)
+        max_distance = rng.uniform(0, 6 * CELL_SIZE)
+        expected = sorted((distance, id(item)) for item in items
+                          if (distance := ray_hit(item, x, y, dir_x, dir_y, radius)) is not None and distance <= max_distance)
+        hits = spatial.query_ray(x, y, dir_x, dir_y, max_distance, radius)
+        # The same objects, nearest first (objects at the same distance may come in any order)
+        assert sorted(id(item) for _, item in hits) == sorted(key for _, key in expected)
+        assert [distance for distance, _ in hits] == pytest.approx([distance for distance, _ in expected])
+        first = spatial.query_ray(x, y, dir_x, dir_y, max_distance, radius, first=True)
+        assert [distance for distance, _ in first] == pytest.approx([distance for distance, _ in expected[:1]])
+
+
+def test_queries_follow_moves_and_removals():
+    items = entities(9)
+    spatial = filled_hash(items)
+    rng = np.random.default_rng(10)
+    for item in items[:100]: # Move across cell borders, a few onto them
+        x, y = item.x + rng.normal(0, CELL_SIZE), item.y + rng.normal(0, CELL_SIZE)
+        if rng.random() < 0.3:
+            x = round(x / CELL_SIZE) * CELL_SIZE
+        spatial.move(item, x, y)
+    for item in items[100:150]:
+        spatial.remove(item)
+    kept = items[:100] + items[150:]
+    assert len(spatial) == len(kept)
+    for x, y in queries(11).tolist():
+        expected = {id(item) for item in kept if (item.x - x) ** 2 + (item.y - y) ** 2 <= CELL_SIZE ** 2}
+        assert {id(item) for item in spatial.query_radius(x, y, CELL_SIZE)} == expected
+        nearest = spatial.nearest(x, y)
+        assert math.hypot(nearest.x - x, nearest.y - y) == min(math.hypot(item.x - x, item.y - y) for item in kept)